@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for Python Task Manager
+วัดประสิทธิภาพและการใช้หน่วยความจำของ Task Manager
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+
+from task_manager import (
+    JsonFileStorage, ShardedTaskManager, Task, TaskManager, TaskStore, create_storage,
+    default_data_file, import_json_snapshot, iter_task_records, migrate_json_to_sqlite,
+)
+
+# metric ที่ใช้เปรียบเทียบผลระหว่าง revision (ค่ามากขึ้นคือแย่ลง)
+COMPARED_METRICS = ("seconds", "bytes", "peak_bytes")
+
+
+class LegacyTask:
+    """Task แบบเดิม (ใช้ __dict__ และเก็บวันที่เป็น string) สำหรับเปรียบเทียบ"""
+
+    def __init__(self, title: str, description: str, due_date: str):
+        self.id = str(uuid.uuid4())[:8]
+        self.title = title
+        self.description = description
+        self.due_date = due_date
+        self.completed = False
+        self.created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+THAI_WORDS = ["ประชุม", "รายงาน", "ทีม", "ลูกค้า", "โปรเจกต์", "ส่ง", "ตรวจสอบ", "แก้ไข",
+              "เอกสาร", "งบประมาณ", "นัดหมาย", "ทดสอบ", "ระบบ", "ออกแบบ", "สรุป", "ประจำเดือน"]
+ENGLISH_WORDS = ["meeting", "report", "review", "deploy", "client", "budget", "design", "fix",
+                 "bug", "release", "sprint", "docs", "invoice", "backup", "server", "weekly"]
+
+
+def generate_records(count: int, seed: int = 42, completed_ratio: float = 0.3):
+    """
+    สร้างข้อมูลงานจำลองสำหรับ benchmark คืน (ชื่อ, คำอธิบาย, วันที่ครบกำหนด, เสร็จแล้ว)
+
+    ข้อความผสมภาษาไทยและอังกฤษ (ภาษาไทยราว 60%) วันที่ครบกำหนดเบ้ไปทางอนาคตอันใกล้
+    แบบ exponential (งานส่วนใหญ่ครบกำหนดภายในสองสามสัปดาห์ มีหางยาวถึงหลายปี)
+    และราว 20% เลยกำหนดแล้ว
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    for i in range(count):
+        words = THAI_WORDS if rng.random() < 0.6 else ENGLISH_WORDS
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(2, 4))) + f" {i}"
+        description = " ".join(rng.choice(THAI_WORDS + ENGLISH_WORDS)
+                               for _ in range(rng.randint(0, 12)))
+        offset = int(rng.expovariate(1 / 14))
+        if rng.random() < 0.2:
+            offset = -offset - 1
+        due = today + timedelta(days=max(-3650, min(3650, offset)))
+        yield (title, description, due.isoformat(), rng.random() < completed_ratio)
+
+
+def measure_memory(build) -> int:
+    """วัดหน่วยความจำ (byte) ที่ใช้ในการสร้างข้อมูลด้วย tracemalloc"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        data = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del data
+    return after - before
+
+
+def benchmark_memory(count: int) -> dict:
+    """เปรียบเทียบหน่วยความจำของ LegacyTask, Task และ TaskStore"""
+    records = list(generate_records(count))
+
+    def build_legacy():
+        tasks = []
+        for title, description, due, completed in records:
+            task = LegacyTask(title, description, due)
+            task.completed = completed
+            tasks.append(task)
+        return tasks
+
+    def build_tasks():
+        tasks = []
+        for title, description, due, completed in records:
+            task = Task(title, description, due)
+            task.completed = completed
+            tasks.append(task)
+        return tasks
+
+    def build_store():
+        return TaskStore.from_tasks(build_tasks())
+
+    results = {
+        'legacy_task': measure_memory(build_legacy),
+        'slots_task': measure_memory(build_tasks),
+        'task_store': measure_memory(build_store),
+    }
+    return {name: {'bytes': size, 'bytes_per_task': size / count}
+            for name, size in results.items()}
+
+
+def write_task_file(path: str, count: int, schema: str = "current", seed: int = 42,
+                    completed_ratio: float = 0.3) -> None:
+    """
+    เขียนไฟล์ tasks.json จำลองจำนวน count งานทีละรายการ (ไม่สร้างรายการทั้งหมดในหน่วยความจำ)
+
+    schema = "current" ใช้รูปแบบ Task.to_dict, "alias" ใช้ task_id แบบ demo_advanced.json
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        separator = "\n"
+        for title, description, due, completed in generate_records(count, seed, completed_ratio):
+            task = Task(title, description, due)
+            task.completed = completed
+            record = task.to_dict()
+            if schema == "alias":
+                del record['v']
+                record['task_id'] = record.pop('id')
+            f.write(separator + json.dumps(record, ensure_ascii=False, indent=2))
+            separator = ",\n"
+        f.write("\n]")
+
+
+def legacy_from_dict(data: dict) -> Task:
+    """from_dict แบบเดิม: เรียก __init__ เต็มรูปแบบแล้วเขียนทับ field (สำหรับเปรียบเทียบ)"""
+    task = Task(data['title'], data['description'], data['due_date'])
+    task.id = data['id']
+    task.completed = data['completed']
+    task.created_at = data['created_at']
+    return task
+
+
+def best_of(function, repeat: int = 3) -> float:
+    """จับเวลาฟังก์ชัน (วินาที) คืนค่าที่เร็วที่สุดจาก repeat ครั้ง"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_load(count: int) -> dict:
+    """วัดความเร็วการโหลดไฟล์ทั้งสอง schema และการสร้าง Task จาก record"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results = {}
+        for schema in ("current", "alias"):
+            path = os.path.join(temp_dir, f"{schema}.json")
+            write_task_file(path, count, schema)
+            records = list(iter_task_records(path))
+            results[f'from_dict_{schema}'] = best_of(lambda: [Task.from_dict(r) for r in records])
+            results[f'load_{schema}'] = best_of(lambda: JsonFileStorage(path).load())
+            if schema == "current":
+                results['legacy_from_dict'] = best_of(
+                    lambda: [legacy_from_dict(r) for r in records])
+    return {name: {'seconds': seconds, 'tasks_per_sec': count / seconds}
+            for name, seconds in results.items()}
+
+
+def time_command(command, repeat: int = 3) -> float:
+    """จับเวลาคำสั่ง (วินาที) คืนค่าที่เร็วที่สุดจาก repeat ครั้ง"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_startup(count: int) -> dict:
+    """เปรียบเทียบเวลาเริ่มทำงานของคำสั่งแบบครั้งเดียวกับการโหลด TaskManager เต็มรูปแบบ"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_manager.py")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "tasks.json")
+        write_task_file(data_file, count)
+        full_load = (
+            "import sys; sys.path.insert(0, %r); from task_manager import TaskManager; "
+            "TaskManager(%r)" % (os.path.dirname(script), data_file)
+        )
+        return {
+            'python_startup': time_command([sys.executable, "-c", "pass"]),
+            'full_load': time_command([sys.executable, "-c", full_load]),
+            'cli_stats': time_command([sys.executable, script, "--file", data_file, "stats"]),
+            'cli_search': time_command([sys.executable, script, "--file", data_file,
+                                        "search", "ประชุม"]),
+            'cli_add': time_command([sys.executable, script, "--file", data_file,
+                                     "add", "benchmark", "--due", "2024-01-15"]),
+        }
+
+
+def timed(function, ops: int = 1, repeat: int = 1) -> dict:
+    """จับเวลาการทำงาน ops ครั้งใน function (ค่าที่เร็วที่สุดจาก repeat รอบ)"""
+    seconds = best_of(function, repeat)
+    return {'seconds': seconds, 'ops': ops, 'us_per_op': seconds / ops * 1e6}
+
+
+def convert_store(kind: str, json_path: str, path: str) -> None:
+    """แปลงไฟล์ JSON เป็นไฟล์ข้อมูลของ storage แบบ kind ที่ path"""
+    if kind == "sqlite":
+        migrate_json_to_sqlite(json_path, path)
+    elif kind == "snapshot":
+        import_json_snapshot(json_path, path)
+    else:
+        with open(json_path, 'rb') as source, open(path, 'wb') as target:
+            target.write(source.read())
+
+
+def prepare_store(kind: str, directory: str, count: int, seed: int, completed_ratio: float) -> str:
+    """สร้างไฟล์ข้อมูลจำลองสำหรับ storage แต่ละแบบ คืน path ของไฟล์"""
+    json_path = os.path.join(directory, "tasks.json")
+    if not os.path.exists(json_path):
+        write_task_file(json_path, count, seed=seed, completed_ratio=completed_ratio)
+    if kind == "json":
+        return json_path
+    path = os.path.join(directory, {"sqlite": "tasks.db", "snapshot": "tasks.snap"}.get(
+        kind, "journal.json"))
+    convert_store(kind, json_path, path)
+    return path
+
+
+def benchmark_operations(count: int, kind: str = "json", seed: int = 42,
+                         completed_ratio: float = 0.3, repeat: int = 3,
+                         memory: bool = True) -> dict:
+    """
+    จับเวลาการทำงานหลักของ TaskManager บน store จำลองขนาด count งาน
+
+    การแก้ไข (add/complete/delete) วัดเฉพาะงานในหน่วยความจำโดยเลื่อน autosave ออกไป
+    (storage แบบ journal/sqlite ยังรวมเวลาเขียนดิสก์ของแต่ละรายการ) ส่วนการบันทึกทั้งไฟล์
+    วัดแยกใน save_tasks
+    """
+    rng = random.Random(seed)
+    sample = min(count, 1000)
+    today = date.today().isoformat()
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir, open(os.devnull, 'w', encoding='utf-8') as devnull:
+        path = prepare_store(kind, temp_dir, count, seed, completed_ratio)
+
+        def open_manager():
+            with redirect_stdout(devnull):
+                return TaskManager(storage=create_storage(kind, path), autosave_delay=3600,
+                                   autosave_max_latency=3600)
+
+        if memory:
+            tracemalloc.start()
+            try:
+                manager = open_manager()
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            manager.close()
+            del manager
+            results['memory'] = {'bytes': current, 'peak_bytes': peak,
+                                 'bytes_per_task': current / count}
+
+        managers = []
+        results['load_tasks'] = timed(lambda: managers.append(open_manager()), repeat=repeat)
+        manager = managers.pop()
+        for other in managers:
+            other.close()
+        ids = [task.id for task in manager.iter_tasks()]
+        lookups = [rng.choice(ids) for _ in range(sample)]
+
+        with redirect_stdout(devnull):
+            results['find_by_id'] = timed(
+                lambda: [manager._find_task_by_id(task_id) for task_id in lookups],
+                ops=sample, repeat=repeat)
+            results['search_keyword_cold'] = timed(lambda: manager.find_tasks("ประชุม"))
+            results['search_keyword'] = timed(lambda: manager.find_tasks("ประชุม"), repeat=repeat)
+            results['search_english'] = timed(lambda: manager.find_tasks("report"), repeat=repeat)
+            results['search_due_date'] = timed(lambda: manager.find_tasks(due_date=today),
+                                               repeat=repeat)
+            results['count_search'] = timed(lambda: manager.count_search_results("ประชุม"),
+                                            repeat=repeat)
+            results['view_tasks'] = timed(lambda: manager.view_tasks(), repeat=repeat)
+            results['view_first_page'] = timed(
+                lambda: manager.view_tasks(page_size=20, more=lambda: False), repeat=repeat)
+            results['stats'] = timed(manager.stats, repeat=repeat)
+            results['due_histogram'] = timed(lambda: manager.due_histogram("week"), repeat=repeat)
+            results['overdue_tasks'] = timed(manager.overdue_tasks, repeat=repeat)
+            results['tasks_due_within'] = timed(lambda: manager.tasks_due_within(7), repeat=repeat)
+            results['add_task'] = timed(
+                lambda: [manager.add_task(f"benchmark {i}", "", today) for i in range(sample)],
+                ops=sample)
+            results['mark_completed'] = timed(
+                lambda: [manager.mark_completed(task_id) for task_id in lookups], ops=sample)
+            results['delete_task'] = timed(
+                lambda: [manager.delete_task(task_id) for task_id in set(lookups)],
+                ops=len(set(lookups)))
+            results['save_tasks'] = timed(lambda: manager.save_tasks(verbose=False), repeat=repeat)
+            manager.close()
+    for result in results.values():
+        if 'seconds' in result:
+            result['tasks'] = count
+    return results
+
+
+def benchmark_scaling(sizes: list, kind: str = "json", seed: int = 42,
+                      completed_ratio: float = 0.3, batch: int = 1000, repeat: int = 3) -> dict:
+    """
+    ตรวจว่าการแก้ไขแบบ batch (add_many/complete_many/delete_many) มีต้นทุนต่องานคงที่
+    ไม่ว่า store จะใหญ่แค่ไหน
+
+    จับเวลา batch ละ batch งานบน store แต่ละขนาดใน sizes แล้วคำนวณ growth คือ µs/op
+    ของ store ใหญ่สุดหารด้วยของ store เล็กสุด (ประมาณ 1 ถ้าเป็น O(1) ต่องาน และโตตาม
+    สัดส่วนขนาด store ถ้าเป็น O(N)) ปิด garbage collector ระหว่างจับเวลาแบบเดียวกับ timeit
+    เพราะเวลาที่ GC ไล่ตรวจ object ทั้ง store จะกลบต้นทุนของตัวการทำงานเอง
+    """
+    today = date.today().isoformat()
+    results = {}
+    for count in sorted(sizes):
+        rng = random.Random(seed)
+        timings = {name: [] for name in ('add_many', 'complete_many', 'delete_many')}
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            path = prepare_store(kind, temp_dir, count, seed, completed_ratio)
+            manager = TaskManager(storage=create_storage(kind, path), autosave_delay=3600,
+                                  autosave_max_latency=3600)
+            for round_number in range(repeat):
+                records = [{'title': f"scaling {round_number} {i}", 'due_date': today}
+                           for i in range(batch)]
+                gc.collect()
+                gc.disable()
+                try:
+                    timings['add_many'].append(best_of(lambda: manager.add_many(records), 1))
+                    pending = [task.id for task in manager.iter_tasks() if not task.completed]
+                    targets = rng.sample(pending, min(batch, len(pending)))
+                    timings['complete_many'].append(
+                        best_of(lambda: manager.complete_many(targets), 1))
+                    timings['delete_many'].append(best_of(lambda: manager.delete_many(targets), 1))
+                finally:
+                    gc.enable()
+            manager.close()
+        results[str(count)] = {name: {'seconds': min(values), 'ops': batch, 'tasks': count,
+                                      'us_per_op': min(values) / batch * 1e6}
+                               for name, values in timings.items()}
+    smallest, largest = results[str(min(sizes))], results[str(max(sizes))]
+    results['growth'] = {name: largest[name]['us_per_op'] / smallest[name]['us_per_op']
+                         for name in smallest}
+    return results
+
+
+def write_shards(directory: str, count: int, shards: int, kind: str = "json", seed: int = 42,
+                 completed_ratio: float = 0.3) -> None:
+    """แบ่งงานจำลอง count งานลงไฟล์ shard000, shard001, ... จำนวน shards ไฟล์ (วนรอบทีละงาน)"""
+    records = [[] for _ in range(shards)]
+    for i, (title, description, due, completed) in enumerate(
+            generate_records(count, seed, completed_ratio)):
+        task = Task(title, description, due)
+        task.completed = completed
+        records[i % shards].append(task.to_dict())
+    extension = os.path.splitext(default_data_file(kind))[1]
+    for i, shard in enumerate(records):
+        json_path = os.path.join(directory, f"shard{i:03d}.source")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(shard, f, ensure_ascii=False)
+        convert_store(kind, json_path, os.path.join(directory, f"shard{i:03d}{extension}"))
+        os.unlink(json_path)
+
+
+def benchmark_sharding(count: int, shard_counts: list, kind: str = "json", seed: int = 42,
+                       completed_ratio: float = 0.3, repeat: int = 3,
+                       processes: int = 0) -> dict:
+    """
+    เปรียบเทียบการค้นหาข้ามหลาย store แบบเดิม (โหลด TaskManager ทีละ shard ตามลำดับ)
+    กับ ShardedTaskManager ที่อ่านทุก shard พร้อมกันใน process pool
+
+    load คือการอ่านทุก shard เพื่อสร้าง index ID -> shard (sequential_load คือการโหลด
+    TaskManager ทุก shard) ส่วน speedup คือเวลาแบบเดิมหารด้วยเวลาแบบ sharded
+    """
+    results = {}
+    for shards in shard_counts:
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            write_shards(temp_dir, count, shards, kind, seed, completed_ratio)
+            sharded = ShardedTaskManager(temp_dir, kind, processes=processes or None)
+            paths = [sharded.shard_path(name) for name in sharded.shard_names()]
+
+            def sequential(search: bool):
+                for path in paths:
+                    manager = TaskManager(storage=create_storage(kind, path))
+                    if search:
+                        manager.find_tasks("ประชุม")
+                    manager.close()
+
+            def sharded_load():
+                sharded._owners = None
+                sharded.shard_of("")
+
+            result = {
+                'sequential_load': timed(lambda: sequential(False), repeat=repeat),
+                'sequential_search': timed(lambda: sequential(True), repeat=repeat),
+                # รอบแรกเริ่ม process pool จึงไม่นับเวลาเริ่ม worker
+                'sharded_load': timed(sharded_load, repeat=repeat + 1),
+                'sharded_search': timed(lambda: sharded.find_tasks("ประชุม"), repeat=repeat),
+                'sharded_stats': timed(sharded.stats, repeat=repeat),
+            }
+            sharded.close()
+        for name in ('load', 'search'):
+            result[f'{name}_speedup'] = (result[f'sequential_{name}']['seconds'] /
+                                         result[f'sharded_{name}']['seconds'])
+        results[str(shards)] = result
+    return results
+
+
+def flatten_metrics(results, prefix: str = ""):
+    """แปลงผล benchmark แบบซ้อนเป็นคู่ (ชื่อ, ค่า) เฉพาะ metric ใน COMPARED_METRICS"""
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten_metrics(value, name)
+        elif key in COMPARED_METRICS and isinstance(value, (int, float)):
+            yield name, value
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.2,
+                    min_seconds: float = 0.001) -> list:
+    """
+    เปรียบเทียบผลกับ baseline คืนรายการ (ชื่อ, ค่าเดิม, ค่าใหม่, อัตราส่วน) ที่แย่ลงเกิน threshold
+
+    เวลาที่ต่างกันน้อยกว่า min_seconds ถือเป็น noise และไม่นับเป็น regression
+    """
+    old = dict(flatten_metrics(baseline))
+    regressions = []
+    for name, value in flatten_metrics(current):
+        before = old.get(name)
+        if not before or value <= before * (1 + threshold):
+            continue
+        if name.endswith(".seconds") and value - before < min_seconds:
+            continue
+        regressions.append((name, before, value, value / before))
+    return regressions
+
+
+def git_revision() -> str:
+    """revision ปัจจุบันของ repository (ถ้ามี) สำหรับบันทึกไว้กับผล benchmark"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def parse_sizes(value: str) -> list:
+    """แปลง "1e3,1e4,100000" เป็นรายการจำนวนงาน"""
+    return [int(float(size)) for size in value.split(",") if size.strip()]
+
+
+def print_operations(results: dict) -> None:
+    for kind, by_size in results.items():
+        for count, operations in by_size.items():
+            print(f"🧪 Operation benchmark ({kind}, {int(count):,} tasks)")
+            memory = operations.get('memory')
+            if memory:
+                print(f"  {'memory':<20} {memory['bytes'] / 1024 / 1024:8.2f} MiB "
+                      f"(peak {memory['peak_bytes'] / 1024 / 1024:.2f} MiB, "
+                      f"{memory['bytes_per_task']:.0f} bytes/task)")
+            for name, result in operations.items():
+                if name == 'memory':
+                    continue
+                line = f"  {name:<20} {result['seconds'] * 1000:10.2f} ms"
+                if result['ops'] > 1:
+                    line += f" ({result['us_per_op']:.1f} µs/op)"
+                print(line)
+
+
+def print_scaling(results: dict, max_growth: float) -> None:
+    for kind, by_size in results.items():
+        print(f"🧪 Scaling benchmark ({kind})")
+        sizes = [size for size in by_size if size != 'growth']
+        print(f"  {'operation':<16}" + "".join(f"{int(size):>12,}" for size in sizes) + "    growth")
+        for name, growth in by_size['growth'].items():
+            flag = "✅" if growth <= max_growth else "❌"
+            print(f"  {name:<16}" + "".join(f"{by_size[size][name]['us_per_op']:>10.1f}µs"
+                                            for size in sizes) + f"  {growth:6.2f}x {flag}")
+
+
+def print_sharding(results: dict, count: int) -> None:
+    for kind, by_shards in results.items():
+        print(f"🧪 Sharding benchmark ({kind}, {count:,} tasks)")
+        print(f"  {'shards':>6} {'seq load':>10} {'load':>10} {'speedup':>8} "
+              f"{'seq search':>11} {'search':>10} {'speedup':>8} {'stats':>10}")
+        for shards, result in by_shards.items():
+            print(f"  {shards:>6} {result['sequential_load']['seconds'] * 1000:8.1f}ms "
+                  f"{result['sharded_load']['seconds'] * 1000:8.1f}ms "
+                  f"{result['load_speedup']:7.2f}x "
+                  f"{result['sequential_search']['seconds'] * 1000:9.1f}ms "
+                  f"{result['sharded_search']['seconds'] * 1000:8.1f}ms "
+                  f"{result['search_speedup']:7.2f}x "
+                  f"{result['sharded_stats']['seconds'] * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Python Task Manager")
+    parser.add_argument("--count", type=int, default=100000, help="จำนวนงานที่ใช้ทดสอบ")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    parser.add_argument("--startup", action="store_true",
+                        help="วัดเวลาเริ่มทำงานของคำสั่งแบบครั้งเดียวด้วย")
+    parser.add_argument("--load", action="store_true",
+                        help="วัดความเร็วการโหลดไฟล์ทั้ง schema ปัจจุบันและ schema แบบ task_id")
+    parser.add_argument("--ops", action="store_true",
+                        help="จับเวลาการทำงานทุกแบบของ TaskManager บน store จำลอง")
+    parser.add_argument("--sizes", type=parse_sizes, default=None,
+                        help="จำนวนงานหลายขนาดสำหรับ --ops คั่นด้วย comma เช่น 1e3,1e5,1e7")
+    parser.add_argument("--storage", default="json",
+                        help="storage ที่ใช้กับ --ops และ --shards คั่นด้วย comma "
+                             "(json,journal,sqlite,snapshot)")
+    parser.add_argument("--shards", type=parse_sizes, default=None,
+                        help="วัด speedup ของ ShardedTaskManager ตามจำนวน shard เช่น 1,2,4,8")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="จำนวน worker process ของ --shards (ค่าเริ่มต้นเท่าจำนวน CPU)")
+    parser.add_argument("--scaling", type=parse_sizes, default=None,
+                        help="ตรวจว่าต้นทุนต่องานของการแก้ไขแบบ batch ไม่โตตามขนาด store "
+                             "เช่น 5e4,8e5")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="อัตราส่วน µs/op ระหว่าง store ใหญ่สุดกับเล็กสุดที่ยอมรับได้ของ --scaling")
+    parser.add_argument("--completed-ratio", type=float, default=0.3,
+                        help="สัดส่วนงานที่เสร็จแล้วในข้อมูลจำลอง")
+    parser.add_argument("--seed", type=int, default=42, help="seed ของข้อมูลจำลอง")
+    parser.add_argument("--repeat", type=int, default=3, help="จำนวนรอบที่จับเวลา (ใช้ค่าที่เร็วที่สุด)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="ไม่วัดหน่วยความจำ (tracemalloc ช้ามากกับข้อมูลขนาดใหญ่)")
+    parser.add_argument("--output", help="บันทึกผลเป็นไฟล์ JSON สำหรับเปรียบเทียบภายหลัง")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="เปรียบเทียบกับไฟล์ผลเดิม และจบด้วย exit code 1 ถ้าช้าลงเกิน threshold")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="สัดส่วนที่ยอมให้แย่ลงก่อนนับเป็น regression (ค่าเริ่มต้น 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = {'meta': {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'seed': args.seed,
+        'completed_ratio': args.completed_ratio,
+    }}
+    if not args.no_memory and not args.ops and not args.shards \
+            and not args.scaling:
+        results['memory'] = benchmark_memory(args.count)
+    if args.startup:
+        results['startup'] = benchmark_startup(args.count)
+    if args.load:
+        results['load'] = benchmark_load(args.count)
+    if args.ops:
+        results['operations'] = {
+            kind: {
+                str(count): benchmark_operations(count, kind, args.seed, args.completed_ratio,
+                                                 args.repeat, not args.no_memory)
+                for count in (args.sizes or [args.count])
+            }
+            for kind in args.storage.split(",")
+        }
+    if args.shards:
+        results['sharding'] = {
+            kind: benchmark_sharding(args.count, args.shards, kind, args.seed,
+                                     args.completed_ratio, args.repeat, args.processes)
+            for kind in args.storage.split(",")
+        }
+    if args.scaling:
+        results['scaling'] = {
+            kind: benchmark_scaling(args.scaling, kind, args.seed, args.completed_ratio,
+                                    repeat=args.repeat)
+            for kind in args.storage.split(",")
+        }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare_results(json.load(f), results, args.threshold)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        if 'memory' in results:
+            print(f"🧪 Memory benchmark ({args.count} tasks)")
+            for name, result in results['memory'].items():
+                print(f"  {name:<12} {result['bytes'] / 1024 / 1024:8.2f} MiB "
+                      f"({result['bytes_per_task']:.0f} bytes/task)")
+        if args.startup:
+            print(f"🧪 Startup benchmark ({args.count} tasks)")
+            for name, seconds in results['startup'].items():
+                print(f"  {name:<14} {seconds * 1000:8.1f} ms")
+        if args.load:
+            print(f"🧪 Load benchmark ({args.count} tasks)")
+            for name, result in results['load'].items():
+                print(f"  {name:<20} {result['seconds'] * 1000:8.1f} ms "
+                      f"({result['tasks_per_sec']:,.0f} tasks/s)")
+        if args.ops:
+            print_operations(results['operations'])
+        if args.shards:
+            print_sharding(results['sharding'], args.count)
+        if args.scaling:
+            print_scaling(results['scaling'], args.max_growth)
+
+    too_slow = [(f"{kind}.{name}", growth)
+                for kind, by_size in results.get('scaling', {}).items()
+                for name, growth in by_size['growth'].items() if growth > args.max_growth]
+    if too_slow:
+        print(f"❌ ต้นทุนต่องานโตตามขนาด store เกิน {args.max_growth:g}x:", file=sys.stderr)
+        for name, growth in too_slow:
+            print(f"  {name:<50} {growth:.2f}x", file=sys.stderr)
+
+    if args.compare:
+        if not regressions:
+            print(f"✅ ไม่พบ regression เทียบกับ {args.compare} (threshold {args.threshold:.0%})",
+                  file=sys.stderr)
+        else:
+            print(f"❌ พบ regression {len(regressions)} รายการเทียบกับ {args.compare}:",
+                  file=sys.stderr)
+            for name, before, after, ratio in regressions:
+                print(f"  {name:<50} {before:>14.6g} -> {after:<14.6g} ({ratio:.2f}x)",
+                      file=sys.stderr)
+    if regressions or too_slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Load test for Task Manager HTTP server
+วัด requests/sec และ latency (p50/p99) ของ task_server.py บน localhost
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+
+class HTTPClient:
+    """HTTP/1.1 client แบบ keep-alive อย่างง่ายบน asyncio streams"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, payload=None) -> Tuple[int, object]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            .encode('latin-1') + body)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length))
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def seed(host: str, port: int, count: int) -> List[str]:
+    """เพิ่มงานตั้งต้นก่อนวัดผล คืน ID ของงานที่เพิ่ม"""
+    client = HTTPClient(host, port)
+    ids: List[str] = []
+    try:
+        for start in range(0, count, 1000):
+            records = [{'title': f"งานตั้งต้น {i} task {i}", 'description': "load test",
+                        'due_date': "2030-01-01"} for i in range(start, min(count, start + 1000))]
+            _, output = await client.request("POST", "/tasks", records)
+            ids.extend(result['task_id'] for result in output['results'])
+    finally:
+        await client.close()
+    return ids
+
+
+async def worker(host: str, port: int, deadline: float, write_ratio: float, ids: List[str],
+                 rng: random.Random, latencies: List[float], errors: List[int]) -> None:
+    """ส่งคำขอผสมอ่าน/เขียนบนการเชื่อมต่อเดียวจนหมดเวลา"""
+    client = HTTPClient(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            if roll < write_ratio / 2:
+                request = ("POST", "/tasks", {'title': "load test", 'due_date': "2030-01-01"})
+            elif roll < write_ratio and ids:
+                request = ("POST", f"/tasks/{rng.choice(ids)}/complete", None)
+            elif roll < (1 + write_ratio) / 2:
+                request = ("GET", f"/tasks/search?q=task+{rng.randrange(1000)}&limit=20", None)
+            else:
+                request = ("GET", "/stats", None)
+            start = time.perf_counter()
+            status, _ = await client.request(*request)
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors.append(status)
+    finally:
+        await client.close()
+
+
+async def run_load(host: str, port: int, connections: int, duration: float,
+                   write_ratio: float, seed_tasks: int) -> dict:
+    ids = await seed(host, port, seed_tasks)
+    latencies: List[float] = []
+    errors: List[int] = []
+    rng = random.Random(42)
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        worker(host, port, deadline, write_ratio, ids, random.Random(rng.random()),
+               latencies, errors)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for task_server.py")
+    parser.add_argument("--url", default=None,
+                        help="host:port ของ server ที่รันอยู่ (ไม่ระบุจะเริ่ม server ชั่วคราว)")
+    parser.add_argument("--storage", default="json", choices=["json", "journal", "sqlite"],
+                        help="storage ของ server ชั่วคราว")
+    parser.add_argument("--connections", type=int, default=32, help="จำนวนการเชื่อมต่อพร้อมกัน")
+    parser.add_argument("--duration", type=float, default=5.0, help="ระยะเวลาทดสอบ (วินาที)")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="สัดส่วนคำขอที่แก้ไขข้อมูล")
+    parser.add_argument("--seed-tasks", type=int, default=10000, help="จำนวนงานตั้งต้น")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    server = None
+    temp_dir = None
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        port = int(port)
+    else:
+        host, port = "127.0.0.1", free_port()
+        temp_dir = tempfile.TemporaryDirectory()
+        data_file = os.path.join(temp_dir.name, "tasks.db" if args.storage == "sqlite" else "tasks.json")
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_server.py")
+        server = subprocess.Popen([sys.executable, script, "--port", str(port), "--file", data_file,
+                                   "--storage", args.storage],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(host, port)
+        results = asyncio.run(run_load(host, port, args.connections, args.duration,
+                                       args.write_ratio, args.seed_tasks))
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGINT)
+            server.wait()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"🧪 Load test ({args.connections} connections, {args.duration:.0f}s, "
+          f"write ratio {args.write_ratio:.0%})")
+    print(f"  requests     {results['requests']:>10} ({results['errors']} errors)")
+    print(f"  throughput   {results['requests_per_sec']:>10.0f} req/s")
+    print(f"  latency p50  {results['p50_ms']:>10.2f} ms")
+    print(f"  latency p99  {results['p99_ms']:>10.2f} ms")
+    print(f"  latency max  {results['max_ms']:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
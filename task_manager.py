@@ -4,79 +4,2791 @@ Python Task Manager Application
 ระบบจัดการงานประจำวันด้วย Command-Line Interface
 """
 
+import bisect
+import calendar
+import heapq
 import json
+import mmap
 import os
-from datetime import datetime
-from typing import List, Dict, Optional
-import uuid
+import struct
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache, partial, wraps
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # Windows ไม่มี fcntl
+    fcntl = None
+from typing import (
+    Callable, Deque, Iterable, Iterator, List, Dict, NamedTuple, Optional, Set, TextIO, Tuple,
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_due_date(date_string: str) -> Optional[int]:
+    """แปลงวันที่ YYYY-MM-DD เป็น ordinal (คืน None ถ้ารูปแบบไม่ถูกต้อง)"""
+    try:
+        return datetime.strptime(date_string, "%Y-%m-%d").toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+_today = (0, 0.0)  # (ordinal ของวันนี้, timestamp เที่ยงคืนถัดไป)
+
+
+def today_ordinal() -> int:
+    """คืน ordinal ของวันนี้ (คำนวณใหม่เมื่อข้ามเที่ยงคืนเท่านั้น)"""
+    global _today
+    now = time.time()
+    if now >= _today[1]:
+        today = date.today()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _today = (today.toordinal(), midnight.timestamp())
+    return _today[0]
+
+
+def pack_timestamp(timestamp: str) -> Optional[int]:
+    """แปลงเวลา 'YYYY-MM-DD HH:MM:SS' เป็นตัวเลข YYYYMMDDHHMMSS (คืน None ถ้ารูปแบบอื่น)"""
+    if (len(timestamp) == 19 and timestamp[4] == '-' and timestamp[7] == '-'
+            and timestamp[10] == ' ' and timestamp[13] == ':' and timestamp[16] == ':'):
+        digits = timestamp[0:4] + timestamp[5:7] + timestamp[8:10] + \
+            timestamp[11:13] + timestamp[14:16] + timestamp[17:19]
+        if digits.isdigit():
+            return int(digits)
+    return None
+
+
+def format_timestamp(packed: int) -> str:
+    """แปลงตัวเลข YYYYMMDDHHMMSS กลับเป็นข้อความ 'YYYY-MM-DD HH:MM:SS'"""
+    digits = f"{packed:014d}"
+    return f"{digits[0:4]}-{digits[4:6]}-{digits[6:8]} {digits[8:10]}:{digits[10:12]}:{digits[12:14]}"
+
+
+# รุ่นของรูปแบบ record ที่ Task.to_dict เขียน (record ที่ไม่มี 'v' คือรุ่น 1
+# รุ่น 2 ใช้ชื่อ field ตาม Task เท่านั้น รุ่น 3 เพิ่ม 'recurrence' ของงานที่ทำซ้ำ
+# รุ่น 4 เพิ่ม 'priority')
+RECORD_VERSION = 4
+
+# ชื่อ field ใน schema อื่น (เช่น demo_advanced.json) -> ชื่อ field ของรุ่นปัจจุบัน
+FIELD_ALIASES = {
+    'task_id': 'id', '_id': 'id', 'uid': 'id',
+    'name': 'title', 'summary': 'title',
+    'desc': 'description', 'details': 'description', 'notes': 'description',
+    'due': 'due_date', 'deadline': 'due_date', 'dueDate': 'due_date',
+    'done': 'completed', 'is_completed': 'completed', 'isCompleted': 'completed',
+    'created': 'created_at', 'createdAt': 'created_at',
+}
+
+
+def _rename_aliases(record: Dict) -> Dict:
+    """รุ่น 1 -> 2: แปลงชื่อ field ของ schema อื่นเป็นชื่อของ Task ตาม FIELD_ALIASES"""
+    upgraded = {}
+    for key, value in record.items():
+        canonical = FIELD_ALIASES.get(key)
+        if canonical is None:
+            upgraded[key] = value
+        elif canonical not in record:  # ถ้ามีทั้งสองชื่อ ใช้ชื่อของรุ่นปัจจุบัน
+            upgraded.setdefault(canonical, value)
+    return upgraded
+
+
+# ขั้นตอนแปลง record จากรุ่น N เป็น N+1 (รุ่นที่ไม่มีในนี้เพิ่มเฉพาะ field ที่ไม่บังคับ)
+RECORD_UPGRADES: Dict[int, Callable[[Dict], Dict]] = {1: _rename_aliases}
+
+
+def upgrade_record(record: Dict) -> Dict:
+    """
+    แปลง record เป็นรุ่นปัจจุบันตาม 'v' โดยใช้ RECORD_UPGRADES ทีละรุ่นตามลำดับ
+    
+    ValueError ถ้า 'v' ไม่ถูกต้องหรือใหม่กว่า RECORD_VERSION (เขียนโดยโปรแกรมรุ่นใหม่กว่า)
+    """
+    version = record.get('v', 1)
+    if type(version) is not int or version < 1:
+        raise ValueError(f"รุ่นของ record ไม่ถูกต้อง: {version!r}")
+    if version > RECORD_VERSION:
+        raise ValueError(f"record รุ่น {version} ใหม่กว่าที่รองรับ (รุ่น {RECORD_VERSION})")
+    upgraded = record
+    for step in range(version, RECORD_VERSION):
+        upgrade = RECORD_UPGRADES.get(step)
+        if upgrade is not None:
+            upgraded = upgrade(upgraded)
+    upgraded = dict(upgraded)
+    upgraded['v'] = RECORD_VERSION
+    return upgraded
+
+
+def parse_completed(value) -> bool:
+    """แปลงค่าสถานะเสร็จสิ้นจาก JSON/CSV ('true', 'yes', 1, ...) เป็น bool"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+
+# ระดับความสำคัญของงาน (เลขน้อยคือสำคัญกว่า) record ที่ไม่มี 'priority' คือ DEFAULT_PRIORITY
+PRIORITY_LEVELS = {1: "สูง", 2: "ปานกลาง", 3: "ต่ำ"}
+DEFAULT_PRIORITY = 2
+PRIORITY_NAMES = {'high': 1, 'medium': 2, 'normal': 2, 'low': 3, "สูง": 1, "ปานกลาง": 2, "ต่ำ": 3}
+
+
+def parse_priority(value) -> int:
+    """แปลงความสำคัญ (1-3, high/medium/low หรือ สูง/ปานกลาง/ต่ำ) เป็นตัวเลข (ValueError ถ้าไม่ถูกต้อง)"""
+    if value is None or value == '':
+        return DEFAULT_PRIORITY
+    if isinstance(value, str):
+        text = value.strip().lower()
+        value = PRIORITY_NAMES.get(text, int(text) if text.isdecimal() else text)
+    if type(value) is not int or value not in PRIORITY_LEVELS:
+        raise ValueError(f"ความสำคัญไม่ถูกต้อง: {value!r} (ใช้ 1-3 หรือ high/medium/low)")
+    return value
+
+
+RECURRENCE_UNITS = {'daily': "วัน", 'weekly': "สัปดาห์", 'monthly': "เดือน"}
+_MAX_ORDINAL = date.max.toordinal()
+
+
+class Recurrence:
+    """
+    กฎการทำซ้ำของงาน: ทุก interval วัน/สัปดาห์/เดือน นับจาก start จนถึง until (ถ้ามี)
+    
+    เก็บกฎไว้ครั้งเดียวแทนการคัดลอกงานทุกครั้ง occurrences() คำนวณวันที่ของแต่ละครั้ง
+    แบบ lazy เฉพาะในช่วงที่ขอ โดยกระโดดไปยังครั้งแรกของช่วงได้ทันที การทำครั้งหนึ่งเสร็จ
+    บันทึกเป็น exception: ทุกครั้งจนถึง done_through เสร็จแล้ว และ done เก็บครั้งที่เสร็จ
+    ข้ามลำดับ (ถูกรวมเข้า done_through เมื่อครั้งก่อนหน้าเสร็จครบ)
+    การทำซ้ำรายเดือนของวันที่ 29-31 ใช้วันสุดท้ายของเดือนที่สั้นกว่า
+    """
+    
+    __slots__ = ('freq', 'interval', 'start', 'until', 'done_through', 'done')
+    
+    def __init__(self, freq: str, start: int, interval: int = 1, until: Optional[int] = None):
+        if freq not in RECURRENCE_UNITS:
+            raise ValueError(f"ไม่รู้จักการทำซ้ำ: {freq!r} (ใช้ {', '.join(RECURRENCE_UNITS)})")
+        if not isinstance(interval, int) or isinstance(interval, bool) or interval < 1:
+            raise ValueError(f"ระยะการทำซ้ำต้องเป็นจำนวนเต็มบวก: {interval!r}")
+        if until is not None and until < start:
+            raise ValueError("วันสิ้นสุดการทำซ้ำต้องไม่ก่อนวันที่ครบกำหนดครั้งแรก")
+        self.freq = freq
+        self.interval = interval
+        self.start = start
+        self.until = until
+        self.done_through: Optional[int] = None
+        self.done: Set[int] = set()
+    
+    @classmethod
+    def from_dict(cls, data: Dict, start: Optional[int]) -> 'Recurrence':
+        """สร้างจาก dictionary ของ to_dict (ValueError ถ้าข้อมูลไม่ถูกต้อง)"""
+        if not isinstance(data, dict):
+            raise ValueError(f"กฎการทำซ้ำไม่ถูกต้อง: {data!r}")
+        if start is None:
+            raise ValueError("งานที่ทำซ้ำต้องมีวันที่ครบกำหนดที่ถูกต้อง")
+        
+        def ordinal(value) -> int:
+            day = parse_due_date(value) if isinstance(value, str) else None
+            if day is None:
+                raise ValueError(f"รูปแบบวันที่ไม่ถูกต้อง: {value!r}")
+            return day
+        
+        interval = data.get('interval', 1)
+        if isinstance(interval, str) and interval.isdigit():
+            interval = int(interval)
+        until = data.get('until')
+        rule = cls(str(data.get('freq', '')).lower(), start, interval,
+                   ordinal(until) if until else None)
+        if data.get('done_through'):
+            rule.done_through = ordinal(data['done_through'])
+        rule.done = {ordinal(day) for day in data.get('done') or ()}
+        return rule
+    
+    def to_dict(self) -> Dict:
+        data = {'freq': self.freq, 'interval': self.interval}
+        if self.until is not None:
+            data['until'] = date.fromordinal(self.until).isoformat()
+        if self.done_through is not None:
+            data['done_through'] = date.fromordinal(self.done_through).isoformat()
+        if self.done:
+            data['done'] = [date.fromordinal(day).isoformat() for day in sorted(self.done)]
+        return data
+    
+    def describe(self) -> str:
+        """ข้อความอธิบายกฎ เช่น ทุก 2 สัปดาห์ ถึง 2024-12-31"""
+        unit = RECURRENCE_UNITS[self.freq]
+        text = f"ทุก {self.interval} {unit}" if self.interval > 1 else f"ทุก{unit}"
+        if self.until is not None:
+            text += f" ถึง {date.fromordinal(self.until).isoformat()}"
+        return text
+    
+    def _nth(self, k: int) -> int:
+        """ordinal ของครั้งที่ k (เริ่มที่ 0)"""
+        if self.freq == 'daily':
+            return self.start + k * self.interval
+        if self.freq == 'weekly':
+            return self.start + 7 * k * self.interval
+        first = date.fromordinal(self.start)
+        year, month = divmod(first.year * 12 + first.month - 1 + k * self.interval, 12)
+        if year > date.max.year:
+            return _MAX_ORDINAL + 1
+        day = min(first.day, calendar.monthrange(year, month + 1)[1])
+        return date(year, month + 1, day).toordinal()
+    
+    def _first_index(self, day: int) -> int:
+        """k ที่น้อยที่สุดที่ครั้งที่ k ตรงหรือหลังวันที่ day (คำนวณตรง ไม่วนทีละครั้ง)"""
+        if day <= self.start:
+            return 0
+        if self.freq != 'monthly':
+            step = self.interval * (7 if self.freq == 'weekly' else 1)
+            return -(-(day - self.start) // step)
+        first = date.fromordinal(self.start)
+        target = date.fromordinal(day)
+        k = max(0, ((target.year - first.year) * 12 + target.month - first.month) // self.interval)
+        while self._nth(k) < day:
+            k += 1
+        return k
+    
+    def occurrences(self, first: Optional[int] = None, last: Optional[int] = None) -> Iterator[int]:
+        """
+        ordinal ของแต่ละครั้งในช่วง [first, last] ตามลำดับ (generator)
+        
+        ไม่มีขอบเขตถ้าไม่ระบุ last และกฎไม่มี until ผู้เรียกต้องหยุดเอง
+        """
+        if self.until is not None:
+            last = self.until if last is None else min(last, self.until)
+        last = _MAX_ORDINAL if last is None else min(last, _MAX_ORDINAL)
+        k = self._first_index(first) if first is not None else 0
+        while True:
+            day = self._nth(k)
+            if day > last:
+                return
+            yield day
+            k += 1
+    
+    def occurs_on(self, day: int) -> bool:
+        """วันที่ day เป็นหนึ่งในครั้งของกฎนี้หรือไม่"""
+        if day < self.start or (self.until is not None and day > self.until):
+            return False
+        return self._nth(self._first_index(day)) == day
+    
+    def is_done(self, day: int) -> bool:
+        """ครั้งที่ day ถูกทำเสร็จแล้วหรือไม่"""
+        return (self.done_through is not None and day <= self.done_through) or day in self.done
+    
+    def next_pending(self) -> Optional[int]:
+        """ครั้งแรกที่ยังไม่เสร็จ (None ถ้าทำครบทุกครั้งแล้ว)"""
+        first = self.done_through + 1 if self.done_through is not None else None
+        for day in self.occurrences(first):
+            if day not in self.done:
+                return day
+        return None
+    
+    def mark_done(self, day: int) -> None:
+        """บันทึกว่าครั้งที่ day เสร็จแล้ว"""
+        if day != self.next_pending():
+            self.done.add(day)
+            return
+        self.done_through = day
+        for following in self.occurrences(day + 1):
+            if following not in self.done:
+                break
+            self.done.discard(following)
+            self.done_through = following
 
 
 class Task:
     """Class สำหรับจัดการข้อมูลงานแต่ละชิ้น"""
     
-    def __init__(self, title: str, description: str, due_date: str):
-        self.id = str(uuid.uuid4())[:8]  # สร้าง ID แบบสุ่ม 8 หลัก
-        self.title = title
-        self.description = description
-        self.due_date = due_date
-        self.completed = False
-        self.created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # ใช้ __slots__ แทน __dict__ เพื่อลดหน่วยความจำเมื่อมีงานจำนวนมาก
+    __slots__ = ('id', 'title', 'description', 'due_date', 'due_ordinal', 'completed', '_created',
+                 'recurrence', 'priority')
+    
+    def __init__(self, title: str, description: str, due_date: str):
+        self.id = os.urandom(4).hex()  # สร้าง ID แบบสุ่ม 8 หลัก
+        self.title = title
+        self.description = description
+        # งานจำนวนมากมีวันที่ซ้ำกัน intern ไว้ให้ใช้ string ร่วมกัน
+        self.due_date = sys.intern(due_date) if isinstance(due_date, str) else due_date
+        self.due_ordinal = parse_due_date(due_date)  # แปลงวันที่ครั้งเดียวตอนสร้าง
+        self.completed = False
+        # กฎการทำซ้ำ (None = งานครั้งเดียว) ดู set_recurrence
+        self.recurrence: Optional[Recurrence] = None
+        self.priority = DEFAULT_PRIORITY
+        now = datetime.now()
+        self._created = (now.year * 10000000000 + now.month * 100000000 + now.day * 1000000
+                         + now.hour * 10000 + now.minute * 100 + now.second)
+    
+    @property
+    def created_at(self) -> str:
+        """เวลาที่สร้างงาน (เก็บภายในเป็นตัวเลข YYYYMMDDHHMMSS)"""
+        if isinstance(self._created, int):
+            return format_timestamp(self._created)
+        return self._created
+    
+    @created_at.setter
+    def created_at(self, value: str) -> None:
+        packed = pack_timestamp(value) if isinstance(value, str) else None
+        self._created = packed if packed is not None else value
+    
+    def to_dict(self) -> Dict:
+        """แปลง Task object เป็น dictionary"""
+        data = {
+            'v': RECORD_VERSION,
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'due_date': self.due_date,
+            'completed': self.completed,
+            'created_at': self.created_at
+        }
+        if self.recurrence is not None:
+            data['recurrence'] = self.recurrence.to_dict()
+        if self.priority != DEFAULT_PRIORITY:
+            data['priority'] = self.priority
+        return data
+    
+    def set_recurrence(self, recurrence: Optional[Recurrence]) -> None:
+        """กำหนดกฎการทำซ้ำ (due_date ของงานคือครั้งแรก)"""
+        self.recurrence = recurrence
+        if recurrence is None:
+            self.due_ordinal = parse_due_date(self.due_date)
+        else:
+            self.refresh_due()
+    
+    def refresh_due(self) -> None:
+        """
+        ปรับ due_ordinal ของงานที่ทำซ้ำเป็นครั้งถัดไปที่ยังไม่เสร็จ
+        
+        index, สถิติ และการนับงานเลยกำหนดจึงเห็นงานที่ทำซ้ำเป็นงานเดียวที่ครบกำหนด
+        ในครั้งถัดไป งานจะเสร็จสิ้นทั้งงานเมื่อไม่เหลือครั้งที่ยังไม่เสร็จ
+        """
+        if self.recurrence is None:
+            return
+        next_due = self.recurrence.next_pending()
+        if next_due is None:
+            self.completed = True
+            self.due_ordinal = self.recurrence.start
+        else:
+            self.due_ordinal = next_due
+    
+    def is_overdue(self, today: Optional[int] = None) -> bool:
+        """ตรวจสอบว่างานเลยกำหนดหรือไม่ (ไม่นับงานที่เสร็จแล้ว)"""
+        if self.completed or self.due_ordinal is None:
+            return False
+        return self.due_ordinal < (today if today is not None else today_ordinal())
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Task':
+        """
+        สร้าง Task object จาก dictionary (ValueError ถ้าข้อมูลไม่ถูกต้อง)
+        
+        กำหนด field โดยตรงโดยไม่เรียก __init__ (ไม่สุ่ม ID และไม่อ่านเวลาปัจจุบันทิ้ง)
+        record รุ่นอื่น (รวมถึง schema ที่ใช้ชื่อ field อื่น) จะถูกแปลงด้วย upgrade_record ก่อน
+        """
+        if data.get('v') != RECORD_VERSION:
+            data = upgrade_record(data)
+        title = data.get('title')
+        due_date = data.get('due_date')
+        if not isinstance(title, str) or not title:
+            raise ValueError(f"ชื่องานไม่ถูกต้อง: {title!r}")
+        if not isinstance(due_date, str):
+            raise ValueError(f"วันที่ครบกำหนดไม่ถูกต้อง: {due_date!r}")
+        task_id = data.get('id')
+        task = cls.__new__(cls)
+        task.id = str(task_id) if task_id not in (None, '') else os.urandom(4).hex()
+        task.title = title
+        description = data.get('description')
+        task.description = description if isinstance(description, str) else \
+            ('' if description is None else str(description))
+        task.due_date = sys.intern(due_date)
+        task.due_ordinal = parse_due_date(due_date)
+        completed = data.get('completed', False)
+        task.completed = completed if completed is True or completed is False else \
+            parse_completed(completed)
+        created_at = data.get('created_at')
+        if created_at is None:
+            task._created = int(datetime.now().strftime("%Y%m%d%H%M%S"))
+        else:
+            task.created_at = str(created_at)
+        priority = data.get('priority')
+        task.priority = DEFAULT_PRIORITY if priority is None else parse_priority(priority)
+        recurrence = data.get('recurrence')
+        task.recurrence = None
+        if recurrence is not None:
+            task.recurrence = Recurrence.from_dict(recurrence, task.due_ordinal)
+            task.refresh_due()
+        return task
+
+
+def matches_due_date(task, due_date: str) -> bool:
+    """งานครบกำหนดวันที่ due_date หรือไม่ (งานที่ทำซ้ำตรวจทุกครั้งของกฎ)"""
+    recurrence = task.recurrence
+    if recurrence is None:
+        return task.due_date == due_date
+    day = parse_due_date(due_date)
+    return day is not None and recurrence.occurs_on(day)
+
+
+class Occurrence(NamedTuple):
+    """งานหนึ่งครั้งในช่วงวันที่ (งานครั้งเดียวหรือหนึ่งครั้งของงานที่ทำซ้ำ)"""
+    task: Task
+    due_date: str
+    due_ordinal: int
+    completed: bool
+
+
+ID_WIDTH = 16  # ความยาวสูงสุด (byte) ของ ID ใน TaskStore
+
+
+class TaskStore:
+    """
+    ที่เก็บงานแบบ columnar สำหรับงานจำนวนมาก (หลักล้านชิ้น)
+    
+    แต่ละ field เก็บเป็นคอลัมน์ต่อเนื่อง: ID เป็น byte ความยาวคงที่, วันที่เป็น
+    ordinal ใน array, เวลาสร้างเป็นตัวเลข, สถานะเสร็จสิ้นเป็น bitset
+    เข้าถึงงานแต่ละแถวผ่าน TaskView ซึ่งไม่คัดลอกข้อมูล
+    """
+    
+    def __init__(self):
+        self._ids = bytearray()
+        self._due = array('i')        # ordinal ของวันที่ครบกำหนด (0 = แปลงไม่ได้)
+        self._created = array('q')    # YYYYMMDDHHMMSS (0 = ใช้ข้อความใน _extra_text)
+        self._completed = bytearray()  # bitset แถวละ 1 bit
+        self._titles: List[str] = []
+        self._descriptions: List[str] = []
+        # ข้อความที่แปลงไป-กลับเป็นตัวเลขไม่ได้ตรงตัว เก็บแยกตามแถว {(field, row): text}
+        self._extra_text: Dict[Tuple[str, int], str] = {}
+    
+    def __len__(self) -> int:
+        return len(self._titles)
+    
+    def __getitem__(self, row: int) -> 'TaskView':
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return TaskView(self, row)
+    
+    def __iter__(self) -> Iterator['TaskView']:
+        for row in range(len(self)):
+            yield TaskView(self, row)
+    
+    @classmethod
+    def from_tasks(cls, tasks) -> 'TaskStore':
+        """สร้าง TaskStore จากรายการ Task"""
+        store = cls()
+        for task in tasks:
+            store.append(task)
+        return store
+    
+    def to_tasks(self) -> List[Task]:
+        """แปลงทุกแถวกลับเป็น Task object"""
+        return [view.materialize() for view in self]
+    
+    def append(self, task) -> int:
+        """เพิ่มงานเป็นแถวใหม่ คืนหมายเลขแถว"""
+        encoded = task.id.encode('utf-8')
+        if len(encoded) > ID_WIDTH:
+            raise ValueError(f"ID ยาวเกิน {ID_WIDTH} byte: {task.id}")
+        row = len(self)
+        self._ids += encoded.ljust(ID_WIDTH, b'\0')
+        self._due.append(task.due_ordinal or 0)
+        if task.due_ordinal is None or \
+                date.fromordinal(task.due_ordinal).isoformat() != task.due_date:
+            self._extra_text[('due_date', row)] = task.due_date
+        created = pack_timestamp(task.created_at)
+        if created is None:
+            self._extra_text[('created_at', row)] = task.created_at
+        if task.recurrence is not None:
+            self._extra_text[('recurrence', row)] = json.dumps(task.recurrence.to_dict())
+        if task.priority != DEFAULT_PRIORITY:
+            self._extra_text[('priority', row)] = str(task.priority)
+        self._created.append(created or 0)
+        if row % 8 == 0:
+            self._completed.append(0)
+        self._titles.append(task.title)
+        self._descriptions.append(task.description)
+        self.set_completed(row, task.completed)
+        return row
+    
+    def find(self, task_id: str) -> Optional['TaskView']:
+        """ค้นหางานตาม ID (สแกนคอลัมน์ ID ด้วย bytes.find)"""
+        key = task_id.encode('utf-8').ljust(ID_WIDTH, b'\0')
+        if len(key) != ID_WIDTH:
+            return None
+        start = 0
+        while True:
+            offset = self._ids.find(key, start)
+            if offset < 0:
+                return None
+            if offset % ID_WIDTH == 0:
+                return TaskView(self, offset // ID_WIDTH)
+            start = offset + 1
+    
+    def task_id(self, row: int) -> str:
+        offset = row * ID_WIDTH
+        return bytes(self._ids[offset:offset + ID_WIDTH]).rstrip(b'\0').decode('utf-8')
+    
+    def title(self, row: int) -> str:
+        return self._titles[row]
+    
+    def description(self, row: int) -> str:
+        return self._descriptions[row]
+    
+    def due_date(self, row: int) -> str:
+        text = self._extra_text.get(('due_date', row))
+        if text is not None:
+            return text
+        return date.fromordinal(self._due[row]).isoformat()
+    
+    def due_ordinal(self, row: int) -> Optional[int]:
+        return self._due[row] or None
+    
+    def recurrence(self, row: int) -> Optional[Recurrence]:
+        text = self._extra_text.get(('recurrence', row))
+        if text is None:
+            return None
+        return Recurrence.from_dict(json.loads(text), parse_due_date(self.due_date(row)))
+    
+    def priority(self, row: int) -> int:
+        text = self._extra_text.get(('priority', row))
+        return DEFAULT_PRIORITY if text is None else int(text)
+    
+    def created_at(self, row: int) -> str:
+        packed = self._created[row]
+        if packed:
+            return format_timestamp(packed)
+        return self._extra_text[('created_at', row)]
+    
+    def is_completed(self, row: int) -> bool:
+        return bool(self._completed[row >> 3] & (1 << (row & 7)))
+    
+    def set_completed(self, row: int, completed: bool) -> None:
+        if completed:
+            self._completed[row >> 3] |= 1 << (row & 7)
+        else:
+            self._completed[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+    
+    def count_completed(self) -> int:
+        """นับงานที่เสร็จแล้วจาก bitset โดยไม่สร้าง TaskView"""
+        return bin(int.from_bytes(self._completed, 'little')).count('1')
+    
+    def overdue_rows(self, today: Optional[int] = None) -> Iterator[int]:
+        """คืนหมายเลขแถวของงานที่ยังไม่เสร็จและเลยกำหนด (สแกนคอลัมน์วันที่โดยตรง)"""
+        today = today if today is not None else today_ordinal()
+        due = memoryview(self._due)
+        for row in range(len(due)):
+            if 0 < due[row] < today and not self.is_completed(row):
+                yield row
+
+
+class TaskView:
+    """มุมมองของงานหนึ่งแถวใน TaskStore ใช้แทน Task ได้โดยไม่คัดลอกข้อมูล"""
+    
+    __slots__ = ('_store', '_row')
+    
+    def __init__(self, store: TaskStore, row: int):
+        self._store = store
+        self._row = row
+    
+    @property
+    def id(self) -> str:
+        return self._store.task_id(self._row)
+    
+    @property
+    def title(self) -> str:
+        return self._store.title(self._row)
+    
+    @property
+    def description(self) -> str:
+        return self._store.description(self._row)
+    
+    @property
+    def due_date(self) -> str:
+        return self._store.due_date(self._row)
+    
+    @property
+    def due_ordinal(self) -> Optional[int]:
+        return self._store.due_ordinal(self._row)
+    
+    @property
+    def recurrence(self) -> Optional[Recurrence]:
+        return self._store.recurrence(self._row)
+    
+    @property
+    def priority(self) -> int:
+        return self._store.priority(self._row)
+    
+    @property
+    def completed(self) -> bool:
+        return self._store.is_completed(self._row)
+    
+    @completed.setter
+    def completed(self, value: bool) -> None:
+        self._store.set_completed(self._row, value)
+    
+    @property
+    def created_at(self) -> str:
+        return self._store.created_at(self._row)
+    
+    def is_overdue(self, today: Optional[int] = None) -> bool:
+        """ตรวจสอบว่างานเลยกำหนดหรือไม่ (ไม่นับงานที่เสร็จแล้ว)"""
+        return Task.is_overdue(self, today)
+    
+    def to_dict(self) -> Dict:
+        """แปลงเป็น dictionary รูปแบบเดียวกับ Task.to_dict"""
+        return Task.to_dict(self)
+    
+    def materialize(self) -> Task:
+        """สร้าง Task object ที่เป็นอิสระจาก store"""
+        return Task.from_dict(self.to_dict())
+
+
+SNAPSHOT_MAGIC = b'TMSNAP\0\0'
+SNAPSHOT_VERSION = 1
+# magic, รุ่น, จำนวนงาน, ขนาด string heap, ขนาด JSON ของข้อความพิเศษ (รวม 64 byte)
+_SNAPSHOT_HEADER = struct.Struct('<8sIIQQ32x')
+
+
+def _snapshot_column(buffer: memoryview, offset: int, typecode: str, count: int):
+    """คืน (คอลัมน์ตัวเลขบน buffer, offset ถัดไป) ไฟล์เก็บแบบ little-endian เสมอ"""
+    size = array(typecode).itemsize * count
+    column = buffer[offset:offset + size].cast(typecode)
+    if sys.byteorder != 'little':
+        swapped = array(typecode, column)
+        swapped.byteswap()
+        column.release()
+        column = swapped
+    return column, offset + size
+
+
+class SnapshotStore(TaskStore):
+    """
+    TaskStore แบบอ่านอย่างเดียวที่อ่านคอลัมน์จากไฟล์ binary snapshot ผ่าน mmap
+    
+    ไฟล์ประกอบด้วย header 64 byte ตามด้วยคอลัมน์ความกว้างคงที่ created_at (int64),
+    offset ของข้อความใน heap (uint64 x 2N+1), due ordinal (int32), ID (16 byte)
+    และ bitset สถานะเสร็จสิ้น แล้วจึงเป็น string heap (UTF-8 ของชื่อและคำอธิบาย)
+    กับ JSON ของข้อความที่แปลงเป็นตัวเลขไม่ได้ตรงตัว การค้นหาตาม ID และการสแกนงาน
+    เลยกำหนดทำบน buffer โดยตรง ข้อความและ Task ถูกสร้างเฉพาะแถวที่อ่าน
+    
+    ไฟล์ที่ไม่ใช่ snapshot หรือไม่สมบูรณ์ (เช่นถูกตัดกลางทาง) ทำให้เกิด ValueError
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _SNAPSHOT_HEADER.size:
+                raise ValueError(f"ไฟล์ snapshot ไม่สมบูรณ์: {path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, heap_size, extra_size = _SNAPSHOT_HEADER.unpack_from(self._mmap)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"ไม่ใช่ไฟล์ snapshot รุ่นที่รองรับ: {path}")
+        expected = (_SNAPSHOT_HEADER.size + 8 * count + 8 * (2 * count + 1) + 4 * count +
+                    ID_WIDTH * count + (count + 7) // 8 + heap_size + extra_size)
+        if size != expected:
+            self._mmap.close()
+            raise ValueError(f"ไฟล์ snapshot ไม่สมบูรณ์: {path} "
+                             f"(ขนาด {size} byte แต่ header ระบุ {expected} byte)")
+        self._count = count
+        self._buffer = memoryview(self._mmap)
+        offset = _SNAPSHOT_HEADER.size
+        self._created, offset = _snapshot_column(self._buffer, offset, 'q', count)
+        self._offsets, offset = _snapshot_column(self._buffer, offset, 'Q', 2 * count + 1)
+        self._due, offset = _snapshot_column(self._buffer, offset, 'i', count)
+        self._ids = self._buffer[offset:offset + count * ID_WIDTH]
+        self._ids_start = offset
+        offset += count * ID_WIDTH
+        self._completed = self._buffer[offset:offset + (count + 7) // 8]
+        offset += (count + 7) // 8
+        self._heap_start = offset
+        offset += heap_size
+        self._extra_text: Dict[Tuple[str, int], str] = {}
+        try:
+            if self._offsets[0] != 0 or self._offsets[2 * count] != heap_size:
+                raise ValueError("offset ของข้อความไม่ตรงกับขนาด string heap")
+            if extra_size:
+                extra = json.loads(self._mmap[offset:offset + extra_size].decode('utf-8'))
+                for field, rows in extra.items():
+                    for row, text in rows.items():
+                        self._extra_text[(field, int(row))] = text
+        except (ValueError, TypeError, AttributeError) as e:
+            self.close()
+            raise ValueError(f"ไฟล์ snapshot ไม่สมบูรณ์: {path} ({e})") from None
+    
+    def __enter__(self) -> 'SnapshotStore':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """คืน mmap (TaskView ที่ได้จาก store นี้ใช้ไม่ได้หลังปิด)"""
+        if self._mmap.closed:
+            return
+        for view in (self._created, self._offsets, self._due, self._ids, self._completed,
+                     self._buffer):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def to_tasks(self) -> List[Task]:
+        """สร้าง Task ของทุกแถว"""
+        return list(self.iter_tasks())
+    
+    def iter_tasks(self) -> Iterator[Task]:
+        """สร้าง Task ทีละแถวโดยอ่านคอลัมน์ตรง ๆ (เร็วกว่า materialize ทีละ view)"""
+        due_text: Dict[int, str] = {}
+        for row in range(self._count):
+            yield self.task(row, due_text)
+    
+    def task(self, row: int, due_text: Optional[Dict[int, str]] = None) -> Task:
+        """
+        สร้าง Task ของแถว row (ValueError ถ้าข้อมูลของแถวเสียหาย)
+        
+        due_text เป็น cache ข้อความวันที่ตาม ordinal ที่ใช้ร่วมกันได้หลายแถว
+        """
+        mm = self._mmap
+        heap = self._heap_start
+        offsets = self._offsets
+        extra = self._extra_text
+        task = Task.__new__(Task)
+        task.id = extra.get(('id', row)) or \
+            bytes(self._ids[row * ID_WIDTH:(row + 1) * ID_WIDTH]).rstrip(b'\0').decode('utf-8')
+        task.title = mm[heap + offsets[2 * row]:heap + offsets[2 * row + 1]].decode('utf-8')
+        task.description = mm[heap + offsets[2 * row + 1]:heap + offsets[2 * row + 2]].decode('utf-8')
+        due = self._due[row]
+        task.due_ordinal = due or None
+        text = extra.get(('due_date', row)) if extra else None
+        if text is None:
+            if due_text is None:
+                due_text = {}
+            text = due_text.get(due)
+            if text is None:
+                text = due_text[due] = sys.intern(date.fromordinal(due).isoformat())
+        task.due_date = text
+        task.completed = bool(self._completed[row >> 3] & (1 << (row & 7)))
+        task._created = self._created[row] or extra.get(('created_at', row))
+        if not task._created:
+            raise ValueError("ไม่มีเวลาที่สร้างงาน")
+        rule = extra.get(('recurrence', row)) if extra else None
+        task.recurrence = None if rule is None else \
+            Recurrence.from_dict(json.loads(rule), parse_due_date(text))
+        priority = extra.get(('priority', row)) if extra else None
+        task.priority = DEFAULT_PRIORITY if priority is None else parse_priority(priority)
+        return task
+    
+    def append(self, task) -> int:
+        raise TypeError("snapshot เป็นแบบอ่านอย่างเดียว ใช้ write_snapshot เพื่อเขียนใหม่")
+    
+    def _text(self, index: int) -> str:
+        start = self._heap_start + self._offsets[index]
+        end = self._heap_start + self._offsets[index + 1]
+        return self._mmap[start:end].decode('utf-8')
+    
+    def title(self, row: int) -> str:
+        return self._text(2 * row)
+    
+    def description(self, row: int) -> str:
+        return self._text(2 * row + 1)
+    
+    def task_id(self, row: int) -> str:
+        text = self._extra_text.get(('id', row))
+        if text is not None:
+            return text
+        return super().task_id(row)
+    
+    def find(self, task_id: str) -> Optional['TaskView']:
+        """ค้นหางานตาม ID ในคอลัมน์ ID บน mmap"""
+        key = task_id.encode('utf-8').ljust(ID_WIDTH, b'\0')
+        if len(key) != ID_WIDTH:
+            for (field, row), text in self._extra_text.items():
+                if field == 'id' and text == task_id:
+                    return TaskView(self, row)
+            return None
+        start, end = self._ids_start, self._ids_start + self._count * ID_WIDTH
+        while True:
+            offset = self._mmap.find(key, start, end)
+            if offset < 0:
+                return None
+            if (offset - self._ids_start) % ID_WIDTH == 0:
+                return TaskView(self, (offset - self._ids_start) // ID_WIDTH)
+            start = offset + 1
+
+
+def write_snapshot(path: str, tasks: Iterable) -> int:
+    """เขียนงานทั้งหมดเป็นไฟล์ binary snapshot (ดู SnapshotStore) คืนจำนวน byte ที่เขียน"""
+    ids = bytearray()
+    due = array('i')
+    created = array('q')
+    completed = bytearray()
+    offsets = array('Q', [0])
+    heap = bytearray()
+    extra: Dict[str, Dict[int, str]] = {}
+    for row, task in enumerate(tasks):
+        encoded = task.id.encode('utf-8')
+        if len(encoded) > ID_WIDTH:
+            extra.setdefault('id', {})[row] = task.id
+            encoded = b''
+        ids += encoded.ljust(ID_WIDTH, b'\0')
+        due.append(task.due_ordinal or 0)
+        if task.due_ordinal is None or \
+                date.fromordinal(task.due_ordinal).isoformat() != task.due_date:
+            extra.setdefault('due_date', {})[row] = task.due_date
+        packed = pack_timestamp(task.created_at)
+        if packed is None:
+            extra.setdefault('created_at', {})[row] = task.created_at
+        if task.recurrence is not None:
+            extra.setdefault('recurrence', {})[row] = json.dumps(task.recurrence.to_dict())
+        if task.priority != DEFAULT_PRIORITY:
+            extra.setdefault('priority', {})[row] = str(task.priority)
+        created.append(packed or 0)
+        if row % 8 == 0:
+            completed.append(0)
+        if task.completed:
+            completed[row >> 3] |= 1 << (row & 7)
+        heap += task.title.encode('utf-8')
+        offsets.append(len(heap))
+        heap += task.description.encode('utf-8')
+        offsets.append(len(heap))
+    if sys.byteorder != 'little':
+        for column in (due, created, offsets):
+            column.byteswap()
+    extra_bytes = json.dumps(extra, ensure_ascii=False).encode('utf-8') if extra else b''
+    header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(due), len(heap),
+                                   len(extra_bytes))
+    
+    def write(f) -> None:
+        for part in (header, created, offsets, due, ids, completed, heap, extra_bytes):
+            f.write(part)
+    
+    return atomic_write_file(path, write, binary=True)
+
+
+class FileLock:
+    """
+    Advisory lock ข้ามโปรเซสด้วย fcntl.flock บนไฟล์ .lock
+    
+    ใช้ threading.Lock ร่วมด้วยเพื่อกัน thread ในโปรเซสเดียวกัน (ไม่ reentrant
+    และปล่อยจาก thread อื่นได้) บนระบบที่ไม่มี fcntl เช่น Windows จะล็อกได้เฉพาะภายในโปรเซส
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+    
+    def acquire(self, blocking: bool = True) -> bool:
+        """ขอ lock คืน False ถ้า blocking=False และมีผู้อื่นถือ lock อยู่"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is not None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            self._fd = fd
+        return True
+    
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+    
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+def file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """ลายเซ็นของไฟล์ (inode, mtime, ขนาด) ใช้ตรวจว่ามีโปรเซสอื่นเขียนทับหรือไม่"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def atomic_write_json(path: str, data) -> int:
+    """เขียน JSON แบบ atomic (ดู atomic_write_file) คืนจำนวน byte ที่เขียน"""
+    return atomic_write_file(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=2))
+
+
+def atomic_write_file(path: str, write: Callable, binary: bool = False) -> int:
+    """
+    เรียก write(f) กับไฟล์ชั่วคราวในโฟลเดอร์เดียวกัน fsync แล้ว rename ทับไฟล์เดิม
+    
+    ถ้าโปรแกรมหยุดกลางคัน ไฟล์เดิมยังสมบูรณ์เสมอ คืนจำนวน byte ที่เขียน
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=directory)
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # fsync โฟลเดอร์ให้การ rename ถูกบันทึกลงดิสก์ด้วย
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return size
+
+
+def tasks_from_records(records: Iterable, quarantine_path: Optional[str] = None,
+                       skipped: Optional[List[str]] = None,
+                       build: Callable[[object], Task] = Task.from_dict) -> Iterator[Task]:
+    """
+    สร้าง Task จาก record ทีละรายการด้วย build ข้าม record ที่ไม่ถูกต้องแทนการหยุดทั้งหมด
+    
+    record ที่ข้ามจะถูกต่อท้ายไฟล์ quarantine (JSON lines) พร้อมสาเหตุ ถ้าระบุไว้
+    เพื่อไม่ให้ข้อมูลหายเมื่อบันทึกไฟล์ใหม่ และจดสาเหตุลงใน skipped (ถ้าระบุ)
+    record ที่อยู่ในไฟล์ quarantine แล้ว (เช่นโหลดไฟล์เดิมซ้ำ) จะไม่ถูกเขียนซ้ำ
+    """
+    quarantine = None
+    known: Set[str] = set()
+    try:
+        for index, record in enumerate(records):
+            try:
+                yield build(record)
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                error = f"รายการที่ {index}: {e}"
+                if skipped is not None:
+                    skipped.append(error)
+                if quarantine_path is None:
+                    continue
+                if quarantine is None:
+                    known = _quarantined_records(quarantine_path)
+                    quarantine = open(quarantine_path, 'a', encoding='utf-8')
+                key = _quarantine_key(record)
+                if key not in known:
+                    known.add(key)
+                    quarantine.write(json.dumps({'error': error, 'record': record},
+                                                ensure_ascii=False, default=str) + "\n")
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+
+
+def _quarantine_key(record) -> str:
+    return json.dumps(record, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _quarantined_records(quarantine_path: str) -> Set[str]:
+    """คืน key ของ record ที่อยู่ในไฟล์ quarantine แล้ว (ข้ามบรรทัดที่อ่านไม่ได้)"""
+    known: Set[str] = set()
+    if not os.path.exists(quarantine_path):
+        return known
+    with open(quarantine_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                known.add(_quarantine_key(json.loads(line)['record']))
+            except (ValueError, TypeError, KeyError):
+                continue
+    return known
+
+
+def apply_change(tasks: Dict[str, Task], op: str, data) -> None:
+    """
+    ใช้การเปลี่ยนแปลงหนึ่งรายการกับ dict ของงาน (ทุก operation เป็น idempotent)
+    
+    data เป็น dict ของงานสำหรับ 'add'/'update' และเป็น ID สำหรับ 'complete'/'delete'
+    ('update' แทนที่ข้อมูลทั้งงาน เช่นเมื่อทำงานที่ทำซ้ำเสร็จหนึ่งครั้ง)
+    """
+    if op == 'add':
+        task = Task.from_dict(data)
+        tasks[task.id] = task
+    elif op == 'update':
+        if data.get('id') in tasks:
+            tasks[data['id']] = Task.from_dict(data)
+    elif op == 'complete':
+        if data in tasks:
+            tasks[data].completed = True
+    elif op == 'delete':
+        tasks.pop(data, None)
+
+
+class TaskStorage(ABC):
+    """Class พื้นฐานของ storage engine สำหรับ TaskManager (ต้อง implement load และ save)"""
+    
+    # True ถ้า append() บันทึกการเปลี่ยนแปลงลงดิสก์ทันที ไม่ต้องเรียก save() ทุกครั้ง
+    journaled = False
+    # True ถ้า storage ค้นหาข้อมูลเองได้ (TaskManager จะไม่โหลดงานทั้งหมดเข้าหน่วยความจำ)
+    queryable = False
+    # จำนวน byte ที่เขียนลงดิสก์ใน save() ครั้งล่าสุด (0 ถ้าไม่ทราบหรือไม่ได้เขียน)
+    last_write_bytes = 0
+    
+    def __init__(self, path: str):
+        self.path = path
+        # สาเหตุของ record ที่ถูกข้ามในการโหลดครั้งล่าสุด (ดู tasks_from_records)
+        self.skipped: List[str] = []
+    
+    def exists(self) -> bool:
+        """ตรวจสอบว่ามีข้อมูลเดิมอยู่หรือไม่"""
+        return os.path.exists(self.path)
+    
+    @abstractmethod
+    def load(self) -> List[Task]:
+        """โหลดงานทั้งหมดจาก storage"""
+    
+    @abstractmethod
+    def save(self, tasks: List[Task]) -> Optional[List[Task]]:
+        """
+        บันทึกงานทั้งหมดลง storage
+        
+        คืนรายการงานที่รวมการเปลี่ยนแปลงจากโปรเซสอื่นแล้ว ถ้าข้อมูลบนดิสก์
+        ถูกแก้ไขหลังจากที่โหลดมา (คืน None ถ้าไม่มีการเปลี่ยนแปลงจากภายนอก)
+        """
+    
+    def append(self, op: str, task: Task) -> None:
+        """บันทึกการเปลี่ยนแปลงของงานหนึ่งชิ้น (add/update/complete/delete)"""
+    
+    def append_many(self, op: str, tasks: List[Task]) -> None:
+        """บันทึกการเปลี่ยนแปลงแบบเดียวกันของงานหลายชิ้น"""
+        for task in tasks:
+            self.append(op, task)
+    
+    def close(self) -> None:
+        """ปิด storage และรอให้งานเบื้องหลังเสร็จ"""
+
+
+def iter_task_records(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """
+    อ่านข้อมูลงานจากไฟล์ทีละรายการโดยไม่โหลดทั้งไฟล์เข้าหน่วยความจำ
+    
+    รองรับทั้ง JSON array (รูปแบบ tasks.json เดิม) และ JSON lines (หนึ่งงานต่อบรรทัด)
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        
+        def read_more() -> None:
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        
+        def skip_space() -> bool:
+            """ข้าม whitespace คืน False ถ้าอ่านจนหมดไฟล์แล้ว"""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer):
+                    return True
+                if eof:
+                    return False
+                read_more()
+        
+        if not skip_space():
+            raise json.JSONDecodeError("Expecting value", buffer, pos)
+        
+        if buffer[pos] != '[':
+            for line in _iter_lines(buffer[pos:], f):
+                if line.strip():
+                    yield json.loads(line)
+            return
+        
+        pos += 1
+        first = True
+        while True:
+            if not skip_space():
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            if buffer[pos] == ']':
+                # หลังปิด array ต้องไม่มีข้อมูลอื่นอีก เช่นเดียวกับ json.load
+                pos += 1
+                if skip_space():
+                    raise json.JSONDecodeError("Extra data", buffer, pos)
+                return
+            if not first:
+                if buffer[pos] != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                pos += 1
+                if not skip_space():
+                    raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            while True:
+                # ถ้าข้อมูลใน buffer ยังไม่ครบหนึ่งรายการ ให้อ่านเพิ่มแล้วลองใหม่
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    if end < len(buffer) or eof:
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                read_more()
+            yield record
+            pos = end
+            first = False
+
+
+def _iter_lines(head: str, f) -> Iterator[str]:
+    """คืนบรรทัดจากข้อความส่วนต้นที่อ่านไว้แล้ว ต่อด้วยบรรทัดที่เหลือในไฟล์"""
+    lines = head.split('\n')
+    tail = lines.pop()
+    yield from lines
+    for line in f:
+        if tail:
+            line, tail = tail + line, ''
+        yield line
+    if tail:
+        yield tail
+
+
+class JsonFileStorage(TaskStorage):
+    """
+    เก็บงานทั้งหมดในไฟล์ JSON ไฟล์เดียว (เขียนใหม่ทั้งไฟล์ทุกครั้งที่บันทึก)
+    
+    การบันทึกเขียนไฟล์ชั่วคราวแล้ว rename ภายใต้ file lock และตรวจสอบเวอร์ชันไฟล์
+    แบบ optimistic ถ้ามีโปรเซสอื่นบันทึกก่อน จะนำการเปลี่ยนแปลงของเรา
+    (ที่จดไว้จาก append) ไปใช้กับข้อมูลล่าสุดบนดิสก์แทนการเขียนทับ
+    """
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._lock = FileLock(path + ".lock")
+        self._version: Optional[Tuple[int, int, int]] = None
+        # การเปลี่ยนแปลงที่ยังไม่ได้บันทึก [(op, dict ของงานหรือ ID)]
+        self._pending: List[Tuple[str, object]] = []
+    
+    @property
+    def quarantine_path(self) -> str:
+        """ไฟล์ที่เก็บ record ที่อ่านไม่ได้ (JSON lines)"""
+        return self.path + ".quarantine.jsonl"
+    
+    def iter_tasks(self, quarantine: bool = False) -> Iterator[Task]:
+        """อ่านงานจากไฟล์ทีละชิ้นแบบ streaming (ข้าม record ที่ไม่ถูกต้อง)"""
+        if quarantine:
+            self.skipped = []
+            return tasks_from_records(iter_task_records(self.path), self.quarantine_path,
+                                      self.skipped)
+        return tasks_from_records(iter_task_records(self.path))
+    
+    def load(self) -> List[Task]:
+        version = file_version(self.path)
+        tasks = list(self.iter_tasks(quarantine=True))
+        self._version = version
+        self._pending = []
+        return tasks
+    
+    def append(self, op: str, task: Task) -> None:
+        self._pending.append((op, task.to_dict() if op in ('add', 'update') else task.id))
+    
+    def save(self, tasks: List[Task]) -> Optional[List[Task]]:
+        with self._lock:
+            merged = None
+            if file_version(self.path) != self._version:
+                # มีโปรเซสอื่นบันทึกไฟล์หลังจากที่เราโหลด: รวมการเปลี่ยนแปลงของเราเข้าไป
+                latest: Dict[str, Task] = {}
+                if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                    for task in self.iter_tasks():
+                        latest[task.id] = task
+                for op, data in self._pending:
+                    apply_change(latest, op, data)
+                tasks = merged = list(latest.values())
+            self.last_write_bytes = self._write(tasks)
+            self._version = file_version(self.path)
+            self._pending = []
+            return merged
+    
+    def _write(self, tasks: List[Task]) -> int:
+        """เขียนงานทั้งหมดลงไฟล์แบบ atomic คืนจำนวน byte ที่เขียน"""
+        return atomic_write_json(self.path, [task.to_dict() for task in tasks])
+
+
+class SnapshotStorage(JsonFileStorage):
+    """
+    เก็บงานเป็น binary snapshot (ดู SnapshotStore) แทน JSON
+    
+    ไฟล์เล็กกว่าและโหลดเร็วกว่า JSON การบันทึก การล็อก และการรวมการเปลี่ยนแปลง
+    จากโปรเซสอื่นทำเหมือน JsonFileStorage ทุกอย่าง
+    """
+    
+    def iter_tasks(self, quarantine: bool = False) -> Iterator[Task]:
+        """อ่านงานจาก mmap ทีละแถว (ข้ามแถวที่เสียหาย) ValueError ถ้าไฟล์ไม่สมบูรณ์"""
+        store = SnapshotStore(self.path)
+        if quarantine:
+            self.skipped = []
+        return self._iter_rows(store, quarantine)
+    
+    def _iter_rows(self, store: SnapshotStore, quarantine: bool) -> Iterator[Task]:
+        due_text: Dict[int, str] = {}
+        with store:
+            yield from tasks_from_records(
+                range(len(store)), self.quarantine_path if quarantine else None,
+                self.skipped if quarantine else None,
+                build=lambda row: store.task(row, due_text))
+    
+    def _write(self, tasks: List[Task]) -> int:
+        return write_snapshot(self.path, tasks)
+
+
+def export_snapshot_json(snapshot_path: str, json_path: str) -> int:
+    """แปลง binary snapshot เป็นไฟล์ JSON รูปแบบเดิม คืนจำนวนงาน"""
+    with SnapshotStore(snapshot_path) as store:
+        records = [view.to_dict() for view in store]
+    atomic_write_json(json_path, records)
+    return len(records)
+
+
+def import_json_snapshot(json_path: str, snapshot_path: str) -> int:
+    """แปลงไฟล์ JSON (หรือ JSON lines) เป็น binary snapshot คืนจำนวนงาน"""
+    tasks = list(tasks_from_records(iter_task_records(json_path),
+                                    snapshot_path + ".quarantine.jsonl"))
+    write_snapshot(snapshot_path, tasks)
+    return len(tasks)
+
+
+class JournalStorage(TaskStorage):
+    """
+    Storage แบบ append-only log (JSON lines) คู่กับ snapshot
+    
+    การเปลี่ยนแปลงแต่ละครั้งถูกต่อท้ายไฟล์ log หนึ่งบรรทัดแล้ว fsync
+    เมื่อ log ยาวถึง compact_every รายการจะ compaction เป็น snapshot ในเบื้องหลัง
+    snapshot ใช้รูปแบบเดียวกับ tasks.json เดิม จึงเปิดด้วย JsonFileStorage ได้
+    
+    หลายโปรเซสใช้ไฟล์เดียวกันได้: การต่อท้าย log, การสลับ log และการโหลด
+    ทำภายใต้ file lock และ compaction สร้าง snapshot จากข้อมูลบนดิสก์
+    จึงไม่ทิ้งการเปลี่ยนแปลงของโปรเซสอื่น
+    """
+    
+    journaled = True
+    
+    def __init__(self, path: str, compact_every: int = 1000, fsync: bool = True):
+        super().__init__(path)
+        self.log_path = path + ".log"
+        self.sealed_path = path + ".log.1"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._lock = FileLock(path + ".lock")
+        # ถือไว้ตลอดการ compaction เพื่อให้มีผู้ทำ compaction ได้ครั้งละหนึ่งโปรเซส
+        self._compact_lock = FileLock(path + ".compact.lock")
+        self._log = None
+        self._log_records = 0
+        self._compactor: Optional[threading.Thread] = None
+    
+    def exists(self) -> bool:
+        return any(os.path.exists(p) for p in (self.path, self.sealed_path, self.log_path))
+    
+    def _read_state(self) -> Tuple[Dict[str, Task], int]:
+        """อ่าน snapshot แล้วเล่น log ซ้ำ คืน (งานทั้งหมด, จำนวนรายการใน log ปัจจุบัน)"""
+        tasks: Dict[str, Task] = {}
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            snapshot = JsonFileStorage(self.path)
+            for task in snapshot.iter_tasks(quarantine=True):
+                tasks[task.id] = task
+            self.skipped = snapshot.skipped
+        self._replay(self.sealed_path, tasks)
+        return tasks, self._replay(self.log_path, tasks)
+    
+    def load(self) -> List[Task]:
+        with self._lock:
+            tasks, self._log_records = self._read_state()
+            stale = os.path.exists(self.sealed_path)
+        if stale:
+            # compaction ครั้งก่อนค้างอยู่ (เช่นโปรแกรมปิดกะทันหัน) ให้ทำต่อให้เสร็จ
+            self.compact(background=False)
+        return list(tasks.values())
+    
+    def _replay(self, log_path: str, tasks: Dict[str, Task]) -> int:
+        """เล่น log ซ้ำบน tasks คืนจำนวนรายการที่อ่านได้"""
+        if not os.path.exists(log_path):
+            return 0
+        count = 0
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # บรรทัดสุดท้ายเขียนไม่ครบตอนเครื่องดับ ข้ามส่วนที่เหลือ
+                    break
+                op = record['op']
+                apply_change(tasks, op, record['task'] if 'task' in record else record['id'])
+                count += 1
+        return count
+    
+    def _open_log(self):
+        """เปิดไฟล์ log (เปิดใหม่ถ้าโปรเซสอื่นสลับ log ไปแล้ว) ต้องถือ lock อยู่"""
+        if self._log is not None:
+            try:
+                current = os.stat(self.log_path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != os.fstat(self._log.fileno()).st_ino:
+                self._log.close()
+                self._log = None
+                self._log_records = 0
+        if self._log is None:
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+        return self._log
+    
+    def _record_line(self, op: str, task: Task) -> str:
+        if op in ('add', 'update'):
+            record = {'op': op, 'task': task.to_dict()}
+        else:
+            record = {'op': op, 'id': task.id}
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    
+    def append(self, op: str, task: Task) -> None:
+        self.append_many(op, [task])
+    
+    def append_many(self, op: str, tasks: List[Task]) -> None:
+        if not tasks:
+            return
+        data = "".join(self._record_line(op, task) for task in tasks)
+        with self._lock:
+            log = self._open_log()
+            log.write(data)
+            log.flush()
+            if self.fsync:
+                os.fsync(log.fileno())
+            self._log_records += len(tasks)
+            should_compact = self._log_records >= self.compact_every
+        if should_compact:
+            self.compact()
+    
+    def compact(self, background: bool = True) -> None:
+        """ย้าย log ปัจจุบันออกแล้วเขียน snapshot ใหม่ (ค่าเริ่มต้นทำในเบื้องหลัง)"""
+        if not self._compact_lock.acquire(blocking=not background):
+            return  # มี thread หรือโปรเซสอื่นกำลัง compaction อยู่
+        try:
+            with self._lock:
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                self._log_records = 0
+                if os.path.exists(self.log_path) and not os.path.exists(self.sealed_path):
+                    os.replace(self.log_path, self.sealed_path)
+        except BaseException:
+            self._compact_lock.release()
+            raise
+        if background:
+            self._compactor = threading.Thread(target=self._write_snapshot, daemon=True)
+            self._compactor.start()
+        else:
+            self._write_snapshot()
+    
+    def _write_snapshot(self) -> None:
+        """สร้าง snapshot จาก snapshot เดิม + log ที่ถูกสลับออก แล้วลบ log นั้น"""
+        try:
+            tasks: Dict[str, Task] = {}
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                for task in JsonFileStorage(self.path).iter_tasks():
+                    tasks[task.id] = task
+            self._replay(self.sealed_path, tasks)
+            data = [task.to_dict() for task in tasks.values()]
+            with self._lock:
+                self.last_write_bytes = atomic_write_json(self.path, data)
+                if os.path.exists(self.sealed_path):
+                    os.remove(self.sealed_path)
+        finally:
+            self._compact_lock.release()
+    
+    def save(self, tasks: List[Task]) -> Optional[List[Task]]:
+        # การเปลี่ยนแปลงทั้งหมดอยู่ใน log แล้ว checkpoint จึงสร้างจากข้อมูลบนดิสก์
+        # ซึ่งรวมการเปลี่ยนแปลงของโปรเซสอื่นไว้ด้วย
+        if self._compactor is not None:
+            self._compactor.join()
+        self.last_write_bytes = 0
+        self.compact(background=False)
+        with self._lock:
+            latest, self._log_records = self._read_state()
+        # เทียบข้อมูลทั้งงาน ไม่ใช่แค่สถานะ เพื่อไม่ทับการแก้ไขความสำคัญ วันที่ หรือกฎการทำซ้ำ
+        # ที่โปรเซสอื่นเขียนลง log
+        if len(tasks) == len(latest) and all(
+                task.id in latest and latest[task.id].to_dict() == task.to_dict()
+                for task in tasks):
+            return None
+        return list(latest.values())
+    
+    def close(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+class SqliteStorage(TaskStorage):
+    """
+    เก็บงานในฐานข้อมูล SQLite (โหมด WAL) แทนไฟล์ JSON
+    
+    ทุกการเปลี่ยนแปลงถูก commit ลงฐานข้อมูลทันที และ TaskManager ส่งการค้นหา
+    การแสดงรายการ และ query ตามวันที่ไปทำใน SQL ผ่าน index โดยไม่โหลดงานทั้งหมด
+    เข้าหน่วยความจำ การค้นหาคำสำคัญใช้ตาราง FTS5 แบบ trigram (ถ้า SQLite รองรับ)
+    """
+    
+    journaled = True
+    queryable = True
+    
+    COLUMNS = "id, title, description, due_date, completed, created_at, recurrence, priority"
+    # จำนวนแถวที่อ่านต่อครั้งเมื่อวนผลลัพธ์แบบ streaming
+    CHUNK_SIZE = 512
+    FTS_TRIGGERS = """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts(rowid, title, description)
+            VALUES (new.seq, new.title, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+            VALUES ('delete', old.seq, old.title, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description
+        ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+            VALUES ('delete', old.seq, old.title, old.description);
+            INSERT INTO tasks_fts(rowid, title, description)
+            VALUES (new.seq, new.title, new.description);
+        END;
+    """
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        import sqlite3  # import เฉพาะเมื่อใช้ storage นี้
+        
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # ใช้ str.lower ของ Python ให้ผลการค้นหาเหมือนการค้นหาในหน่วยความจำ
+        self._conn.create_function("py_lower", 1, lambda text: text.lower() if text else "")
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS tasks (
+                seq INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL DEFAULT '',
+                due_date TEXT NOT NULL,
+                due_ordinal INTEGER,
+                completed INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                recurrence TEXT,
+                priority INTEGER NOT NULL DEFAULT {DEFAULT_PRIORITY}
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+            CREATE INDEX IF NOT EXISTS idx_tasks_completed_due ON tasks(completed, due_ordinal);
+            CREATE INDEX IF NOT EXISTS idx_tasks_due_ordinal ON tasks(due_ordinal);
+        """)
+        # ฐานข้อมูลที่สร้างก่อนมีงานที่ทำซ้ำยังไม่มีคอลัมน์ recurrence
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        if 'recurrence' not in columns:
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN recurrence TEXT")
+        if 'priority' not in columns:
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN priority INTEGER NOT NULL "
+                               f"DEFAULT {DEFAULT_PRIORITY}")
+        # คิวงานที่ควรทำถัดไป: อ่านงานที่ยังไม่เสร็จตามลำดับความสำคัญและวันที่จาก index
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_ready "
+                           "ON tasks(completed, priority, due_ordinal)")
+        # due_ordinal ของงานที่ทำซ้ำคือครั้งถัดไป ส่วนการขยายแต่ละครั้งต้องอ่านกฎของทุกงานที่ทำซ้ำ
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_recurring ON tasks(seq) "
+                           "WHERE recurrence IS NOT NULL")
+        self.has_fts = self._create_fts(sqlite3)
+    
+    def _create_fts(self, sqlite3) -> bool:
+        """สร้างตาราง FTS5 และ trigger สำหรับอัปเดต คืน False ถ้า SQLite ไม่รองรับ"""
+        try:
+            self._conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                    title, description, content='tasks', content_rowid='seq', tokenize='trigram'
+                );
+            """ + self.FTS_TRIGGERS)
+            return True
+        except sqlite3.OperationalError:
+            return False
+    
+    def _row_to_task(self, row) -> Task:
+        return Task.from_dict({
+            'v': RECORD_VERSION, 'id': row[0], 'title': row[1], 'description': row[2],
+            'due_date': row[3], 'completed': bool(row[4]), 'created_at': row[5],
+            'recurrence': json.loads(row[6]) if row[6] else None, 'priority': row[7],
+        })
+    
+    def _query(self, sql: str, params=()) -> List[Task]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_task(row) for row in rows]
+    
+    def _iter_query(self, clause: str, params: list) -> Iterator[Task]:
+        """
+        วนผลลัพธ์ตามลำดับ seq ทีละชุด (keyset pagination)
+        
+        ได้งานชุดแรกทันทีโดยไม่ต้องอ่านทั้งตาราง และไม่ถือ lock ค้างไว้ระหว่าง yield
+        """
+        columns = ", ".join("t." + column for column in self.COLUMNS.split(", "))
+        sql = (f"SELECT {columns}, t.seq {clause} AND t.seq > ? "
+               f"ORDER BY t.seq LIMIT {self.CHUNK_SIZE}")
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, params + [last_seq]).fetchall()
+            for row in rows:
+                yield self._row_to_task(row)
+            if len(rows) < self.CHUNK_SIZE:
+                return
+            last_seq = rows[-1][-1]
+    
+    def _scalar(self, sql: str, params=()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+    
+    def load(self) -> List[Task]:
+        return list(self.iter_tasks())
+    
+    def iter_tasks(self, completed: Optional[bool] = None) -> Iterator[Task]:
+        """วนงานตามลำดับที่เพิ่ม (กรองตามสถานะได้)"""
+        if completed is None:
+            return self._iter_query("FROM tasks t WHERE 1", [])
+        return self._iter_query("FROM tasks t WHERE t.completed = ?", [int(completed)])
+    
+    def get(self, task_id: str) -> Optional[Task]:
+        """ค้นหางานตาม ID ผ่าน unique index"""
+        tasks = self._query(f"SELECT {self.COLUMNS} FROM tasks WHERE id = ?", (task_id,))
+        return tasks[0] if tasks else None
+    
+    def count(self, completed: Optional[bool] = None) -> int:
+        """นับจำนวนงาน (กรองตามสถานะได้)"""
+        if completed is None:
+            return self._scalar("SELECT COUNT(*) FROM tasks")
+        return self._scalar("SELECT COUNT(*) FROM tasks WHERE completed = ?", (int(completed),))
+    
+    def _search_clause(self, keyword: str, due_date: str) -> Tuple[str, list]:
+        """สร้างส่วน FROM/WHERE ของการค้นหา"""
+        params: list = []
+        if keyword and self.has_fts and len(keyword) >= 3:
+            sql = ("FROM tasks_fts JOIN tasks t ON t.seq = tasks_fts.rowid "
+                   "WHERE tasks_fts MATCH ?")
+            params.append('"' + keyword.replace('"', '""') + '"')
+        elif keyword:
+            # คำสั้นกว่า trigram ค้นหาแบบ substring ทั้งตาราง
+            sql = ("FROM tasks t WHERE (instr(py_lower(t.title), ?) > 0 "
+                   "OR instr(py_lower(t.description), ?) > 0)")
+            params.extend([keyword.lower(), keyword.lower()])
+        else:
+            sql = "FROM tasks t WHERE 1"
+        if due_date:
+            # งานที่ทำซ้ำตรวจวันที่ของแต่ละครั้งใน Python (ดู matches_due_date)
+            sql += " AND (t.due_date = ? OR t.recurrence IS NOT NULL)"
+            params.append(due_date)
+        return sql, params
+    
+    def search(self, keyword: str = "", due_date: str = "") -> Iterator[Task]:
+        """ค้นหางานตามคำสำคัญและ/หรือวันที่ เรียงตามลำดับที่เพิ่ม"""
+        clause, params = self._search_clause(keyword, due_date)
+        tasks = self._iter_query(clause, params)
+        if not due_date:
+            return tasks
+        return (task for task in tasks if matches_due_date(task, due_date))
+    
+    def count_search(self, keyword: str = "", due_date: str = "") -> int:
+        """นับจำนวนงานที่ตรงกับการค้นหาด้วย COUNT(*)"""
+        clause, params = self._search_clause(keyword, due_date)
+        if not due_date:
+            return self._scalar(f"SELECT COUNT(*) {clause}", params)
+        return (self._scalar(f"SELECT COUNT(*) {clause} AND t.recurrence IS NULL", params) +
+                sum(1 for task in self._iter_query(clause + " AND t.recurrence IS NOT NULL", params)
+                    if matches_due_date(task, due_date)))
+    
+    def recurring_tasks(self) -> List[Task]:
+        """คืนงานที่ทำซ้ำทั้งหมด (ผ่าน partial index)"""
+        return list(self._iter_query("FROM tasks t WHERE t.recurrence IS NOT NULL", []))
+    
+    def summary(self) -> Dict[str, int]:
+        """สรุปจำนวนงานด้วย COUNT(*) ผ่าน index"""
+        total = self.count()
+        completed = self.count(completed=True)
+        return {'total': total, 'pending': total - completed, 'completed': completed,
+                'overdue': self.count_due_between(None, today_ordinal() - 1)}
+    
+    def due_counts(self, include_completed: bool = False) -> Dict[int, int]:
+        """คืนจำนวนงานต่อวันที่ครบกำหนด (ordinal -> จำนวน) ด้วย GROUP BY"""
+        clause, params = self._due_clause(None, None, include_completed)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT due_ordinal, COUNT(*) FROM tasks {clause} GROUP BY due_ordinal",
+                params).fetchall()
+        return dict(rows)
+    
+    def _due_clause(self, start: Optional[int], end: Optional[int],
+                    include_completed: bool) -> Tuple[str, list]:
+        sql = "WHERE due_ordinal IS NOT NULL"
+        params: list = []
+        if not include_completed:
+            sql += " AND completed = 0"
+        if start is not None:
+            sql += " AND due_ordinal >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND due_ordinal <= ?"
+            params.append(end)
+        return sql, params
+    
+    def due_between(self, start: Optional[int], end: Optional[int],
+                    include_completed: bool = False) -> List[Task]:
+        """คืนงานที่ครบกำหนดในช่วง ordinal ที่กำหนด เรียงตามวันที่"""
+        clause, params = self._due_clause(start, end, include_completed)
+        return self._query(f"SELECT {self.COLUMNS} FROM tasks {clause} "
+                           "ORDER BY due_ordinal, id", params)
+    
+    def count_due_between(self, start: Optional[int], end: Optional[int],
+                          include_completed: bool = False) -> int:
+        """นับจำนวนงานที่ครบกำหนดในช่วง ordinal ที่กำหนด"""
+        clause, params = self._due_clause(start, end, include_completed)
+        return self._scalar(f"SELECT COUNT(*) FROM tasks {clause}", params)
+    
+    def next_tasks(self, k: int, today: Optional[int] = None) -> List[Task]:
+        """
+        คืนงานที่ยังไม่เสร็จ k งานแรกตามลำดับที่ควรทำ (ดู ReadyQueue)
+        
+        อ่านงานเลยกำหนดก่อน แล้วจึงงานที่เหลือ ทั้งสองส่วนเรียงตาม priority และวันที่
+        ผ่าน idx_tasks_ready และหยุดเมื่อได้ครบ k งาน
+        """
+        today = today if today is not None else today_ordinal()
+        order = "ORDER BY priority, due_ordinal, seq LIMIT ?"
+        tasks = self._query(f"SELECT {self.COLUMNS} FROM tasks WHERE completed = 0 "
+                            f"AND due_ordinal < ? {order}", (today, k))
+        if len(tasks) < k:
+            tasks += self._query(f"SELECT {self.COLUMNS} FROM tasks WHERE completed = 0 "
+                                 f"AND (due_ordinal >= ? OR due_ordinal IS NULL) {order}",
+                                 (today, k - len(tasks)))
+        return tasks
+    
+    def _insert_rows(self, tasks: List[Task]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO tasks (id, title, description, due_date, due_ordinal, "
+            "completed, created_at, recurrence, priority) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(task.id, task.title, task.description, task.due_date, task.due_ordinal,
+              int(task.completed), task.created_at, self._recurrence_json(task), task.priority)
+             for task in tasks])
+    
+    @staticmethod
+    def _recurrence_json(task: Task) -> Optional[str]:
+        if task.recurrence is None:
+            return None
+        return json.dumps(task.recurrence.to_dict(), ensure_ascii=False)
+    
+    def append_many(self, op: str, tasks: List[Task]) -> None:
+        if not tasks:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if op == 'add':
+                    self._insert_rows(tasks)
+                elif op == 'complete':
+                    self._conn.executemany("UPDATE tasks SET completed = 1 WHERE id = ?",
+                                           [(task.id,) for task in tasks])
+                elif op == 'update':
+                    self._conn.executemany(
+                        "UPDATE tasks SET due_ordinal = ?, completed = ?, recurrence = ?, "
+                        "priority = ? WHERE id = ?",
+                        [(task.due_ordinal, int(task.completed), self._recurrence_json(task),
+                          task.priority, task.id) for task in tasks])
+                elif op == 'delete':
+                    self._conn.executemany("DELETE FROM tasks WHERE id = ?",
+                                           [(task.id,) for task in tasks])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def append(self, op: str, task: Task) -> None:
+        self.append_many(op, [task])
+    
+    def bulk_load(self, batches: Iterable[List[Task]], replace: bool = False) -> int:
+        """
+        เพิ่มงานจำนวนมากใน transaction เดียว (replace=True ลบข้อมูลเดิมก่อน)
+        
+        ปิด trigger ของ FTS ระหว่างเพิ่ม แล้วสร้าง index ใหม่ครั้งเดียวตอนท้าย
+        ซึ่งเร็วกว่าอัปเดต FTS ทีละแถวหลายเท่า คืนจำนวนงานที่เพิ่ม
+        """
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if self.has_fts:
+                    for name in ("tasks_fts_insert", "tasks_fts_delete", "tasks_fts_update"):
+                        self._conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                if replace:
+                    self._conn.execute("DELETE FROM tasks")
+                for batch in batches:
+                    self._insert_rows(batch)
+                    count += len(batch)
+                if self.has_fts:
+                    self._conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+                    for statement in self.FTS_TRIGGERS.split("END;")[:-1]:
+                        self._conn.execute(statement + "END;")
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+    
+    def save(self, tasks: List[Task]) -> Optional[List[Task]]:
+        """แทนที่ข้อมูลทั้งหมดในฐานข้อมูลด้วย tasks ใน transaction เดียว"""
+        self.bulk_load([tasks], replace=True)
+        return None
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str, batch_size: int = 10000) -> int:
+    """แปลงไฟล์ tasks.json (หรือ JSON lines) เป็นฐานข้อมูล SQLite คืนจำนวนงานที่ย้าย"""
+    def batches() -> Iterator[List[Task]]:
+        batch: List[Task] = []
+        for task in tasks_from_records(iter_task_records(json_path), db_path + ".quarantine.jsonl"):
+            batch.append(task)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        yield batch
+    
+    storage = SqliteStorage(db_path)
+    try:
+        return storage.bulk_load(batches())
+    finally:
+        storage.close()
+
+
+STORAGE_KINDS = ("json", "journal", "sqlite", "snapshot")
+
+
+def default_data_file(kind: str) -> str:
+    """ชื่อไฟล์ข้อมูลเริ่มต้นของ storage แต่ละแบบ"""
+    return {"sqlite": "tasks.db", "snapshot": "tasks.snap"}.get(kind, "tasks.json")
+
+
+def create_storage(kind: str, path: Optional[str] = None) -> TaskStorage:
+    """สร้าง storage engine ตามชื่อ (ดู STORAGE_KINDS)"""
+    path = path or default_data_file(kind)
+    if kind == "journal":
+        return JournalStorage(path)
+    if kind == "json":
+        return JsonFileStorage(path)
+    if kind == "sqlite":
+        return SqliteStorage(path)
+    if kind == "snapshot":
+        return SnapshotStorage(path)
+    raise ValueError(f"ไม่รู้จัก storage: {kind}")
+
+
+class SearchIndex:
+    """
+    Inverted index แบบ n-gram สำหรับค้นหาคำสำคัญในชื่อและคำอธิบายงาน
+    
+    ใช้ n-gram ของตัวอักษรแทนการตัดคำ จึงใช้กับข้อความภาษาไทยที่ไม่มีช่องว่างได้
+    ผลลัพธ์ยังตรวจสอบด้วย substring จริงเสมอ จึงได้ผลเหมือนการค้นหาแบบเดิมทุกประการ
+    """
+    
+    def __init__(self, n: int = 2):
+        self.n = n
+        self._postings: Dict[str, Set[str]] = {}
+        # เก็บข้อความตัวพิมพ์เล็กไว้ เพื่อไม่ต้อง lower() ใหม่ทุกครั้งที่ค้นหา
+        self._texts: Dict[str, Tuple[str, str]] = {}
+    
+    def _grams(self, text: str) -> Set[str]:
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+    
+    def add(self, task: Task) -> None:
+        """เพิ่มงานเข้า index"""
+        title = task.title.lower()
+        description = task.description.lower()
+        self._texts[task.id] = (title, description)
+        for gram in self._grams(title) | self._grams(description):
+            self._postings.setdefault(gram, set()).add(task.id)
+    
+    def remove(self, task: Task) -> None:
+        """ลบงานออกจาก index"""
+        texts = self._texts.pop(task.id, None)
+        if texts is None:
+            return
+        for gram in self._grams(texts[0]) | self._grams(texts[1]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(task.id)
+                if not ids:
+                    del self._postings[gram]
+    
+    def clear(self) -> None:
+        """ล้าง index ทั้งหมด"""
+        self._postings.clear()
+        self._texts.clear()
+    
+    def matches(self, task_id: str, keyword_lower: str) -> bool:
+        """ตรวจสอบว่าคำสำคัญ (ตัวพิมพ์เล็ก) อยู่ในชื่อหรือคำอธิบายของงานหรือไม่"""
+        title, description = self._texts[task_id]
+        return keyword_lower in title or keyword_lower in description
+    
+    def iter_matches(self, keyword: str) -> Iterator[str]:
+        """คืน ID ของงานที่มีคำสำคัญ (ไม่เรียงลำดับ)"""
+        keyword_lower = keyword.lower()
+        if len(keyword_lower) < self.n:
+            candidates = self._texts.keys()
+        else:
+            postings = []
+            for gram in self._grams(keyword_lower):
+                ids = self._postings.get(gram)
+                if not ids:
+                    return
+                postings.append(ids)
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        for task_id in candidates:
+            if self.matches(task_id, keyword_lower):
+                yield task_id
+
+
+class DueDateIndex:
+    """
+    Index ของงานแยกตามวันที่ครบกำหนดสำหรับ range query
+    
+    เก็บ ID เป็นกลุ่มต่อวัน (dict ของ set) และรายการวันที่ที่มีงานเรียงด้วย bisect
+    การเพิ่ม/ลบงานจึงเป็น O(1) ยกเว้นเมื่อวันนั้นเพิ่งมีหรือไม่มีงานแล้ว (O(D) เมื่อ D
+    คือจำนวนวันที่ต่างกัน ซึ่งน้อยกว่าจำนวนงานมาก)
+    """
+    
+    def __init__(self):
+        self.clear()
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def add(self, task: Task) -> None:
+        """เพิ่มงานเข้า index (ข้ามงานที่วันที่ไม่ถูกต้อง)"""
+        due = task.due_ordinal
+        if due is None:
+            return
+        bucket = self._buckets.get(due)
+        if bucket is None:
+            bucket = self._buckets[due] = set()
+            bisect.insort(self._days, due)
+        if task.id not in bucket:
+            bucket.add(task.id)
+            self._size += 1
+    
+    def remove(self, task: Task) -> None:
+        """ลบงานออกจาก index"""
+        bucket = self._buckets.get(task.due_ordinal)
+        if bucket is None or task.id not in bucket:
+            return
+        bucket.remove(task.id)
+        self._size -= 1
+        if not bucket:
+            del self._buckets[task.due_ordinal]
+            del self._days[bisect.bisect_left(self._days, task.due_ordinal)]
+    
+    def clear(self) -> None:
+        """ล้าง index ทั้งหมด"""
+        self._buckets: Dict[int, Set[str]] = {}
+        self._days: List[int] = []
+        self._size = 0
+    
+    def rebuild(self, tasks: Iterable[Task]) -> None:
+        """สร้าง index ใหม่จากงานทั้งหมด (เรียงเฉพาะวันที่ที่ต่างกันครั้งเดียว)"""
+        buckets: Dict[int, Set[str]] = {}
+        for task in tasks:
+            if task.due_ordinal is not None:
+                buckets.setdefault(task.due_ordinal, set()).add(task.id)
+        self._buckets = buckets
+        self._days = sorted(buckets)
+        self._size = sum(len(bucket) for bucket in buckets.values())
+    
+    def _days_between(self, start: Optional[int], end: Optional[int]) -> List[int]:
+        lo = 0 if start is None else bisect.bisect_left(self._days, start)
+        hi = len(self._days) if end is None else bisect.bisect_right(self._days, end)
+        return self._days[lo:hi]
+    
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[str]:
+        """คืน ID ของงานที่ครบกำหนดระหว่าง start ถึง end (รวมทั้งสองวัน) เรียงตามวันที่และ ID"""
+        for day in self._days_between(start, end):
+            yield from sorted(self._buckets[day])
+    
+    def count_between(self, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """นับจำนวนงานที่ครบกำหนดในช่วงวันที่ (O(จำนวนวันในช่วง))"""
+        if start is None and end is None:
+            return self._size
+        return sum(len(self._buckets[day]) for day in self._days_between(start, end))
+
+
+class TaskStats:
+    """
+    ตัวนับสถิติของงานที่อัปเดตทีละงาน (O(1) ต่อการเพิ่ม/เสร็จสิ้น/ลบ)
+    
+    เก็บจำนวนงานต่อวันที่ครบกำหนดแยกงานทั้งหมดและงานที่ยังไม่เสร็จ จำนวนงานเลยกำหนด
+    ถูกปรับพร้อมตัวนับอื่น และคำนวณใหม่จาก histogram เฉพาะเมื่อวันเปลี่ยน
+    """
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self) -> None:
+        """ล้างตัวนับทั้งหมด"""
+        self.total = 0
+        self.completed = 0
+        self._due_counts: Dict[int, int] = {}
+        self._pending_due_counts: Dict[int, int] = {}
+        self._overdue = 0
+        self._today = today_ordinal()
+    
+    @staticmethod
+    def _bump(counts: Dict[int, int], due: int, delta: int) -> None:
+        count = counts.get(due, 0) + delta
+        if count:
+            counts[due] = count
+        else:
+            counts.pop(due, None)
+    
+    def _bump_pending(self, due: Optional[int], delta: int) -> None:
+        if due is None:
+            return
+        self._bump(self._pending_due_counts, due, delta)
+        if due < self._today:
+            self._overdue += delta
+    
+    def add(self, task: Task) -> None:
+        """นับงานใหม่"""
+        self.total += 1
+        if task.due_ordinal is not None:
+            self._bump(self._due_counts, task.due_ordinal, 1)
+        if task.completed:
+            self.completed += 1
+        else:
+            self._bump_pending(task.due_ordinal, 1)
+    
+    def remove(self, task: Task) -> None:
+        """นำงานที่ถูกลบออกจากตัวนับ"""
+        self.total -= 1
+        if task.due_ordinal is not None:
+            self._bump(self._due_counts, task.due_ordinal, -1)
+        if task.completed:
+            self.completed -= 1
+        else:
+            self._bump_pending(task.due_ordinal, -1)
+    
+    def complete(self, task: Task) -> None:
+        """ย้ายงานจากรอดำเนินการเป็นเสร็จสิ้น (เรียกก่อนเปลี่ยน task.completed)"""
+        self.completed += 1
+        self._bump_pending(task.due_ordinal, -1)
+    
+    def rebuild(self, tasks: Iterable[Task]) -> None:
+        """นับใหม่จากงานทั้งหมด"""
+        self.clear()
+        for task in tasks:
+            self.add(task)
+    
+    @property
+    def pending(self) -> int:
+        return self.total - self.completed
+    
+    @property
+    def overdue(self) -> int:
+        """จำนวนงานที่ยังไม่เสร็จและเลยกำหนด ณ วันนี้"""
+        today = today_ordinal()
+        if today != self._today:
+            self._today = today
+            self._overdue = sum(count for due, count in self._pending_due_counts.items()
+                                if due < today)
+        return self._overdue
+    
+    def summary(self) -> Dict[str, int]:
+        """คืนตัวนับทั้งหมดเป็น dict"""
+        return {'total': self.total, 'pending': self.pending,
+                'completed': self.completed, 'overdue': self.overdue}
+    
+    def due_counts(self, include_completed: bool = False) -> Dict[int, int]:
+        """คืนจำนวนงานต่อวันที่ครบกำหนด (ordinal -> จำนวน)"""
+        return dict(self._due_counts if include_completed else self._pending_due_counts)
+
+
+class ReadyQueue:
+    """
+    คิวงานที่ยังไม่เสร็จเรียงตามลำดับที่ควรทำ: งานเลยกำหนดก่อน แล้วตามความสำคัญและวันที่ครบกำหนด
+    
+    เก็บเป็น binary heap ของ (ไม่เลยกำหนด, priority, due_ordinal, ลำดับที่เพิ่ม, id)
+    การเพิ่มและดึงงานถัดไปใช้ O(log N) ส่วนงานที่เสร็จหรือถูกลบจะไม่ถูกค้นหาใน heap
+    แต่ถูกทำเครื่องหมายว่าหมดอายุ (lazy deletion) และถูกข้ามเมื่อขึ้นมาถึงยอด heap
+    สร้าง heap ใหม่ด้วย heapify ใน O(N) ตอนโหลด เมื่อข้ามวัน (สถานะเลยกำหนดเปลี่ยน)
+    และเมื่อ entry ที่หมดอายุมีมากกว่า entry ที่ใช้งานอยู่
+    """
+    
+    def __init__(self):
+        self._heap: List[Tuple[int, int, int, int, str]] = []
+        # id -> entry ปัจจุบันของงาน entry อื่นของ id เดียวกันใน heap ถือว่าหมดอายุ
+        self._entries: Dict[str, Tuple[int, int, int, int, str]] = {}
+        self._counter = 0
+        self._today = today_ordinal()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _entry(self, task: Task) -> Tuple[int, int, int, int, str]:
+        # งานที่วันที่ไม่ถูกต้องอยู่ก่อนงานอื่นที่ความสำคัญเท่ากัน (เหมือน NULL ใน SQLite)
+        due = task.due_ordinal or 0
+        self._counter += 1
+        return (0 if 0 < due < self._today else 1, task.priority, due, self._counter, task.id)
+    
+    def add(self, task: Task) -> None:
+        """เพิ่มงานเข้าคิว (ข้ามงานที่เสร็จแล้ว) O(log N)"""
+        if task.completed:
+            return
+        entry = self._entry(task)
+        self._entries[task.id] = entry
+        heapq.heappush(self._heap, entry)
+    
+    def discard(self, task_id: str) -> None:
+        """นำงานออกจากคิวแบบ lazy O(1) (ตัด heap ให้เล็กลงเมื่อ entry หมดอายุมากเกินไป)"""
+        if self._entries.pop(task_id, None) is not None and \
+                len(self._heap) > 2 * len(self._entries) + 64:
+            self._heapify()
+    
+    def rebuild(self, tasks: Iterable[Task]) -> None:
+        """สร้างคิวใหม่จากงานทั้งหมดด้วย heapify ครั้งเดียว O(N)"""
+        self._today = today_ordinal()
+        self._counter = 0
+        self._entries = {}
+        for task in tasks:
+            if not task.completed:
+                self._entries[task.id] = self._entry(task)
+        self._heapify()
+    
+    def _heapify(self) -> None:
+        self._heap = list(self._entries.values())
+        heapq.heapify(self._heap)
+    
+    def _check_day(self) -> None:
+        """เมื่อข้ามวัน คำนวณสถานะเลยกำหนดของทุก entry ใหม่แล้ว heapify"""
+        today = today_ordinal()
+        if today == self._today:
+            return
+        self._today = today
+        self._entries = {
+            task_id: (0 if 0 < entry[2] < today else 1,) + entry[1:]
+            for task_id, entry in self._entries.items()
+        }
+        self._heapify()
+    
+    def peek(self, k: int) -> List[str]:
+        """
+        คืน ID ของงาน k งานแรกโดยไม่ดึงออกจากคิว
+        
+        ไล่ heap จากยอดด้วย heap ของตำแหน่งที่เป็นไปได้ จึงใช้ O(k log k)
+        (บวก entry ที่หมดอายุที่พบระหว่างทาง) แทนการเรียงงานทั้งหมด
+        """
+        self._check_day()
+        heap = self._heap
+        result: List[str] = []
+        candidates = [(heap[0], 0)] if heap else []
+        while candidates and len(result) < k:
+            entry, i = heapq.heappop(candidates)
+            if self._entries.get(entry[-1]) is entry:
+                result.append(entry[-1])
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(candidates, (heap[child], child))
+        return result
+    
+    def pop(self) -> Optional[str]:
+        """ดึง ID ของงานถัดไปออกจากคิว O(log N) (None ถ้าคิวว่าง)"""
+        self._check_day()
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if self._entries.get(entry[-1]) is entry:
+                del self._entries[entry[-1]]
+                return entry[-1]
+        return None
+
+
+def due_histogram(due_counts: Dict[int, int], period: str = "day") -> List[Tuple[str, int]]:
+    """
+    รวมจำนวนงานต่อวันที่ (ordinal -> จำนวน) เป็น histogram เรียงตามวันที่
+    
+    period = "day" ใช้วันที่ครบกำหนด, "week" รวมเป็นรายสัปดาห์ (วันจันทร์ต้นสัปดาห์)
+    """
+    if period not in ("day", "week"):
+        raise ValueError(f"ไม่รู้จักช่วงเวลา: {period}")
+    buckets: Dict[int, int] = {}
+    for due, count in due_counts.items():
+        if period == "week":
+            due -= (due - 1) % 7  # ordinal 1 (0001-01-01) เป็นวันจันทร์
+        buckets[due] = buckets.get(due, 0) + count
+    return [(date.fromordinal(due).isoformat(), buckets[due]) for due in sorted(buckets)]
+
+
+class BatchResult(NamedTuple):
+    """ผลลัพธ์ของการทำงานแบบ batch หนึ่งรายการ"""
+    index: int
+    ok: bool
+    task_id: Optional[str]
+    error: Optional[str]
+
+
+def read_import_records(path: str) -> Iterator[Dict]:
+    """อ่านข้อมูลงานสำหรับนำเข้าจากไฟล์ CSV (ตามนามสกุล) หรือ JSON/JSON lines"""
+    if path.lower().endswith('.csv'):
+        import csv  # import เฉพาะตอนใช้ เพื่อให้โปรแกรมเริ่มทำงานเร็ว
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.DictReader(f)
+    else:
+        yield from iter_task_records(path)
+
+
+class TaskPage(NamedTuple):
+    """งานหนึ่งหน้าที่จัดรูปแบบแล้ว พร้อมเขียนออกด้วย write ครั้งเดียว"""
+    text: str
+    count: int
+    # ตำแหน่งของงานถัดไปในผลลัพธ์ (ส่งกลับมาเป็น cursor เพื่อขอหน้าถัดไป)
+    cursor: int
+    has_more: bool
+
+
+def paginate(tasks: Iterable[Task], formatter: Callable[[Task], str],
+             page_size: int = 0, cursor: int = 0) -> Iterator[TaskPage]:
+    """
+    แบ่งงานจาก iterator เป็นหน้า ๆ และจัดรูปแบบเฉพาะงานในหน้านั้น
+    
+    page_size = 0 คือหน้าเดียวทั้งหมด งานก่อนตำแหน่ง cursor ถูกข้ามโดยไม่จัดรูปแบบ
+    อ่านงานล่วงหน้าเพียงชิ้นเดียวเพื่อบอกว่ามีหน้าถัดไปหรือไม่
+    """
+    iterator = iter(tasks)
+    if cursor:
+        next(islice(iterator, cursor, cursor), None)
+    lookahead = next(iterator, None)
+    while lookahead is not None:
+        chunk = [lookahead]
+        chunk.extend(islice(iterator, page_size - 1) if page_size else iterator)
+        lookahead = next(iterator, None)
+        cursor += len(chunk)
+        yield TaskPage("".join(map(formatter, chunk)), len(chunk), cursor, lookahead is not None)
+
+
+def format_due(task) -> str:
+    """วันที่ครบกำหนดสำหรับแสดงผล (งานที่ทำซ้ำแสดงครั้งถัดไปพร้อมกฎ)"""
+    rule = task.recurrence
+    if rule is None:
+        return task.due_date
+    if task.completed:
+        return f"{task.due_date} 🔁 {rule.describe()} (ครบทุกครั้งแล้ว)"
+    return f"{date.fromordinal(task.due_ordinal).isoformat()} 🔁 {rule.describe()}"
+
+
+def format_pending_task(task: Task, today: int) -> str:
+    """จัดรูปแบบงานที่ยังไม่เสร็จสำหรับหน้ารายการงาน"""
+    status = "⏰" if task.is_overdue(today) else "📅"
+    return (f"{status} ID: {task.id}\n"
+            f"   📌 ชื่อ: {task.title}\n"
+            f"   📝 คำอธิบาย: {task.description}\n"
+            f"   📅 วันที่ครบกำหนด: {format_due(task)}\n"
+            f"   ⭐ ความสำคัญ: {PRIORITY_LEVELS[task.priority]}\n"
+            f"   🕒 สร้างเมื่อ: {task.created_at}\n\n")
+
+
+def format_completed_task(task: Task) -> str:
+    """จัดรูปแบบงานที่เสร็จแล้วสำหรับหน้ารายการงาน"""
+    return (f"✅ ID: {task.id}\n"
+            f"   📌 ชื่อ: {task.title}\n"
+            f"   📝 คำอธิบาย: {task.description}\n"
+            f"   📅 วันที่ครบกำหนด: {format_due(task)}\n\n")
+
+
+def format_search_result(task: Task, today: int) -> str:
+    """จัดรูปแบบงานในผลการค้นหา"""
+    status = "✅" if task.completed else "🔄"
+    overdue = "⏰" if task.is_overdue(today) else ""
+    return (f"{status}{overdue} ID: {task.id}\n"
+            f"   📌 ชื่อ: {task.title}\n"
+            f"   📝 คำอธิบาย: {task.description}\n"
+            f"   📅 วันที่ครบกำหนด: {format_due(task)}\n"
+            f"   ⭐ ความสำคัญ: {PRIORITY_LEVELS[task.priority]}\n\n")
+
+
+def format_next_task(task: Task, today: int) -> str:
+    """จัดรูปแบบงานหนึ่งบรรทัดในรายการงานที่ควรทำถัดไป"""
+    status = "⏰" if task.is_overdue(today) else "📅"
+    return f"{status} [{PRIORITY_LEVELS[task.priority]}] {task.id}: {task.title} ({format_due(task)})\n"
+
+
+def write_pages(header: str, pages: Iterable[TaskPage],
+                more: Optional[Callable[[], bool]] = None) -> bool:
+    """
+    เขียนทีละหน้าลง stdout ด้วย write ครั้งเดียวต่อหน้า (header นำหน้าหน้าแรก)
+    
+    ถ้ามีหน้าถัดไปจะเรียก more() ก่อน คืน False ถ้า more() ขอให้หยุด
+    """
+    for page in pages:
+        sys.stdout.write(header + page.text)
+        header = ""
+        if page.has_more and more is not None:
+            sys.stdout.flush()
+            if not more():
+                return False
+    return True
+
+
+class AutoSaver:
+    """
+    บันทึกข้อมูลอัตโนมัติใน thread เบื้องหลัง
+    
+    รวมการแก้ไขที่เกิดติดกันเป็นการบันทึกครั้งเดียว: บันทึกเมื่อไม่มีการแก้ไขใหม่
+    เป็นเวลา delay วินาที แต่ไม่ช้ากว่า max_latency วินาทีนับจากการแก้ไขแรกที่ยังไม่ได้บันทึก
+    """
+    
+    def __init__(self, save: Callable[[], None], delay: float = 1.0, max_latency: float = 5.0):
+        self._save = save
+        self.delay = delay
+        self.max_latency = max_latency
+        self._condition = threading.Condition()
+        self._first_change: Optional[float] = None
+        self._last_change = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def notify(self) -> None:
+        """แจ้งว่ามีการแก้ไขข้อมูล"""
+        with self._condition:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._condition.notify()
+    
+    def _run(self) -> None:
+        with self._condition:
+            while True:
+                while self._first_change is None and not self._closed:
+                    self._condition.wait()
+                if self._first_change is None:
+                    return
+                deadline = min(self._last_change + self.delay,
+                               self._first_change + self.max_latency)
+                remaining = deadline - time.monotonic()
+                if remaining > 0 and not self._closed:
+                    self._condition.wait(remaining)
+                    continue
+                self._first_change = None
+                self._condition.release()
+                try:
+                    self._save()
+                finally:
+                    self._condition.acquire()
+                self._condition.notify_all()
+                if self._closed and self._first_change is None:
+                    return
+    
+    def flush(self) -> None:
+        """บันทึกการแก้ไขที่ค้างอยู่ทันที"""
+        with self._condition:
+            pending = self._first_change is not None
+            self._first_change = None
+        if pending:
+            self._save()
+    
+    def close(self) -> None:
+        """บันทึกการแก้ไขที่ค้างอยู่แล้วหยุด thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """ค่า percentile แบบ nearest-rank จากรายการที่เรียงแล้ว"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Metrics:
+    """
+    ตัวจับเวลาและตัวนับต่อการทำงาน (เปิดใช้ด้วย TASK_MANAGER_METRICS=1)
+    
+    instrument() ครอบ method ของ object นั้นโดยตรง object ที่ไม่ได้ครอบจึงไม่มี overhead
+    เวลาของแต่ละการทำงานเก็บไว้ล่าสุดไม่เกิน max_samples ครั้งสำหรับคำนวณ percentile
+    """
+    
+    QUANTILES = (0.5, 0.95, 0.99)
+    
+    def __init__(self, max_samples: int = 10000, output_path: Optional[str] = None):
+        self.max_samples = max_samples
+        # ไฟล์สำหรับเขียนผลรูปแบบ Prometheus เมื่อโปรแกรมจบ (ดู dump)
+        self.output_path = output_path
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = {}
+        self._seconds: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counters: Dict[str, int] = {}
+    
+    @classmethod
+    def from_env(cls) -> Optional["Metrics"]:
+        """สร้างจาก TASK_MANAGER_METRICS และ TASK_MANAGER_METRICS_FILE (None ถ้าไม่ได้เปิด)"""
+        if os.environ.get("TASK_MANAGER_METRICS", "") in ("", "0"):
+            return None
+        return cls(output_path=os.environ.get("TASK_MANAGER_METRICS_FILE") or None)
+    
+    def observe(self, name: str, seconds: float) -> None:
+        """บันทึกเวลาที่ใช้ของการทำงานหนึ่งครั้ง"""
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+                self._calls[name] = 0
+                self._seconds[name] = 0.0
+            samples.append(seconds)
+            self._calls[name] += 1
+            self._seconds[name] += seconds
+    
+    def increment(self, name: str, value: int = 1) -> None:
+        """เพิ่มค่าตัวนับ (เช่น bytes_written)"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def wrap(self, name: str, function: Callable) -> Callable:
+        """คืนฟังก์ชันที่จับเวลาทุกครั้งที่เรียก function"""
+        observe = self.observe
+        clock = time.perf_counter
+        
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(name, clock() - start)
+        return timed
+    
+    def instrument(self, obj, names: Iterable[str], prefix: str = ""):
+        """ครอบ method ตามชื่อใน names ของ obj (เฉพาะ instance นี้) ให้จับเวลา"""
+        for name in names:
+            setattr(obj, name, self.wrap(prefix + name.lstrip("_"), getattr(obj, name)))
+        return obj
+    
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
     
-    def to_dict(self) -> Dict:
-        """แปลง Task object เป็น dictionary"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'due_date': self.due_date,
-            'completed': self.completed,
-            'created_at': self.created_at
-        }
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """คืนจำนวนครั้ง เวลารวม และ p50/p95/p99 (วินาที) ของแต่ละการทำงาน"""
+        with self._lock:
+            snapshot = [(name, self._calls[name], self._seconds[name], sorted(samples))
+                        for name, samples in self._samples.items()]
+        result = {}
+        for name, calls, seconds, samples in sorted(snapshot):
+            result[name] = {'calls': calls, 'seconds': seconds}
+            for quantile in self.QUANTILES:
+                result[name][f"p{int(quantile * 100)}"] = percentile(samples, quantile)
+        return result
+    
+    def to_prometheus(self, prefix: str = "task_manager") -> str:
+        """แปลงผลเป็น Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_operation_seconds เวลาที่ใช้ต่อการทำงาน",
+            f"# TYPE {prefix}_operation_seconds summary",
+        ]
+        for name, result in self.summary().items():
+            for quantile in self.QUANTILES:
+                lines.append(f'{prefix}_operation_seconds{{operation="{name}",quantile="{quantile}"}} '
+                             f"{result[f'p{int(quantile * 100)}']:.9f}")
+            lines.append(f'{prefix}_operation_seconds_sum{{operation="{name}"}} {result["seconds"]:.9f}')
+            lines.append(f'{prefix}_operation_seconds_count{{operation="{name}"}} {result["calls"]}')
+        for name, value in sorted(self.counters().items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+    
+    def report(self) -> str:
+        """สรุปผลเป็นตารางสำหรับแสดงบนหน้าจอ"""
+        lines = ["📊 สถิติการทำงาน (เวลาเป็น ms)",
+                 f"   {'operation':<32} {'calls':>7} {'total':>10} {'p50':>8} {'p95':>8} {'p99':>8}"]
+        for name, result in self.summary().items():
+            lines.append(f"   {name:<32} {result['calls']:>7} {result['seconds'] * 1000:>10.2f} "
+                         f"{result['p50'] * 1000:>8.3f} {result['p95'] * 1000:>8.3f} "
+                         f"{result['p99'] * 1000:>8.3f}")
+        for name, value in sorted(self.counters().items()):
+            lines.append(f"   {name:<32} {value:>7}")
+        return "\n".join(lines) + "\n"
+    
+    def dump(self, stream: Optional[TextIO] = None) -> None:
+        """แสดงรายงาน (ค่าเริ่มต้นทาง stderr) และเขียนไฟล์ Prometheus ถ้ากำหนด output_path"""
+        (stream or sys.stderr).write(self.report())
+        if self.output_path:
+            text = self.to_prometheus()
+            atomic_write_file(self.output_path, lambda f: f.write(text))
+
+
+class ProfileSession:
+    """
+    เปิด cProfile และ/หรือ tracemalloc ตลอดการทำงาน แล้วแสดงรายงานเมื่อจบโปรแกรม
+    
+    เปิดด้วย TASK_MANAGER_PROFILE=cprofile,tracemalloc และบันทึกผล cProfile
+    สำหรับ pstats/snakeviz ได้ด้วย TASK_MANAGER_PROFILE_OUTPUT=task_manager.prof
+    """
+    
+    MODES = ("cprofile", "tracemalloc")
+    
+    def __init__(self, modes: Iterable[str], output_path: Optional[str] = None, limit: int = 25):
+        self.modes = set(modes)
+        unknown = self.modes - set(self.MODES)
+        if unknown:
+            raise ValueError(f"ไม่รู้จักโหมด profile: {', '.join(sorted(unknown))}")
+        self.output_path = output_path
+        self.limit = limit
+        self._profiler = None
     
     @classmethod
-    def from_dict(cls, data: Dict) -> 'Task':
-        """สร้าง Task object จาก dictionary"""
-        task = cls(data['title'], data['description'], data['due_date'])
-        task.id = data['id']
-        task.completed = data['completed']
-        task.created_at = data['created_at']
-        return task
+    def from_env(cls) -> Optional["ProfileSession"]:
+        """สร้างจาก TASK_MANAGER_PROFILE (None ถ้าไม่ได้เปิด)"""
+        modes = [mode.strip().lower()
+                 for mode in os.environ.get("TASK_MANAGER_PROFILE", "").split(",") if mode.strip()]
+        if not modes:
+            return None
+        return cls(modes, os.environ.get("TASK_MANAGER_PROFILE_OUTPUT") or None)
+    
+    def start(self) -> None:
+        # import เมื่อเปิดใช้เท่านั้น เพื่อไม่ให้โปรแกรมเริ่มช้าลง
+        if "tracemalloc" in self.modes:
+            import tracemalloc
+            tracemalloc.start()
+        if "cprofile" in self.modes:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+    
+    def stop(self, stream: Optional[TextIO] = None) -> None:
+        """หยุด profile และเขียนรายงาน (ค่าเริ่มต้นทาง stderr)"""
+        stream = stream or sys.stderr
+        if self._profiler is not None:
+            import pstats
+            self._profiler.disable()
+            if self.output_path:
+                self._profiler.dump_stats(self.output_path)
+            stream.write("\n⏱️ cProfile (เรียงตาม cumulative time)\n")
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(self.limit)
+            self._profiler = None
+        if "tracemalloc" in self.modes:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                stream.write(f"\n🧠 tracemalloc: ใช้อยู่ {current / 1024 / 1024:.2f} MiB "
+                             f"สูงสุด {peak / 1024 / 1024:.2f} MiB\n")
+                for stat in snapshot.statistics("lineno")[:self.limit]:
+                    stream.write(f"   {stat}\n")
 
 
 class TaskManager:
     """Class หลักสำหรับจัดการงานทั้งหมด"""
     
-    def __init__(self, data_file: str = "tasks.json"):
-        self.data_file = data_file
-        self.tasks: List[Task] = []
-        self.load_tasks()
+    # การทำงานที่จับเวลาเมื่อส่ง metrics มา (ดู Metrics.instrument)
+    INSTRUMENTED = (
+        "load_tasks", "save_tasks", "write_tasks", "add_task", "_validate_date", "mark_completed",
+        "delete_task", "add_many", "complete_many", "delete_many", "_find_task_by_id",
+        "find_tasks", "count_search_results", "search_tasks", "view_tasks", "stats",
+        "due_histogram", "overdue_tasks", "next_tasks", "pop_next",
+    )
+    
+    def __init__(self, data_file: str = "tasks.json", storage: Optional[TaskStorage] = None,
+                 background_load: bool = False, autosave_delay: Optional[float] = None,
+                 autosave_max_latency: float = 5.0, metrics: Optional[Metrics] = None):
+        self.storage = storage if storage is not None else JsonFileStorage(data_file)
+        self.data_file = self.storage.path
+        self.metrics = metrics
+        if metrics is not None:
+            # ครอบก่อนโหลดข้อมูล เพื่อให้จับเวลา load_tasks ด้วย
+            metrics.instrument(self, self.INSTRUMENTED)
+        # ป้องกันการแก้ไขข้อมูลพร้อมกับการบันทึกอัตโนมัติใน thread เบื้องหลัง
+        self._lock = threading.RLock()
+        # ID ของงานที่เปลี่ยนแปลงหลังการบันทึกครั้งล่าสุด
+        self._dirty_ids: Set[str] = set()
+        # storage ที่ค้นหาได้เอง (เช่น SQLite) ไม่ต้องเก็บงานและ index ในหน่วยความจำ
+        self._pushdown = self.storage.queryable
+        self._autosaver: Optional[AutoSaver] = None
+        if autosave_delay is not None and not self.storage.journaled:
+            self._autosaver = AutoSaver(lambda: self.save_tasks(verbose=False),
+                                        autosave_delay, autosave_max_latency)
+        # งานเรียงตามลำดับที่เพิ่ม ช่องที่ถูกลบจะเป็น None (tombstone) จนกว่าจะบีบอัด
+        self._slots: List[Optional[Task]] = []
+        # index จาก id ไปยังตำแหน่งใน _slots สำหรับค้นหาแบบ O(1)
+        self._positions: Dict[str, int] = {}
+        self._tombstones = 0
+        # inverted index สร้างเมื่อค้นหาด้วยคำสำคัญครั้งแรก เพื่อให้โหลดข้อมูลได้เร็ว
+        self._search_index: Optional[SearchIndex] = None
+        # index วันที่ครบกำหนดของงานทั้งหมด และเฉพาะงานที่ยังไม่เสร็จ
+        self._due_index = DueDateIndex()
+        self._pending_due_index = DueDateIndex()
+        # ตัวนับสถิติและ histogram วันที่ครบกำหนด อัปเดตทีละงาน
+        self._stats = TaskStats()
+        # ID ของงานที่ทำซ้ำ สำหรับขยายแต่ละครั้งในช่วงวันที่ที่ขอ
+        self._recurring: Set[str] = set()
+        # คิวงานที่ควรทำถัดไป (เลยกำหนด, ความสำคัญ, วันที่ครบกำหนด)
+        self._ready = ReadyQueue()
+        self._loader: Optional[threading.Thread] = None
+        if background_load:
+            # ให้ CLI แสดงเมนูได้ทันที งานที่ต้องใช้ข้อมูลจะรอจนโหลดเสร็จ
+            self._loader = threading.Thread(target=self.load_tasks, args=(False,), daemon=True)
+            self._loader.start()
+        else:
+            self.load_tasks()
+    
+    def _ensure_loaded(self) -> None:
+        """รอให้การโหลดข้อมูลเบื้องหลังเสร็จ (ถ้ามี)"""
+        loader = self._loader
+        if loader is not None and loader is not threading.current_thread():
+            loader.join()
+            self._loader = None
+    
+    def wait_until_loaded(self) -> None:
+        """รอจนโหลดข้อมูลงานเสร็จ"""
+        self._ensure_loaded()
+    
+    @property
+    def tasks(self) -> List[Task]:
+        """รายการงานทั้งหมดตามลำดับที่เพิ่ม"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return list(self.storage.iter_tasks())
+        if self._tombstones:
+            self._compact_slots()
+        return self._slots
+    
+    @tasks.setter
+    def tasks(self, tasks: List[Task]) -> None:
+        if self._pushdown:
+            self.storage.save(tasks)
+            return
+        self._slots = list(tasks)
+        self._tombstones = 0
+        self._rebuild_positions()
+        self._search_index = None
+        self._due_index.rebuild(self._slots)
+        self._pending_due_index.rebuild(task for task in self._slots if not task.completed)
+        self._stats.rebuild(self._slots)
+        self._recurring = {task.id for task in self._slots if task.recurrence is not None}
+        self._ready.rebuild(self._slots)
+    
+    def _get_search_index(self) -> SearchIndex:
+        """คืน inverted index (สร้างจากงานทั้งหมดถ้ายังไม่มี)"""
+        if self._search_index is None:
+            index = SearchIndex()
+            for task in self.tasks:
+                index.add(task)
+            self._search_index = index
+        return self._search_index
+    
+    def _insert_task(self, task: Task) -> None:
+        """เพิ่มงานต่อท้ายรายการและ index"""
+        if self._pushdown:
+            return
+        self._positions[task.id] = len(self._slots)
+        self._slots.append(task)
+        self._index_task(task)
+    
+    def _complete_task(self, task: Task) -> None:
+        """เปลี่ยนสถานะงานเป็นเสร็จสิ้นและปรับ index"""
+        if not self._pushdown:
+            self._pending_due_index.remove(task)
+            self._stats.complete(task)
+            self._ready.discard(task.id)
+        task.completed = True
+    
+    def _remove_task(self, task: Task) -> None:
+        """ลบงานออกโดยทิ้ง tombstone ไว้ (ยังไม่บีบอัดรายการ)"""
+        if self._pushdown:
+            return
+        position = self._positions.pop(task.id)
+        self._slots[position] = None
+        self._tombstones += 1
+        self._unindex_task(task)
+    
+    def _maybe_compact_slots(self) -> None:
+        """บีบอัดรายการเมื่อ tombstone มากกว่าครึ่งหนึ่ง (amortized O(1) ต่อการลบ)"""
+        if self._tombstones > len(self._slots) // 2:
+            self._compact_slots()
+    
+    def _index_task(self, task: Task) -> None:
+        """เพิ่มงานเข้า index ทั้งหมด"""
+        if self._search_index is not None:
+            self._search_index.add(task)
+        if task.recurrence is not None:
+            self._recurring.add(task.id)
+        self._index_due(task)
+    
+    def _unindex_task(self, task: Task) -> None:
+        """ลบงานออกจาก index ทั้งหมด"""
+        if self._search_index is not None:
+            self._search_index.remove(task)
+        self._recurring.discard(task.id)
+        self._unindex_due(task)
+    
+    def _index_due(self, task: Task) -> None:
+        """เพิ่มงานเข้า index วันที่ครบกำหนด คิวงานถัดไป และตัวนับสถิติ"""
+        self._stats.add(task)
+        self._due_index.add(task)
+        if not task.completed:
+            self._pending_due_index.add(task)
+            self._ready.add(task)
+    
+    def _unindex_due(self, task: Task) -> None:
+        """ลบงานออกจาก index วันที่ครบกำหนด คิวงานถัดไป และตัวนับสถิติ"""
+        self._stats.remove(task)
+        self._due_index.remove(task)
+        if not task.completed:
+            self._pending_due_index.remove(task)
+            self._ready.discard(task.id)
+    
+    def _complete_occurrence(self, task: Task, day: int) -> Optional[str]:
+        """
+        ทำครั้งที่ day ของงานที่ทำซ้ำให้เสร็จ คืนข้อความผิดพลาด (None ถ้าสำเร็จ)
+        
+        บันทึกเป็น exception ในกฎการทำซ้ำแทนการคัดลอกงาน แล้วย้ายงานใน index
+        ไปยังครั้งถัดไปที่ยังไม่เสร็จ
+        """
+        rule = task.recurrence
+        if rule is None:
+            return "ไม่ใช่งานที่ทำซ้ำ"
+        if not rule.occurs_on(day):
+            return f"งานไม่ได้ครบกำหนดวันที่ {date.fromordinal(day).isoformat()}"
+        if rule.is_done(day):
+            return f"ครั้งวันที่ {date.fromordinal(day).isoformat()} เสร็จสิ้นแล้ว"
+        if not self._pushdown:
+            self._unindex_due(task)
+        rule.mark_done(day)
+        task.refresh_due()
+        if not self._pushdown:
+            self._index_due(task)
+        return None
+    
+    def _rebuild_positions(self) -> None:
+        """สร้าง index id -> ตำแหน่งใหม่ทั้งหมด (ถ้า id ซ้ำ ใช้งานชิ้นแรก)"""
+        self._positions = {}
+        for position, task in enumerate(self._slots):
+            self._positions.setdefault(task.id, position)
     
-    def load_tasks(self) -> None:
-        """โหลดข้อมูลงานจากไฟล์ JSON"""
-        if os.path.exists(self.data_file):
+    def _compact_slots(self) -> None:
+        """ลบ tombstone ออกจากรายการงาน"""
+        self._slots = [task for task in self._slots if task is not None]
+        self._tombstones = 0
+        self._rebuild_positions()
+    
+    def load_tasks(self, verbose: bool = True) -> None:
+        """โหลดข้อมูลงานจาก storage"""
+        if self._pushdown:
+            if verbose:
+                print(f"เชื่อมต่อฐานข้อมูล {self.data_file} ({self.storage.count()} ชิ้น) เรียบร้อยแล้ว")
+            return
+        if self.storage.exists():
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.tasks = [Task.from_dict(task_data) for task_data in data]
-                print(f"โหลดข้อมูลงาน {len(self.tasks)} ชิ้นเรียบร้อยแล้ว")
-            except (json.JSONDecodeError, KeyError) as e:
+                self.tasks = self.storage.load()
+                if verbose:
+                    print(f"โหลดข้อมูลงาน {len(self._slots)} ชิ้นเรียบร้อยแล้ว")
+                if self.storage.skipped:
+                    print(f"⚠️  ข้ามข้อมูลที่ไม่ถูกต้อง {len(self.storage.skipped)} รายการ "
+                          f"(เก็บไว้ที่ {self.data_file}.quarantine.jsonl)")
+            except (ValueError, KeyError) as e:
+                # ValueError รวม json.JSONDecodeError และไฟล์ snapshot ที่ไม่สมบูรณ์
                 print(f"เกิดข้อผิดพลาดในการโหลดข้อมูล: {e}")
                 self.tasks = []
         else:
             print("ไม่พบไฟล์ข้อมูล เริ่มต้นด้วยรายการงานว่าง")
     
-    def save_tasks(self) -> None:
-        """บันทึกข้อมูลงานลงไฟล์ JSON"""
+    def save_tasks(self, verbose: bool = True) -> None:
+        """บันทึกข้อมูลงานทั้งหมดลง storage"""
+        self._ensure_loaded()
         try:
-            data = [task.to_dict() for task in self.tasks]
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print("บันทึกข้อมูลเรียบร้อยแล้ว")
+            with self._lock:
+                # storage แบบ query ได้ commit ทุกการเปลี่ยนแปลงไปแล้ว
+                self.finish_save(None if self._pushdown else self.write_tasks(self.tasks))
+            if verbose:
+                print("บันทึกข้อมูลเรียบร้อยแล้ว")
         except Exception as e:
             print(f"เกิดข้อผิดพลาดในการบันทึกข้อมูล: {e}")
     
-    def add_task(self, title: str, description: str, due_date: str) -> bool:
-        """เพิ่มงานใหม่"""
+    def write_tasks(self, tasks: List[Task]) -> Optional[List[Task]]:
+        """
+        เขียนรายการงาน tasks ลง storage โดยไม่แตะรายการงานและ index ในหน่วยความจำ
+        
+        ใช้แยกการเขียนดิสก์ไปทำใน thread อื่นได้ ตราบใดที่ไม่มีการแก้ไขงานระหว่างนั้น
+        คืนรายการงานที่รวมการเปลี่ยนแปลงจากโปรเซสอื่นแล้ว (หรือ None) ให้ส่งต่อ finish_save
+        """
+        merged = self.storage.save(tasks)
+        if self.metrics is not None:
+            self.metrics.increment("bytes_written", self.storage.last_write_bytes)
+        return merged
+    
+    def finish_save(self, merged: Optional[List[Task]]) -> None:
+        """ใช้ผลของ write_tasks กับรายการงานและ index แล้วล้างรายการงานที่เปลี่ยนแปลง"""
+        with self._lock:
+            if merged is not None:
+                # โปรเซสอื่นแก้ไขข้อมูลระหว่างนี้ ใช้ข้อมูลที่รวมแล้วแทน
+                self.tasks = merged
+                print(f"รวมการเปลี่ยนแปลงจากโปรแกรมอื่นแล้ว (ทั้งหมด {len(merged)} ชิ้น)")
+            self._dirty_ids.clear()
+    
+    @property
+    def dirty(self) -> bool:
+        """มีการเปลี่ยนแปลงที่ยังไม่ได้บันทึกหรือไม่"""
+        return bool(self._dirty_ids)
+    
+    def dirty_task_ids(self) -> Set[str]:
+        """คืน ID ของงานที่เปลี่ยนแปลงหลังการบันทึกครั้งล่าสุด"""
+        with self._lock:
+            return set(self._dirty_ids)
+    
+    def _mark_dirty(self, task: Task) -> None:
+        """จดว่างานเปลี่ยนแปลงและแจ้ง autosave (storage แบบ journal บันทึกไว้แล้ว)"""
+        if self.storage.journaled:
+            return
+        self._dirty_ids.add(task.id)
+        if self._autosaver is not None:
+            self._autosaver.notify()
+    
+    def commit(self) -> None:
+        """บันทึกหลังแก้ไขข้อมูล (ข้ามถ้า storage เป็น journal หรือเปิด autosave ไว้)"""
+        if not self.storage.journaled and self._autosaver is None:
+            self.save_tasks()
+    
+    def close(self) -> None:
+        """บันทึกการเปลี่ยนแปลงที่ค้างอยู่และปิด storage"""
+        if self._autosaver is not None:
+            self._autosaver.close()
+        self.storage.close()
+    
+    def add_task(self, title: str, description: str, due_date: str,
+                 recurrence: Optional[Dict] = None, priority=DEFAULT_PRIORITY) -> bool:
+        """
+        เพิ่มงานใหม่
+        
+        recurrence กำหนดการทำซ้ำ เช่น {'freq': 'weekly', 'interval': 2, 'until': '2024-12-31'}
+        โดย due_date คือครั้งแรก priority คือความสำคัญ (ดู parse_priority)
+        """
         if not title.strip():
             print("❌ ชื่องานไม่สามารถเป็นค่าว่างได้")
             return False
@@ -86,135 +2798,773 @@ class TaskManager:
             return False
         
         task = Task(title.strip(), description.strip(), due_date)
-        self.tasks.append(task)
+        try:
+            task.priority = parse_priority(priority)
+            if recurrence is not None:
+                task.set_recurrence(Recurrence.from_dict(recurrence, task.due_ordinal))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        
+        self._ensure_loaded()
+        with self._lock:
+            self._insert_task(task)
+            self.storage.append('add', task)
+            self._mark_dirty(task)
         print(f"✅ เพิ่มงานใหม่เรียบร้อยแล้ว (ID: {task.id})")
         return True
     
     def _validate_date(self, date_string: str) -> bool:
         """ตรวจสอบรูปแบบวันที่"""
-        try:
-            datetime.strptime(date_string, "%Y-%m-%d")
-            return True
-        except ValueError:
-            return False
+        return parse_due_date(date_string) is not None
+    
+    def iter_tasks(self, completed: Optional[bool] = None) -> Iterator[Task]:
+        """คืนงานตามลำดับที่เพิ่ม กรองเฉพาะงานที่เสร็จ/ยังไม่เสร็จได้"""
+        self._ensure_loaded()
+        if self._pushdown:
+            yield from self.storage.iter_tasks(completed)
+            return
+        for task in self.tasks:
+            if completed is None or task.completed == completed:
+                yield task
+    
+    def count_tasks(self, completed: Optional[bool] = None) -> int:
+        """นับจำนวนงาน (กรองตามสถานะได้) โดยไม่จัดรูปแบบหรือสร้างรายการ"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return self.storage.count(completed)
+        if completed is None:
+            return self._stats.total
+        return self._stats.completed if completed else self._stats.pending
+    
+    def task_pages(self, completed: bool = False, page_size: int = 0,
+                   cursor: int = 0) -> Iterator[TaskPage]:
+        """คืนรายการงานที่จัดรูปแบบแล้วทีละหน้า (ดู paginate)"""
+        if completed:
+            formatter = format_completed_task
+        else:
+            formatter = partial(format_pending_task, today=today_ordinal())
+        return paginate(self.iter_tasks(completed=completed), formatter, page_size, cursor)
     
-    def view_tasks(self, show_completed: bool = True) -> None:
-        """แสดงรายการงานทั้งหมด"""
-        if not self.tasks:
+    def search_pages(self, keyword: str = "", due_date: str = "", page_size: int = 0,
+                     cursor: int = 0) -> Iterator[TaskPage]:
+        """คืนผลการค้นหาที่จัดรูปแบบแล้วทีละหน้า (ดู paginate)"""
+        return paginate(self.iter_search_results(keyword, due_date),
+                        partial(format_search_result, today=today_ordinal()), page_size, cursor)
+    
+    def view_tasks(self, show_completed: bool = True, page_size: int = 0,
+                   more: Optional[Callable[[], bool]] = None) -> None:
+        """แสดงรายการงานทั้งหมด (page_size > 0 แสดงทีละหน้า และเรียก more() ก่อนหน้าถัดไป)"""
+        if not self.count_tasks():
             print("📝 ไม่มีงานในระบบ")
             return
         
-        pending_tasks = [task for task in self.tasks if not task.completed]
-        completed_tasks = [task for task in self.tasks if task.completed]
-        
-        print("\n" + "="*60)
-        print("📋 รายการงานทั้งหมด")
-        print("="*60)
-        
-        if pending_tasks:
-            print(f"\n🔄 งานรอดำเนินการ ({len(pending_tasks)} ชิ้น):")
-            print("-" * 40)
-            for task in pending_tasks:
-                status = "⏰" if self._is_overdue(task.due_date) else "📅"
-                print(f"{status} ID: {task.id}")
-                print(f"   📌 ชื่อ: {task.title}")
-                print(f"   📝 คำอธิบาย: {task.description}")
-                print(f"   📅 วันที่ครบกำหนด: {task.due_date}")
-                print(f"   🕒 สร้างเมื่อ: {task.created_at}")
-                print()
-        
-        if show_completed and completed_tasks:
-            print(f"\n✅ งานเสร็จสิ้น ({len(completed_tasks)} ชิ้น):")
-            print("-" * 40)
-            for task in completed_tasks:
-                print(f"✅ ID: {task.id}")
-                print(f"   📌 ชื่อ: {task.title}")
-                print(f"   📝 คำอธิบาย: {task.description}")
-                print(f"   📅 วันที่ครบกำหนด: {task.due_date}")
-                print()
+        sys.stdout.write("\n" + "="*60 + "\n📋 รายการงานทั้งหมด\n" + "="*60 + "\n")
+        
+        pending_count = self.count_tasks(completed=False)
+        if pending_count:
+            header = f"\n🔄 งานรอดำเนินการ ({pending_count} ชิ้น):\n" + "-" * 40 + "\n"
+            if not write_pages(header, self.task_pages(False, page_size), more):
+                return
+        
+        completed_count = self.count_tasks(completed=True) if show_completed else 0
+        if completed_count:
+            header = f"\n✅ งานเสร็จสิ้น ({completed_count} ชิ้น):\n" + "-" * 40 + "\n"
+            write_pages(header, self.task_pages(True, page_size), more)
     
     def _is_overdue(self, due_date: str) -> bool:
         """ตรวจสอบว่างานเลยกำหนดหรือไม่"""
-        try:
-            due = datetime.strptime(due_date, "%Y-%m-%d")
-            return due.date() < datetime.now().date()
-        except ValueError:
-            return False
+        due = parse_due_date(due_date)
+        return due is not None and due < today_ordinal()
     
     def mark_completed(self, task_id: str) -> bool:
         """ทำเครื่องหมายว่างานเสร็จสิ้น"""
-        task = self._find_task_by_id(task_id)
-        if not task:
-            print(f"❌ ไม่พบงาน ID: {task_id}")
-            return False
+        with self._lock:
+            task = self._find_task_by_id(task_id)
+            if not task:
+                print(f"❌ ไม่พบงาน ID: {task_id}")
+                return False
+            
+            if task.completed:
+                print(f"⚠️  งาน ID: {task_id} เสร็จสิ้นแล้ว")
+                return False
+            
+            if task.recurrence is not None:
+                # งานที่ทำซ้ำ: ทำครั้งถัดไปที่ยังไม่เสร็จ
+                next_due = date.fromordinal(task.due_ordinal).isoformat()
+                return self.complete_occurrence(task_id, next_due)
+            
+            self._complete_task(task)
+            self.storage.append('complete', task)
+            self._mark_dirty(task)
+            print(f"✅ ทำเครื่องหมายว่างาน '{task.title}' เสร็จสิ้นแล้ว")
+            return True
+    
+    def complete_occurrence(self, task_id: str, due_date: str) -> bool:
+        """ทำเครื่องหมายว่างานที่ทำซ้ำครั้งวันที่ due_date เสร็จสิ้น"""
+        with self._lock:
+            task = self._find_task_by_id(task_id)
+            if not task:
+                print(f"❌ ไม่พบงาน ID: {task_id}")
+                return False
+            day = parse_due_date(due_date)
+            if day is None:
+                print("❌ รูปแบบวันที่ไม่ถูกต้อง ใช้รูปแบบ YYYY-MM-DD")
+                return False
+            
+            error = self._complete_occurrence(task, day)
+            if error is not None:
+                print(f"❌ {error}")
+                return False
+            self.storage.append('update', task)
+            self._mark_dirty(task)
+            if task.completed:
+                print(f"✅ ทำเครื่องหมายว่างาน '{task.title}' ครั้งสุดท้าย ({due_date}) "
+                      "เสร็จสิ้นแล้ว")
+            else:
+                print(f"✅ ทำเครื่องหมายว่างาน '{task.title}' วันที่ {due_date} เสร็จสิ้นแล้ว "
+                      f"(ครั้งถัดไป: {date.fromordinal(task.due_ordinal).isoformat()})")
+            return True
+    
+    def set_priority(self, task_id: str, priority) -> bool:
+        """เปลี่ยนความสำคัญของงาน (ย้ายตำแหน่งในคิวงานถัดไปด้วย)"""
+        with self._lock:
+            task = self._find_task_by_id(task_id)
+            if not task:
+                print(f"❌ ไม่พบงาน ID: {task_id}")
+                return False
+            try:
+                priority = parse_priority(priority)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return False
+            
+            if not self._pushdown:
+                self._ready.discard(task.id)
+            task.priority = priority
+            if not self._pushdown:
+                self._ready.add(task)
+            self.storage.append('update', task)
+            self._mark_dirty(task)
+            print(f"✅ เปลี่ยนความสำคัญของงาน '{task.title}' เป็น{PRIORITY_LEVELS[priority]}แล้ว")
+            return True
+    
+    def delete_task(self, task_id: str) -> bool:
+        """ลบงาน"""
+        with self._lock:
+            task = self._find_task_by_id(task_id)
+            if not task:
+                print(f"❌ ไม่พบงาน ID: {task_id}")
+                return False
+            
+            self._remove_task(task)
+            self._maybe_compact_slots()
+            self.storage.append('delete', task)
+            self._mark_dirty(task)
+            print(f"🗑️  ลบงาน '{task.title}' เรียบร้อยแล้ว")
+            return True
+    
+    def _task_from_record(self, record: Dict, pending_ids: Set[str]) -> Task:
+        """ตรวจสอบและสร้าง Task จากข้อมูลนำเข้าหนึ่งรายการ (ValueError ถ้าไม่ถูกต้อง)"""
+        record = upgrade_record(record)
+        title = str(record.get('title') or '').strip()
+        if not title:
+            raise ValueError("ชื่องานไม่สามารถเป็นค่าว่างได้")
+        due_date = str(record.get('due_date') or '').strip()
+        if parse_due_date(due_date) is None:
+            raise ValueError(f"รูปแบบวันที่ไม่ถูกต้อง: {due_date!r}")
+        task = Task(title, str(record.get('description') or '').strip(), due_date)
+        task_id = record.get('id')
+        if task_id:
+            task_id = str(task_id)
+            if task_id in pending_ids or self._find_task_by_id(task_id) is not None:
+                raise ValueError(f"ID ซ้ำ: {task_id}")
+            task.id = task_id
+        if record.get('created_at'):
+            task.created_at = str(record['created_at'])
+        task.completed = parse_completed(record.get('completed', False))
+        task.priority = parse_priority(record.get('priority'))
+        if record.get('recurrence') is not None:
+            task.set_recurrence(Recurrence.from_dict(record['recurrence'], task.due_ordinal))
+        return task
+    
+    def add_many(self, records: Iterable[Dict]) -> List[BatchResult]:
+        """
+        เพิ่มงานหลายชิ้นในครั้งเดียว
         
-        if task.completed:
-            print(f"⚠️  งาน ID: {task_id} เสร็จสิ้นแล้ว")
-            return False
+        ตรวจสอบทุกรายการก่อน แล้วจึงเพิ่มเฉพาะรายการที่ถูกต้องเข้า index และ storage
+        พร้อมกัน ไม่ print ผลลัพธ์ แต่คืน BatchResult ของแต่ละรายการแทน
+        """
+        with self._lock:
+            self._ensure_loaded()
+            results: List[BatchResult] = []
+            tasks: List[Task] = []
+            new_ids: Set[str] = set()
+            for index, record in enumerate(records):
+                try:
+                    task = self._task_from_record(record, new_ids)
+                except (ValueError, TypeError, AttributeError) as e:
+                    results.append(BatchResult(index, False, None, str(e)))
+                    continue
+                new_ids.add(task.id)
+                tasks.append(task)
+                results.append(BatchResult(index, True, task.id, None))
+            for task in tasks:
+                self._insert_task(task)
+                self._mark_dirty(task)
+            self.storage.append_many('add', tasks)
+            return results
+    
+    def complete_many(self, task_ids: Iterable[str], due_date: str = "") -> List[BatchResult]:
+        """
+        ทำเครื่องหมายเสร็จสิ้นหลายงานในครั้งเดียว คืน BatchResult ของแต่ละ ID
         
-        task.completed = True
-        print(f"✅ ทำเครื่องหมายว่างาน '{task.title}' เสร็จสิ้นแล้ว")
+        งานที่ทำซ้ำทำครั้งถัดไปที่ยังไม่เสร็จ หรือครั้งวันที่ due_date ถ้าระบุ
+        """
+        day = parse_due_date(due_date) if due_date else None
+        with self._lock:
+            results: List[BatchResult] = []
+            tasks: List[Task] = []
+            updated: List[Task] = []
+            for index, task_id in enumerate(task_ids):
+                task = self._find_task_by_id(task_id)
+                if task is None:
+                    results.append(BatchResult(index, False, task_id, "ไม่พบงาน"))
+                elif due_date and day is None:
+                    results.append(BatchResult(index, False, task_id,
+                                               f"รูปแบบวันที่ไม่ถูกต้อง: {due_date!r}"))
+                elif task.completed:
+                    results.append(BatchResult(index, False, task_id, "งานเสร็จสิ้นแล้ว"))
+                elif task.recurrence is not None or day is not None:
+                    error = self._complete_occurrence(
+                        task, task.due_ordinal if day is None else day)
+                    if error is None:
+                        self._mark_dirty(task)
+                        updated.append(task)
+                    results.append(BatchResult(index, error is None, task_id, error))
+                else:
+                    self._complete_task(task)
+                    self._mark_dirty(task)
+                    tasks.append(task)
+                    results.append(BatchResult(index, True, task_id, None))
+            self.storage.append_many('complete', tasks)
+            self.storage.append_many('update', updated)
+            return results
+    
+    def delete_many(self, task_ids: Iterable[str]) -> List[BatchResult]:
+        """ลบหลายงานในครั้งเดียว (บีบอัดรายการครั้งเดียวตอนท้าย) คืน BatchResult ของแต่ละ ID"""
+        with self._lock:
+            results: List[BatchResult] = []
+            tasks: List[Task] = []
+            for index, task_id in enumerate(task_ids):
+                task = self._find_task_by_id(task_id)
+                if task is None:
+                    results.append(BatchResult(index, False, task_id, "ไม่พบงาน"))
+                    continue
+                self._remove_task(task)
+                self._mark_dirty(task)
+                tasks.append(task)
+                results.append(BatchResult(index, True, task_id, None))
+            self._maybe_compact_slots()
+            self.storage.append_many('delete', tasks)
+            return results
+    
+    def import_tasks(self, path: str) -> List[BatchResult]:
+        """นำเข้างานจากไฟล์ JSON, JSON lines หรือ CSV"""
+        return self.add_many(read_import_records(path))
+    
+    def _find_task_by_id(self, task_id: str) -> Optional[Task]:
+        """ค้นหางานตาม ID"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return self.storage.get(task_id)
+        position = self._positions.get(task_id)
+        if position is None:
+            return None
+        return self._slots[position]
+    
+    def iter_search_results(self, keyword: str = "", due_date: str = "") -> Iterator[Task]:
+        """คืนงานที่ตรงกับคำสำคัญหรือวันที่ ตามลำดับเดียวกับรายการงาน"""
+        self._ensure_loaded()
+        if self._pushdown:
+            yield from self.storage.search(keyword, due_date)
+            return
+        due = parse_due_date(due_date) if due_date else None
+        if keyword:
+            task_ids = sorted(self._get_search_index().iter_matches(keyword),
+                              key=self._positions.__getitem__)
+            tasks = (self._slots[self._positions[task_id]] for task_id in task_ids)
+        elif due is not None:
+            # งานที่ทำซ้ำอยู่ใน index ที่ครั้งถัดไปเท่านั้น จึงตรวจทุกงานที่ทำซ้ำเพิ่ม
+            task_ids = sorted(set(self._due_index.between(due, due)) | self._recurring,
+                              key=self._positions.__getitem__)
+            tasks = (self._slots[self._positions[task_id]] for task_id in task_ids)
+        else:
+            tasks = iter(self.tasks)
+        for task in tasks:
+            if not due_date or matches_due_date(task, due_date):
+                yield task
+    
+    def find_tasks(self, keyword: str = "", due_date: str = "") -> List[Task]:
+        """คืนรายการงานที่ตรงกับคำสำคัญหรือวันที่"""
+        return list(self.iter_search_results(keyword, due_date))
+    
+    def count_search_results(self, keyword: str = "", due_date: str = "") -> int:
+        """นับจำนวนงานที่ตรงกับเงื่อนไขโดยไม่สร้างรายการผลลัพธ์"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return self.storage.count_search(keyword, due_date)
+        if keyword:
+            task_ids = self._get_search_index().iter_matches(keyword)
+            if not due_date:
+                return sum(1 for _ in task_ids)
+            return sum(1 for task_id in task_ids
+                       if matches_due_date(self._slots[self._positions[task_id]], due_date))
+        return sum(1 for _ in self.iter_search_results(keyword, due_date))
+    
+    def _tasks_due(self, start: Optional[int], end: Optional[int],
+                   include_completed: bool) -> List[Task]:
+        """คืนงานที่ครบกำหนดในช่วง ordinal (None = ไม่จำกัด) เรียงตามวันที่"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return self.storage.due_between(start, end, include_completed)
+        index = self._due_index if include_completed else self._pending_due_index
+        return [self._slots[self._positions[task_id]] for task_id in index.between(start, end)]
+    
+    def tasks_due_between(self, start: str, end: str, include_completed: bool = False) -> List[Task]:
+        """คืนงานที่ครบกำหนดระหว่างวันที่ start ถึง end (YYYY-MM-DD) เรียงตามวันที่"""
+        start_ordinal = parse_due_date(start)
+        end_ordinal = parse_due_date(end)
+        if start_ordinal is None or end_ordinal is None:
+            raise ValueError("รูปแบบวันที่ไม่ถูกต้อง ใช้รูปแบบ YYYY-MM-DD")
+        return self._tasks_due(start_ordinal, end_ordinal, include_completed)
+    
+    def _recurring_tasks(self) -> List[Task]:
+        if self._pushdown:
+            return self.storage.recurring_tasks()
+        return [self._slots[self._positions[task_id]] for task_id in self._recurring]
+    
+    def occurrences_between(self, start: str, end: str,
+                            include_completed: bool = False) -> List[Occurrence]:
+        """
+        คืนงานแต่ละครั้งที่ครบกำหนดระหว่าง start ถึง end (YYYY-MM-DD) เรียงตามวันที่
+        
+        งานครั้งเดียวมาจาก index วันที่ ส่วนงานที่ทำซ้ำถูกขยายเฉพาะครั้งที่อยู่ในช่วง
+        (เวลาที่ใช้ขึ้นกับขนาดช่วง ไม่ขึ้นกับจำนวนครั้งทั้งหมดของกฎ)
+        """
+        start_ordinal = parse_due_date(start)
+        end_ordinal = parse_due_date(end)
+        if start_ordinal is None or end_ordinal is None:
+            raise ValueError("รูปแบบวันที่ไม่ถูกต้อง ใช้รูปแบบ YYYY-MM-DD")
+        occurrences = [
+            Occurrence(task, task.due_date, task.due_ordinal, task.completed)
+            for task in self._tasks_due(start_ordinal, end_ordinal, include_completed)
+            if task.recurrence is None
+        ]
+        for task in self._recurring_tasks():
+            rule = task.recurrence
+            for day in rule.occurrences(start_ordinal, end_ordinal):
+                done = rule.is_done(day)
+                if include_completed or not done:
+                    occurrences.append(
+                        Occurrence(task, date.fromordinal(day).isoformat(), day, done))
+        occurrences.sort(key=lambda occurrence: occurrence.due_ordinal)
+        return occurrences
+    
+    def next_tasks(self, k: int = 5) -> List[Task]:
+        """
+        คืนงานที่ยังไม่เสร็จ k งานที่ควรทำก่อน: งานเลยกำหนดก่อน แล้วตามความสำคัญและวันที่
+        
+        อ่านจากยอดของคิว (ดู ReadyQueue) โดยไม่เรียงงานทั้งหมด
+        """
+        self._ensure_loaded()
+        if self._pushdown:
+            return self.storage.next_tasks(k)
+        with self._lock:
+            return [self._slots[self._positions[task_id]] for task_id in self._ready.peek(k)]
+    
+    def pop_next(self) -> Optional[Task]:
+        """
+        ดึงงานที่ควรทำถัดไปออกจากคิวและทำเครื่องหมายว่าเสร็จสิ้น คืนงานนั้น (None ถ้าไม่มีงานเหลือ)
+        
+        งานที่ทำซ้ำเสร็จเฉพาะครั้งถัดไป แล้วกลับเข้าคิวตามวันที่ของครั้งต่อไป
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._pushdown:
+                tasks = self.storage.next_tasks(1)
+                task_id = tasks[0].id if tasks else None
+            else:
+                task_id = self._ready.pop()
+            if task_id is None:
+                print("📝 ไม่มีงานรอดำเนินการ")
+                return None
+            self.mark_completed(task_id)
+            return self._find_task_by_id(task_id)
+    
+    def tasks_due_within(self, days: int) -> List[Task]:
+        """คืนงานที่ยังไม่เสร็จและครบกำหนดภายใน days วันนับจากวันนี้"""
+        today = today_ordinal()
+        return self._tasks_due(today, today + days, False)
+    
+    def overdue_tasks(self) -> List[Task]:
+        """คืนงานที่เลยกำหนดทั้งหมด เรียงจากเลยกำหนดนานที่สุด"""
+        return self._tasks_due(None, today_ordinal() - 1, False)
+    
+    def count_overdue(self) -> int:
+        """นับจำนวนงานที่เลยกำหนด"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return self.storage.count_due_between(None, today_ordinal() - 1)
+        return self._stats.overdue
+    
+    def stats(self) -> Dict[str, int]:
+        """สรุปจำนวนงานทั้งหมด รอดำเนินการ เสร็จสิ้น และเลยกำหนด (O(1))"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return self.storage.summary()
+        with self._lock:
+            return self._stats.summary()
+    
+    def due_histogram(self, period: str = "day",
+                      include_completed: bool = False) -> List[Tuple[str, int]]:
+        """คืนจำนวนงานต่อวัน ("day") หรือต่อสัปดาห์ ("week") ตามวันที่ครบกำหนด"""
+        self._ensure_loaded()
+        if self._pushdown:
+            return due_histogram(self.storage.due_counts(include_completed), period)
+        with self._lock:
+            counts = self._stats.due_counts(include_completed)
+        return due_histogram(counts, period)
+    
+    def search_tasks(self, keyword: str = "", due_date: str = "", page_size: int = 0,
+                     more: Optional[Callable[[], bool]] = None) -> None:
+        """ค้นหางานตามคำสำคัญหรือวันที่ (page_size > 0 แสดงทีละหน้า)"""
+        count = self.count_search_results(keyword, due_date)
+        
+        if not count:
+            print("🔍 ไม่พบงานที่ตรงกับเงื่อนไขการค้นหา")
+            return
+        
+        header = f"\n🔍 ผลการค้นหา ({count} ชิ้น):\n" + "="*50 + "\n"
+        write_pages(header, self.search_pages(keyword, due_date, page_size), more)
+
+
+def _collect_records(kind: str, path: str, keyword: str, due_date: str,
+                     completed: Optional[bool]) -> List[Dict]:
+    """อ่าน record ที่ตรงเงื่อนไขของ shard หนึ่ง (รันใน process pool)"""
+    return list(query_records(kind, path, keyword, due_date, completed))
+
+
+def _collect_task_ids(kind: str, path: str) -> List[str]:
+    """อ่าน ID ของงานทั้งหมดใน shard หนึ่ง (รันใน process pool)"""
+    return [task.id for task in tasks_from_records(query_records(kind, path))]
+
+
+class ShardedTaskManager:
+    """
+    จัดการงานหลายไฟล์ในโฟลเดอร์เดียว โดยแต่ละไฟล์คือหนึ่ง shard (เช่น หนึ่งทีมหรือหนึ่งเดือน)
+    
+    การแก้ไขถูกส่งไปยัง TaskManager ของ shard ที่เป็นเจ้าของงาน ซึ่งโหลดเมื่อใช้ครั้งแรก
+    และบันทึกเฉพาะ shard ที่เปลี่ยนแปลง ส่วนการค้นหา แสดงรายการ และสถิติอ่าน shard
+    ที่ยังไม่ได้โหลดพร้อมกันใน process pool แล้วรวมผลเรียงตามเวลาที่สร้างงาน
+    """
+    
+    SHARD_BY = ("team", "month")
+    
+    def __init__(self, directory: str, storage_kind: str = "json", shard_by: str = "team",
+                 default_shard: str = "default", processes: Optional[int] = None,
+                 metrics: Optional[Metrics] = None):
+        if storage_kind not in STORAGE_KINDS:
+            raise ValueError(f"ไม่รู้จัก storage: {storage_kind}")
+        if shard_by not in self.SHARD_BY:
+            raise ValueError(f"ไม่รู้จักวิธีแบ่ง shard: {shard_by}")
+        self.directory = directory
+        self.storage_kind = storage_kind
+        self.shard_by = shard_by
+        self.default_shard = default_shard
+        # processes <= 1 อ่านทุก shard ใน process นี้ตามลำดับ (ไม่สร้าง pool)
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.metrics = metrics
+        self._extension = os.path.splitext(default_data_file(storage_kind))[1]
+        # TaskManager ของ shard ที่โหลดแล้ว ข้อมูลในหน่วยความจำถือเป็นข้อมูลล่าสุดของ shard นั้น
+        self._managers: Dict[str, TaskManager] = {}
+        # ID งาน -> ชื่อ shard สร้างเมื่อต้องหาเจ้าของงานครั้งแรก แล้วอัปเดตทีละงาน
+        self._owners: Optional[Dict[str, str]] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        os.makedirs(directory, exist_ok=True)
+    
+    def __enter__(self) -> 'ShardedTaskManager':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def shard_path(self, name: str) -> str:
+        """path ของไฟล์ข้อมูลของ shard"""
+        if not name or name.startswith(".") or os.sep in name or (os.altsep and os.altsep in name):
+            raise ValueError(f"ชื่อ shard ไม่ถูกต้อง: {name!r}")
+        return os.path.join(self.directory, name + self._extension)
+    
+    def shard_names(self) -> List[str]:
+        """ชื่อ shard ทั้งหมดที่มีไฟล์ในโฟลเดอร์หรือโหลดไว้แล้ว เรียงตามชื่อ"""
+        names = set(self._managers)
+        suffixes = [self._extension]
+        if self.storage_kind == "journal":
+            # shard แบบ journal ที่ยังไม่เคย compact มีแค่ไฟล์ log
+            suffixes.append(self._extension + ".log")
+        for filename in os.listdir(self.directory):
+            if filename.startswith("."):
+                continue
+            for suffix in suffixes:
+                if filename.endswith(suffix):
+                    names.add(filename[:-len(suffix)])
+                    break
+        return sorted(names)
+    
+    def shard_for(self, record: Dict) -> str:
+        """
+        เลือก shard ของงานใหม่: 'shard' ใน record, เดือนที่ครบกำหนด (YYYY-MM) หรือ default_shard
+        
+        ValueError ถ้าแบ่งตามเดือนแต่วันที่ไม่ถูกต้อง (ไม่สร้าง shard ให้งานที่เพิ่มไม่ได้)
+        """
+        shard = record.get('shard')
+        if shard:
+            return str(shard)
+        if self.shard_by == "month":
+            due_date = str(record.get('due_date') or '').strip()
+            if parse_due_date(due_date) is None:
+                raise ValueError(f"รูปแบบวันที่ไม่ถูกต้อง: {due_date!r}")
+            return due_date[:7]
+        return self.default_shard
+    
+    def manager(self, name: str) -> TaskManager:
+        """คืน TaskManager ของ shard (โหลดเมื่อใช้ครั้งแรก)"""
+        manager = self._managers.get(name)
+        if manager is None:
+            storage = create_storage(self.storage_kind, self.shard_path(name))
+            manager = TaskManager(storage=storage, metrics=self.metrics)
+            self._managers[name] = manager
+        return manager
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        return self._executor
+    
+    def _fan_out(self, function: Callable, shards: List[str], *args) -> List:
+        """เรียก function(storage_kind, path, *args) กับทุก shard คืนผลตามลำดับ shards"""
+        paths = [self.shard_path(name) for name in shards]
+        if self.processes <= 1 or len(paths) <= 1:
+            return [function(self.storage_kind, path, *args) for path in paths]
+        executor = self._get_executor()
+        futures = [executor.submit(function, self.storage_kind, path, *args) for path in paths]
+        return [future.result() for future in futures]
+    
+    def _unloaded_shards(self) -> List[str]:
+        return [name for name in self.shard_names() if name not in self._managers]
+    
+    def _owner_index(self) -> Dict[str, str]:
+        """คืน index ID -> shard (อ่าน ID ของ shard ที่ยังไม่โหลดพร้อมกันเมื่อใช้ครั้งแรก)"""
+        if self._owners is None:
+            owners: Dict[str, str] = {}
+            shards = self._unloaded_shards()
+            for name, task_ids in zip(shards, self._fan_out(_collect_task_ids, shards)):
+                for task_id in task_ids:
+                    owners.setdefault(task_id, name)
+            for name, manager in self._managers.items():
+                for task in manager.iter_tasks():
+                    owners.setdefault(task.id, name)
+            self._owners = owners
+        return self._owners
+    
+    def shard_of(self, task_id: str) -> Optional[str]:
+        """ชื่อ shard ที่เป็นเจ้าของงาน (None ถ้าไม่พบ)"""
+        return self._owner_index().get(task_id)
+    
+    def add_task(self, title: str, description: str, due_date: str,
+                 recurrence: Optional[Dict] = None, priority=DEFAULT_PRIORITY,
+                 shard: Optional[str] = None) -> bool:
+        """เพิ่มงานใหม่ลง shard ที่ระบุ (หรือ shard ที่เลือกจาก shard_for)"""
+        record = {'title': title, 'description': description, 'due_date': due_date,
+                  'priority': priority, 'shard': shard}
+        if recurrence is not None:
+            record['recurrence'] = recurrence
+        result = self.add_many([record])[0]
+        if not result.ok:
+            print(f"❌ {result.error}")
+            return False
+        print(f"✅ เพิ่มงานใหม่เรียบร้อยแล้ว (ID: {result.task_id}, shard: {self.shard_for(record)})")
         return True
     
+    def add_many(self, records: Iterable[Dict]) -> List[BatchResult]:
+        """เพิ่มงานหลายชิ้น โดยแยกตาม shard แล้วเพิ่มครั้งเดียวต่อ shard"""
+        results: List[Optional[BatchResult]] = []
+        groups: Dict[str, List[Tuple[int, Dict]]] = {}
+        new_ids: Set[str] = set()
+        for index, record in enumerate(records):
+            results.append(None)
+            task_id = record.get('id') if isinstance(record, dict) else None
+            if task_id:
+                # ID ต้องไม่ซ้ำข้าม shard ด้วย ไม่ใช่แค่ภายใน shard เดียว
+                task_id = str(task_id)
+                if task_id in new_ids or self.shard_of(task_id) is not None:
+                    results[index] = BatchResult(index, False, None, f"ID ซ้ำ: {task_id}")
+                    continue
+                new_ids.add(task_id)
+            try:
+                name = self.shard_for(record)
+                self.shard_path(name)
+            except (ValueError, AttributeError) as e:
+                results[index] = BatchResult(index, False, None, str(e))
+                continue
+            groups.setdefault(name, []).append((index, record))
+        for name, entries in groups.items():
+            batch = self.manager(name).add_many(record for _, record in entries)
+            for (index, _), result in zip(entries, batch):
+                results[index] = result._replace(index=index)
+                if result.ok and self._owners is not None:
+                    self._owners[result.task_id] = name
+        return results
+    
+    def mark_completed(self, task_id: str) -> bool:
+        """ทำเครื่องหมายว่างานเสร็จสิ้นใน shard ที่เป็นเจ้าของ"""
+        name = self.shard_of(task_id)
+        if name is None:
+            print(f"❌ ไม่พบงาน ID: {task_id}")
+            return False
+        return self.manager(name).mark_completed(task_id)
+    
     def delete_task(self, task_id: str) -> bool:
-        """ลบงาน"""
-        task = self._find_task_by_id(task_id)
-        if not task:
+        """ลบงานจาก shard ที่เป็นเจ้าของ"""
+        name = self.shard_of(task_id)
+        if name is None:
             print(f"❌ ไม่พบงาน ID: {task_id}")
             return False
-        
-        self.tasks.remove(task)
-        print(f"🗑️  ลบงาน '{task.title}' เรียบร้อยแล้ว")
+        if not self.manager(name).delete_task(task_id):
+            return False
+        self._owners.pop(task_id, None)
         return True
     
-    def _find_task_by_id(self, task_id: str) -> Optional[Task]:
-        """ค้นหางานตาม ID"""
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
-        return None
+    def _apply_many(self, task_ids: Iterable[str], apply: Callable) -> List[BatchResult]:
+        """แยก ID ตาม shard เจ้าของแล้วเรียก apply(manager, ids) ครั้งเดียวต่อ shard"""
+        results: List[Optional[BatchResult]] = []
+        groups: Dict[str, List[Tuple[int, str]]] = {}
+        for index, task_id in enumerate(task_ids):
+            name = self.shard_of(task_id)
+            if name is None:
+                results.append(BatchResult(index, False, task_id, "ไม่พบงาน"))
+                continue
+            results.append(None)
+            groups.setdefault(name, []).append((index, task_id))
+        for name, entries in groups.items():
+            batch = apply(self.manager(name), [task_id for _, task_id in entries])
+            for (index, _), result in zip(entries, batch):
+                results[index] = result._replace(index=index)
+        return results
     
-    def search_tasks(self, keyword: str = "", due_date: str = "") -> None:
-        """ค้นหางานตามคำสำคัญหรือวันที่"""
-        results = []
-        
-        for task in self.tasks:
-            match = True
-            
-            if keyword:
-                keyword_lower = keyword.lower()
-                if not (keyword_lower in task.title.lower() or 
-                       keyword_lower in task.description.lower()):
-                    match = False
-            
-            if due_date and match:
-                if task.due_date != due_date:
-                    match = False
-            
-            if match:
-                results.append(task)
+    def complete_many(self, task_ids: Iterable[str], due_date: str = "") -> List[BatchResult]:
+        """ทำเครื่องหมายเสร็จสิ้นหลายงาน (ดู TaskManager.complete_many)"""
+        return self._apply_many(task_ids,
+                                lambda manager, ids: manager.complete_many(ids, due_date))
+    
+    def delete_many(self, task_ids: Iterable[str]) -> List[BatchResult]:
+        """ลบหลายงาน (ดู TaskManager.delete_many)"""
+        results = self._apply_many(task_ids, lambda manager, ids: manager.delete_many(ids))
+        for result in results:
+            if result.ok:
+                self._owners.pop(result.task_id, None)
+        return results
+    
+    def _query(self, keyword: str, due_date: str, completed: Optional[bool]) -> List[Task]:
+        """อ่านงานที่ตรงเงื่อนไขจากทุก shard แล้วรวมผลเรียงตามเวลาที่สร้าง"""
+        shards = self._unloaded_shards()
+        found: Dict[str, Iterable[Task]] = {}
+        batches = self._fan_out(_collect_records, shards, keyword, due_date, completed)
+        for name, records in zip(shards, batches):
+            found[name] = tasks_from_records(records)
+        for name, manager in self._managers.items():
+            if keyword or due_date:
+                found[name] = (task for task in manager.iter_search_results(keyword, due_date)
+                               if completed is None or task.completed == completed)
+            else:
+                found[name] = manager.iter_tasks(completed)
+        tasks: List[Task] = []
+        for name in sorted(found):
+            tasks.extend(found[name])
+        # ผลของแต่ละ shard เรียงอยู่แล้ว Timsort จึงรวมเป็นการ merge ของช่วงที่เรียงแล้ว
+        # และเป็น stable sort งานที่สร้างพร้อมกันจึงเรียงตามชื่อ shard และลำดับใน shard
+        tasks.sort(key=lambda task: task.created_at)
+        return tasks
+    
+    def find_tasks(self, keyword: str = "", due_date: str = "") -> List[Task]:
+        """ค้นหางานตามคำสำคัญหรือวันที่จากทุก shard"""
+        return self._query(keyword, due_date, None)
+    
+    def list_tasks(self, completed: Optional[bool] = None) -> List[Task]:
+        """คืนงานจากทุก shard กรองเฉพาะงานที่เสร็จ/ยังไม่เสร็จได้"""
+        return self._query("", "", completed)
+    
+    def stats(self) -> Dict[str, int]:
+        """รวมสถิติของทุก shard (รูปแบบเดียวกับ TaskManager.stats)"""
+        totals = {'total': 0, 'pending': 0, 'completed': 0, 'overdue': 0}
+        summaries = self._fan_out(query_stats, self._unloaded_shards())
+        summaries.extend(manager.stats() for manager in self._managers.values())
+        for summary in summaries:
+            for key in totals:
+                totals[key] += summary[key]
+        return totals
+    
+    def search_tasks(self, keyword: str = "", due_date: str = "", page_size: int = 0,
+                     more: Optional[Callable[[], bool]] = None) -> None:
+        """ค้นหางานจากทุก shard และแสดงผล (page_size > 0 แสดงทีละหน้า)"""
+        tasks = self.find_tasks(keyword, due_date)
         
-        if not results:
+        if not tasks:
             print("🔍 ไม่พบงานที่ตรงกับเงื่อนไขการค้นหา")
             return
         
-        print(f"\n🔍 ผลการค้นหา ({len(results)} ชิ้น):")
-        print("="*50)
-        for task in results:
-            status = "✅" if task.completed else "🔄"
-            overdue = "⏰" if not task.completed and self._is_overdue(task.due_date) else ""
-            print(f"{status}{overdue} ID: {task.id}")
-            print(f"   📌 ชื่อ: {task.title}")
-            print(f"   📝 คำอธิบาย: {task.description}")
-            print(f"   📅 วันที่ครบกำหนด: {task.due_date}")
-            print()
+        header = f"\n🔍 ผลการค้นหา ({len(tasks)} ชิ้น):\n" + "="*50 + "\n"
+        pages = paginate(tasks, partial(format_search_result, today=today_ordinal()), page_size)
+        write_pages(header, pages, more)
+    
+    def dirty_shards(self) -> List[str]:
+        """ชื่อ shard ที่มีการเปลี่ยนแปลงที่ยังไม่ได้บันทึก"""
+        return [name for name, manager in self._managers.items() if manager.dirty]
+    
+    def commit(self) -> None:
+        """บันทึกเฉพาะ shard ที่เปลี่ยนแปลง (shard แบบ journal บันทึกทุกการเปลี่ยนแปลงแล้ว)"""
+        for name in self.dirty_shards():
+            self._managers[name].commit()
+    
+    def close(self) -> None:
+        """ปิด storage ของทุก shard ที่โหลดไว้และหยุด process pool"""
+        for manager in self._managers.values():
+            manager.close()
+        self._managers.clear()
+        self._owners = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
 
 class TaskManagerCLI:
     """Command-Line Interface สำหรับ Task Manager"""
     
-    def __init__(self):
-        self.task_manager = TaskManager()
+    # จำนวนงานที่แสดงต่อหน้าในเมนูดูงานและค้นหางาน
+    PAGE_SIZE = 20
+    # เมนูที่จับเวลาเมื่อส่ง metrics มา (รวมเวลารอผู้ใช้ป้อนข้อมูล)
+    INSTRUMENTED = (
+        "add_task_interactive", "mark_completed_interactive", "delete_task_interactive",
+        "search_tasks_interactive", "show_stats_interactive", "next_tasks_interactive",
+    )
+    # จำนวนงานที่แสดงในเมนูงานถัดไป
+    NEXT_COUNT = 5
+    
+    def __init__(self, task_manager: Optional[TaskManager] = None,
+                 metrics: Optional[Metrics] = None):
+        self.task_manager = task_manager if task_manager is not None else TaskManager()
+        if metrics is not None:
+            metrics.instrument(self, self.INSTRUMENTED, prefix="cli.")
     
     def display_menu(self) -> None:
         """แสดงเมนูหลัก"""
@@ -227,13 +3577,20 @@ class TaskManagerCLI:
         print("4. ลบงาน")
         print("5. ค้นหางาน")
         print("6. บันทึกข้อมูล")
-        print("7. ออกจากโปรแกรม")
+        print("7. สถิติงาน")
+        print("8. งานที่ควรทำถัดไป")
+        print("9. ออกจากโปรแกรม")
         print("="*50)
     
     def get_user_input(self, prompt: str) -> str:
         """รับข้อมูลจากผู้ใช้"""
         return input(f"{prompt}: ").strip()
     
+    def ask_next_page(self) -> bool:
+        """ถามผู้ใช้ว่าจะดูหน้าถัดไปหรือไม่"""
+        answer = self.get_user_input("\nกด Enter เพื่อดูหน้าถัดไป หรือพิมพ์ q เพื่อหยุด")
+        return answer.lower() != "q"
+    
     def add_task_interactive(self) -> None:
         """เพิ่มงานใหม่แบบโต้ตอบ"""
         print("\n📝 เพิ่มงานใหม่")
@@ -246,9 +3603,18 @@ class TaskManagerCLI:
         
         description = self.get_user_input("คำอธิบาย (ไม่บังคับ)")
         due_date = self.get_user_input("วันที่ครบกำหนด (YYYY-MM-DD)")
+        recurrence = None
+        freq = self.get_user_input("ทำซ้ำ daily/weekly/monthly (ไม่บังคับ)")
+        if freq:
+            recurrence = {
+                'freq': freq,
+                'interval': self.get_user_input("ทำซ้ำทุกกี่รอบ (ค่าเริ่มต้น 1)") or 1,
+                'until': self.get_user_input("สิ้นสุดวันที่ (YYYY-MM-DD) (ไม่บังคับ)"),
+            }
+        priority = self.get_user_input("ความสำคัญ 1=สูง 2=ปานกลาง 3=ต่ำ (ค่าเริ่มต้น 2)")
         
-        if self.task_manager.add_task(title, description, due_date):
-            self.task_manager.save_tasks()
+        if self.task_manager.add_task(title, description, due_date, recurrence, priority):
+            self.task_manager.commit()
     
     def mark_completed_interactive(self) -> None:
         """ทำเครื่องหมายว่างานเสร็จสิ้นแบบโต้ตอบ"""
@@ -256,32 +3622,35 @@ class TaskManagerCLI:
         print("-" * 40)
         
         # แสดงงานที่ยังไม่เสร็จ
-        pending_tasks = [task for task in self.task_manager.tasks if not task.completed]
+        pending_tasks = list(self.task_manager.iter_tasks(completed=False))
         if not pending_tasks:
             print("📝 ไม่มีงานรอดำเนินการ")
             return
         
         print("งานรอดำเนินการ:")
+        today = today_ordinal()
         for task in pending_tasks:
-            overdue = "⏰" if self.task_manager._is_overdue(task.due_date) else "📅"
-            print(f"  {overdue} {task.id}: {task.title}")
+            overdue = "⏰" if task.is_overdue(today) else "📅"
+            repeat = f" (🔁 ครั้งถัดไป {format_due(task)})" if task.recurrence else ""
+            print(f"  {overdue} {task.id}: {task.title}{repeat}")
         
         task_id = self.get_user_input("\nใส่ ID ของงานที่ต้องการทำเครื่องหมายเสร็จสิ้น")
         if self.task_manager.mark_completed(task_id):
-            self.task_manager.save_tasks()
+            self.task_manager.commit()
     
     def delete_task_interactive(self) -> None:
         """ลบงานแบบโต้ตอบ"""
         print("\n🗑️  ลบงาน")
         print("-" * 20)
         
-        if not self.task_manager.tasks:
+        tasks = list(self.task_manager.iter_tasks())
+        if not tasks:
             print("📝 ไม่มีงานในระบบ")
             return
         
         # แสดงงานทั้งหมด
         print("งานทั้งหมด:")
-        for task in self.task_manager.tasks:
+        for task in tasks:
             status = "✅" if task.completed else "🔄"
             print(f"  {status} {task.id}: {task.title}")
         
@@ -290,7 +3659,7 @@ class TaskManagerCLI:
         
         if confirm.lower() in ['y', 'yes']:
             if self.task_manager.delete_task(task_id):
-                self.task_manager.save_tasks()
+                self.task_manager.commit()
         else:
             print("❌ ยกเลิกการลบงาน")
     
@@ -302,7 +3671,46 @@ class TaskManagerCLI:
         keyword = self.get_user_input("คำสำคัญ (ไม่บังคับ)")
         due_date = self.get_user_input("วันที่ครบกำหนด (YYYY-MM-DD) (ไม่บังคับ)")
         
-        self.task_manager.search_tasks(keyword, due_date)
+        self.task_manager.search_tasks(keyword, due_date, self.PAGE_SIZE, self.ask_next_page)
+    
+    def show_stats_interactive(self) -> None:
+        """แสดงสรุปสถิติและจำนวนงานที่ยังไม่เสร็จต่อสัปดาห์"""
+        stats = self.task_manager.stats()
+        lines = [
+            "\n📊 สถิติงาน",
+            "-" * 40,
+            f"📋 งานทั้งหมด: {stats['total']} ชิ้น",
+            f"🔄 รอดำเนินการ: {stats['pending']} ชิ้น",
+            f"✅ เสร็จสิ้น: {stats['completed']} ชิ้น",
+            f"⏰ เลยกำหนด: {stats['overdue']} ชิ้น",
+        ]
+        histogram = self.task_manager.due_histogram("week")
+        if histogram:
+            lines.append("\n📅 งานรอดำเนินการแยกตามสัปดาห์ที่ครบกำหนด:")
+            widest = max(count for _, count in histogram)
+            for week, count in histogram:
+                bar = "█" * max(1, count * 30 // widest)
+                lines.append(f"   {week}  {bar} {count}")
+        sys.stdout.write("\n".join(lines) + "\n")
+    
+    def next_tasks_interactive(self) -> None:
+        """แสดงงานที่ควรทำถัดไป และทำงานแรกให้เสร็จได้ทันที"""
+        print("\n🎯 งานที่ควรทำถัดไป")
+        print("-" * 40)
+        
+        tasks = self.task_manager.next_tasks(self.NEXT_COUNT)
+        if not tasks:
+            print("📝 ไม่มีงานรอดำเนินการ")
+            return
+        
+        today = today_ordinal()
+        sys.stdout.write("".join(f"  {i}. {format_next_task(task, today)}"
+                                 for i, task in enumerate(tasks, 1)))
+        
+        answer = self.get_user_input("\nทำเครื่องหมายว่างานที่ 1 เสร็จสิ้น? (y/N)")
+        if answer.lower() in ['y', 'yes']:
+            if self.task_manager.pop_next() is not None:
+                self.task_manager.commit()
     
     def run(self) -> None:
         """เริ่มต้นโปรแกรม"""
@@ -310,12 +3718,12 @@ class TaskManagerCLI:
         
         while True:
             self.display_menu()
-            choice = self.get_user_input("เลือกตัวเลือก (1-7)")
+            choice = self.get_user_input("เลือกตัวเลือก (1-9)")
             
             if choice == "1":
                 self.add_task_interactive()
             elif choice == "2":
-                self.task_manager.view_tasks()
+                self.task_manager.view_tasks(page_size=self.PAGE_SIZE, more=self.ask_next_page)
             elif choice == "3":
                 self.mark_completed_interactive()
             elif choice == "4":
@@ -325,24 +3733,338 @@ class TaskManagerCLI:
             elif choice == "6":
                 self.task_manager.save_tasks()
             elif choice == "7":
+                self.show_stats_interactive()
+            elif choice == "8":
+                self.next_tasks_interactive()
+            elif choice == "9":
                 print("👋 ขอบคุณที่ใช้ Python Task Manager!")
                 break
             else:
-                print("❌ ตัวเลือกไม่ถูกต้อง กรุณาเลือก 1-7")
+                print("❌ ตัวเลือกไม่ถูกต้อง กรุณาเลือก 1-9")
             
             input("\nกด Enter เพื่อดำเนินการต่อ...")
 
 
-def main():
-    """ฟังก์ชันหลัก"""
+def build_arg_parser():
+    """สร้าง parser สำหรับโหมด command-line แบบไม่โต้ตอบ"""
+    import argparse  # import เฉพาะโหมดนี้ เพื่อให้โหมดโต้ตอบเริ่มเร็ว
+    
+    parser = argparse.ArgumentParser(
+        prog="task_manager.py",
+        description="Python Task Manager (ไม่ระบุคำสั่งเพื่อเข้าสู่โหมดโต้ตอบ)",
+    )
+    parser.add_argument("--file", default=None,
+                        help="ไฟล์ข้อมูลงาน (ค่าเริ่มต้น tasks.json หรือ tasks.db สำหรับ sqlite)")
+    parser.add_argument("--storage", default=os.environ.get("TASK_MANAGER_STORAGE", "json"),
+                        choices=STORAGE_KINDS, help="storage engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    add = commands.add_parser("add", help="เพิ่มงานใหม่")
+    add.add_argument("title")
+    add.add_argument("--description", default="")
+    add.add_argument("--due", required=True, help="วันที่ครบกำหนด (YYYY-MM-DD)")
+    add.add_argument("--repeat", choices=list(RECURRENCE_UNITS), help="ทำซ้ำทุกวัน/สัปดาห์/เดือน")
+    add.add_argument("--every", type=int, default=1, help="ทำซ้ำทุกกี่รอบ (ค่าเริ่มต้น 1)")
+    add.add_argument("--until", default="", help="วันสิ้นสุดการทำซ้ำ (YYYY-MM-DD)")
+    add.add_argument("--priority", default=None, help="ความสำคัญ 1-3 หรือ high/medium/low")
+    
+    done = commands.add_parser("done", help="ทำเครื่องหมายว่างานเสร็จสิ้น")
+    done.add_argument("ids", nargs="+")
+    done.add_argument("--on", default="", help="วันที่ของครั้งที่ทำเสร็จ (งานที่ทำซ้ำ)")
+    
+    rm = commands.add_parser("rm", help="ลบงาน")
+    rm.add_argument("ids", nargs="+")
+    
+    search = commands.add_parser("search", help="ค้นหางาน")
+    search.add_argument("keyword", nargs="?", default="")
+    search.add_argument("--due", default="", help="วันที่ครบกำหนด (YYYY-MM-DD)")
+    
+    listing = commands.add_parser("list", help="แสดงรายการงาน")
+    status = listing.add_mutually_exclusive_group()
+    status.add_argument("--pending", action="store_true", help="เฉพาะงานที่ยังไม่เสร็จ")
+    status.add_argument("--completed", action="store_true", help="เฉพาะงานที่เสร็จแล้ว")
+    
+    commands.add_parser("stats", help="สรุปจำนวนงาน")
+    
+    next_parser = commands.add_parser("next", help="งานที่ควรทำถัดไป (เลยกำหนด, ความสำคัญ, วันที่)")
+    next_parser.add_argument("-n", "--count", type=int, default=5, help="จำนวนงาน (ค่าเริ่มต้น 5)")
+    
+    agenda = commands.add_parser("agenda", help="งานแต่ละครั้งในช่วงวันที่ (ขยายงานที่ทำซ้ำ)")
+    agenda.add_argument("start", help="วันที่เริ่มต้น (YYYY-MM-DD)")
+    agenda.add_argument("end", help="วันที่สิ้นสุด (YYYY-MM-DD)")
+    agenda.add_argument("--all", action="store_true", help="รวมครั้งที่เสร็จแล้ว")
+    
+    import_parser = commands.add_parser("import", help="นำเข้างานจากไฟล์ JSON, JSON lines หรือ CSV")
+    import_parser.add_argument("paths", nargs="+")
+    
+    migrate = commands.add_parser("migrate", help="แปลงไฟล์ JSON เป็นฐานข้อมูล SQLite")
+    migrate.add_argument("source", help="ไฟล์ tasks.json ต้นทาง")
+    migrate.add_argument("target", help="ไฟล์ฐานข้อมูล SQLite ปลายทาง")
+    
+    pack = commands.add_parser("pack", help="แปลงไฟล์ JSON เป็น binary snapshot")
+    pack.add_argument("source", help="ไฟล์ tasks.json ต้นทาง")
+    pack.add_argument("target", help="ไฟล์ snapshot ปลายทาง")
+    
+    unpack = commands.add_parser("unpack", help="แปลง binary snapshot กลับเป็นไฟล์ JSON")
+    unpack.add_argument("source", help="ไฟล์ snapshot ต้นทาง")
+    unpack.add_argument("target", help="ไฟล์ JSON ปลายทาง")
+    return parser
+
+
+def _iter_stored_tasks(kind: str, path: str) -> Iterator[Task]:
+    """
+    อ่านงานสำหรับคำสั่งอ่านอย่างเดียว ผ่าน upgrade_record และ Task.from_dict แบบเดียวกับ
+    การโหลดของ TaskManager (ข้าม record ที่ไม่ถูกต้องแทนการหยุด)
+    
+    storage แบบ JSON อ่านแบบ streaming โดยไม่สร้าง index
+    storage แบบ journal ต้องเล่น log ซ้ำจึงโหลดผ่าน storage ตามปกติ
+    (storage แบบ SQLite และ snapshot อ่านเองใน query_records)
+    """
+    if kind == "json":
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            yield from tasks_from_records(iter_task_records(path))
+        return
+    storage = create_storage(kind, path)
+    if storage.exists():
+        yield from storage.load()
+
+
+def _write_json_array(records: Iterator[Dict]) -> None:
+    """เขียน JSON array ลง stdout ทีละรายการ (อ่านรายการแรกก่อน เพื่อให้ไฟล์ที่เปิดไม่ได้ไม่มีผลลัพธ์ค้าง)"""
+    write = sys.stdout.write
+    records = iter(records)
+    first = next(records, None)
+    write("[")
+    if first is not None:
+        write("\n" + json.dumps(first, ensure_ascii=False))
+        for record in records:
+            write(",\n" + json.dumps(record, ensure_ascii=False))
+    write("\n]\n")
+
+
+def _read_stats(tasks: Iterable[Task]) -> Dict:
+    today = today_ordinal()
+    total = completed = overdue = 0
+    for task in tasks:
+        total += 1
+        if task.completed:
+            completed += 1
+        elif task.due_ordinal is not None and task.due_ordinal < today:
+            overdue += 1
+    return {'total': total, 'pending': total - completed, 'completed': completed, 'overdue': overdue}
+
+
+def query_records(kind: str, path: str, keyword: str = "", due_date: str = "",
+                  completed: Optional[bool] = None) -> Iterator[Dict]:
+    """
+    คืน record ของงานที่ตรงกับคำสำคัญ วันที่ และสถานะ จากไฟล์ข้อมูลโดยตรง
+    
+    ไม่สร้าง TaskManager และ index: SQLite กรองด้วย SQL ผ่าน index,
+    binary snapshot อ่านบน mmap ส่วน JSON อ่านแบบ streaming ทุกแบบคืน record
+    ในรูปแบบ Task.to_dict และข้าม record ที่ TaskManager จะไม่โหลด
+    """
+    keyword_lower = keyword.lower()
+    if kind == "sqlite":
+        storage = SqliteStorage(path)
+        try:
+            if keyword or due_date:
+                tasks = (task for task in storage.search(keyword, due_date)
+                         if completed is None or task.completed == completed)
+            else:
+                tasks = storage.iter_tasks(completed)
+            for task in tasks:
+                yield task.to_dict()
+        finally:
+            storage.close()
+        return
+    if kind == "snapshot":
+        if not os.path.exists(path):
+            return
+        with SnapshotStore(path) as store:
+            for view in store:
+                if ((completed is None or view.completed == completed) and
+                        (not due_date or matches_due_date(view, due_date)) and
+                        (not keyword_lower or keyword_lower in view.title.lower() or
+                         keyword_lower in view.description.lower())):
+                    yield view.to_dict()
+        return
+    for task in _iter_stored_tasks(kind, path):
+        if ((completed is None or task.completed == completed) and
+                (not due_date or matches_due_date(task, due_date)) and
+                (not keyword_lower or keyword_lower in task.title.lower() or
+                 keyword_lower in task.description.lower())):
+            yield task.to_dict()
+
+
+def query_stats(kind: str, path: str) -> Dict[str, int]:
+    """สรุปจำนวนงานจากไฟล์ข้อมูลโดยตรง (รูปแบบเดียวกับ TaskManager.stats)"""
+    if kind == "sqlite":
+        storage = SqliteStorage(path)
+        try:
+            return storage.summary()
+        finally:
+            storage.close()
+    if kind == "snapshot":
+        if not os.path.exists(path):
+            return _read_stats(iter(()))
+        with SnapshotStore(path) as store:
+            total = len(store)
+            completed = store.count_completed()
+            overdue = sum(1 for _ in store.overdue_rows())
+        return {'total': total, 'pending': total - completed, 'completed': completed,
+                'overdue': overdue}
+    return _read_stats(_iter_stored_tasks(kind, path))
+
+
+def run_command(argv: List[str], metrics: Optional[Metrics] = None) -> int:
+    """
+    รันคำสั่งเดียวแบบไม่โต้ตอบ แสดงผลเป็น JSON ทาง stdout
+    
+    ข้อผิดพลาดของไฟล์หรือข้อมูล (เช่นไม่พบไฟล์ที่นำเข้า) แสดงเป็น
+    {"ok": false, "error": ...} ทาง stdout และคืน exit code 1 แทน traceback
+    """
+    args = build_arg_parser().parse_args(argv)
+    if args.file is None:
+        args.file = default_data_file(args.storage)
+    try:
+        return _run_command(args, metrics)
+    except BrokenPipeError:
+        # ผู้อ่าน stdout ปิดไปก่อน (เช่น | head) ทิ้งผลที่เหลือโดยไม่แสดงข้อผิดพลาด
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        print(json.dumps({'ok': False, 'error': str(e)}, ensure_ascii=False))
+        return 1
+
+
+def _run_command(args, metrics: Optional[Metrics]) -> int:
+    import contextlib
+    
+    if args.command == "migrate":
+        count = migrate_json_to_sqlite(args.source, args.target)
+        print(json.dumps({'ok': True, 'migrated': count}, ensure_ascii=False))
+        return 0
+    
+    if args.command == "pack":
+        count = import_json_snapshot(args.source, args.target)
+        print(json.dumps({'ok': True, 'tasks': count}, ensure_ascii=False))
+        return 0
+    
+    if args.command == "unpack":
+        count = export_snapshot_json(args.source, args.target)
+        print(json.dumps({'ok': True, 'tasks': count}, ensure_ascii=False))
+        return 0
+    
+    if args.command == "next":
+        with contextlib.redirect_stdout(sys.stderr):
+            task_manager = TaskManager(storage=create_storage(args.storage, args.file),
+                                       metrics=metrics)
+            try:
+                tasks = task_manager.next_tasks(args.count)
+            finally:
+                task_manager.close()
+        _write_json_array(task.to_dict() for task in tasks)
+        return 0
+    
+    if args.command == "agenda":
+        with contextlib.redirect_stdout(sys.stderr):
+            task_manager = TaskManager(storage=create_storage(args.storage, args.file),
+                                       metrics=metrics)
+            try:
+                occurrences = task_manager.occurrences_between(args.start, args.end, args.all)
+            finally:
+                task_manager.close()
+        _write_json_array({'id': occurrence.task.id, 'title': occurrence.task.title,
+                           'due_date': occurrence.due_date, 'completed': occurrence.completed,
+                           'recurring': occurrence.task.recurrence is not None}
+                          for occurrence in occurrences)
+        return 0
+    
+    # คำสั่งอ่านอย่างเดียวอ่านไฟล์โดยตรง ไม่ต้องโหลดงานทั้งหมดและสร้าง index
+    if args.command == "search":
+        _write_json_array(query_records(args.storage, args.file, args.keyword, args.due))
+        return 0
+    
+    if args.command == "list":
+        completed = True if args.completed else False if args.pending else None
+        _write_json_array(query_records(args.storage, args.file, completed=completed))
+        return 0
+    
+    if args.command == "stats":
+        print(json.dumps(query_stats(args.storage, args.file), ensure_ascii=False))
+        return 0
+    
+    # คำสั่งที่แก้ไขข้อมูล: ข้อความของ TaskManager ไปทาง stderr เพื่อให้ stdout เป็น JSON ล้วน
+    with contextlib.redirect_stdout(sys.stderr):
+        task_manager = TaskManager(storage=create_storage(args.storage, args.file), metrics=metrics)
+        try:
+            if args.command == "add":
+                record = {'title': args.title, 'description': args.description,
+                          'due_date': args.due}
+                if args.repeat:
+                    record['recurrence'] = {'freq': args.repeat, 'interval': args.every,
+                                            'until': args.until}
+                if args.priority is not None:
+                    record['priority'] = args.priority
+                results = task_manager.add_many([record])
+            elif args.command == "done":
+                results = task_manager.complete_many(args.ids, args.on)
+            elif args.command == "rm":
+                results = task_manager.delete_many(args.ids)
+            else:
+                results = []
+                for path in args.paths:
+                    results.extend(task_manager.import_tasks(path))
+            if any(result.ok for result in results):
+                task_manager.commit()
+        finally:
+            task_manager.close()
+    
+    print(json.dumps({
+        'ok': all(result.ok for result in results),
+        'results': [result._asdict() for result in results],
+    }, ensure_ascii=False))
+    return 0 if all(result.ok for result in results) else 1
+
+
+def run_interactive(metrics: Optional[Metrics] = None) -> None:
+    """เริ่มเมนูแบบโต้ตอบ"""
+    cli = None
     try:
-        cli = TaskManagerCLI()
+        storage_kind = os.environ.get("TASK_MANAGER_STORAGE", "json")
+        storage = create_storage(storage_kind)
+        cli = TaskManagerCLI(TaskManager(storage=storage, background_load=True,
+                                         autosave_delay=1.0, metrics=metrics), metrics)
         cli.run()
     except KeyboardInterrupt:
         print("\n\n👋 โปรแกรมถูกยกเลิกโดยผู้ใช้")
     except Exception as e:
         print(f"\n❌ เกิดข้อผิดพลาด: {e}")
+    finally:
+        if cli is not None:
+            # บันทึกการเปลี่ยนแปลงที่ autosave ยังไม่ได้บันทึกก่อนออกจากโปรแกรม
+            cli.task_manager.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """ฟังก์ชันหลัก"""
+    argv = sys.argv[1:] if argv is None else argv
+    # การวัดผลเปิดผ่าน environment variable เท่านั้น ปกติจึงไม่มี overhead
+    metrics = Metrics.from_env()
+    profile = ProfileSession.from_env()
+    if profile is not None:
+        profile.start()
+    try:
+        if argv:
+            return run_command(argv, metrics)
+        run_interactive(metrics)
+    finally:
+        if profile is not None:
+            profile.stop()
+        if metrics is not None:
+            metrics.dump()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
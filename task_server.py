@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+HTTP/JSON API Server for Python Task Manager
+เปิดให้บริการอื่นใช้งาน TaskManager ผ่าน HTTP บนเครื่อง (ใช้ asyncio ใน stdlib เท่านั้น)
+    
+    GET    /tasks?completed=true|false&cursor=0&limit=100   รายการงาน
+    GET    /tasks/search?q=...&due=YYYY-MM-DD&cursor&limit  ค้นหางาน
+    GET    /tasks/next?limit=5                              งานที่ควรทำถัดไป
+    GET    /tasks/<id>                                      ข้อมูลงานหนึ่งชิ้น
+    GET    /stats                                           สรุปจำนวนงาน
+    GET    /metrics                                         ตัววัดผลรูปแบบ Prometheus
+    POST   /tasks                                           เพิ่มงาน (object หรือ array)
+    POST   /tasks/<id>/complete                             ทำเครื่องหมายเสร็จสิ้น
+    DELETE /tasks/<id>                                      ลบงาน
+
+การอ่านทำใน event loop ได้ทันทีโดยไม่รอการเขียน ส่วนการแก้ไขทั้งหมดถูกส่งเข้าคิว
+ให้ writer task เดียวทำตามลำดับ โดยรวมคำขอที่เข้ามาพร้อมกันเป็น batch เดียว
+และบันทึกลงดิสก์ครั้งเดียวต่อ batch (group commit) ก่อนตอบกลับ รายการงานและ index
+ถูกแก้ไขใน event loop เท่านั้น thread ที่บันทึกลงดิสก์แค่อ่านงาน ผู้อ่านจึงไม่เห็น
+index ที่สร้างใหม่ไม่เสร็จ
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from task_manager import STORAGE_KINDS, BatchResult, Metrics, TaskManager, create_storage
+
+
+class HTTPError(Exception):
+    """ข้อผิดพลาดที่ตอบกลับเป็น HTTP status"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class TaskServer:
+    """HTTP server แบบ asyncio ที่ให้บริการ TaskManager หนึ่งตัว"""
+    
+    # ขนาด body สูงสุดที่รับ (byte)
+    MAX_BODY = 10 * 1024 * 1024
+    # จำนวนงานสูงสุดที่แสดงต่อหน้าในรายการและผลการค้นหา
+    MAX_LIMIT = 1000
+    
+    def __init__(self, task_manager: TaskManager, host: str = "127.0.0.1", port: int = 8765,
+                 max_batch: int = 1024):
+        self.task_manager = task_manager
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        # สถิติของ writer: จำนวนการแก้ไขและจำนวนครั้งที่บันทึกลงดิสก์
+        self.writes = 0
+        self.commits = 0
+        self._queue: Optional[asyncio.Queue] = None
+        # thread เดียวสำหรับบันทึกลงดิสก์ แยกจาก executor กลางที่อาจถูกใช้จนเต็ม
+        self._commit_executor: Optional[ThreadPoolExecutor] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+    
+    async def start(self) -> None:
+        """เริ่มรับการเชื่อมต่อและ writer task (port=0 ให้ระบบเลือก port ว่าง)"""
+        self._queue = asyncio.Queue()
+        self._commit_executor = ThreadPoolExecutor(max_workers=1)
+        self._writer_task = asyncio.create_task(self._writer())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+    
+    async def close(self) -> None:
+        """หยุดรับการเชื่อมต่อ บันทึกการแก้ไขที่ค้างในคิว แล้วหยุด writer"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._writer_task is not None:
+            await self._queue.join()
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+            self._commit_executor.shutdown()
+    
+    async def _submit(self, op: str, payload: list) -> List[BatchResult]:
+        """ส่งการแก้ไขเข้าคิวของ writer แล้วรอจนบันทึกลงดิสก์"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((op, payload, future))
+        return await future
+    
+    async def _writer(self) -> None:
+        """
+        writer task เดียวที่แก้ไขข้อมูล
+        
+        ดึงคำขอทั้งหมดที่รออยู่ในคิว (ไม่เกิน max_batch) รวมคำขอประเภทเดียวกันที่ติดกัน
+        เป็นการเรียก batch API ครั้งเดียว แล้วบันทึกลงดิสก์ครั้งเดียวใน thread แยก
+        เพื่อไม่ให้ event loop หยุดรอ I/O ถ้าไฟล์ถูกโปรเซสอื่นแก้ไข ผลที่รวมแล้ว
+        ถูกนำมาใช้กับ index ใน event loop หลังการเขียนเสร็จ
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                replies = self._apply(batch)
+                await self._commit(loop)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, _, future), results in zip(batch, replies):
+                    if not future.done():
+                        future.set_result(results)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _apply(self, batch: List[Tuple[str, list, asyncio.Future]]) -> List[List[BatchResult]]:
+        """ใช้การแก้ไขในหน่วยความจำ คืนผลลัพธ์แยกตามคำขอ"""
+        operations = {
+            'add': self.task_manager.add_many,
+            'complete': self.task_manager.complete_many,
+            'delete': self.task_manager.delete_many,
+        }
+        replies: List[List[BatchResult]] = []
+        start = 0
+        while start < len(batch):
+            op = batch[start][0]
+            end = start
+            while end < len(batch) and batch[end][0] == op:
+                end += 1
+            payloads = [payload for _, payload, _ in batch[start:end]]
+            results = operations[op]([item for payload in payloads for item in payload])
+            offset = 0
+            for payload in payloads:
+                replies.append([result._replace(index=result.index - offset)
+                                for result in results[offset:offset + len(payload)]])
+                offset += len(payload)
+            self.writes += end - start
+            start = end
+        return replies
+    
+    async def _commit(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        บันทึกทั้ง batch ลงดิสก์ (storage แบบ journal และ SQLite บันทึกแล้วตอน append)
+        
+        thread ของ executor ทำเฉพาะการเขียนไฟล์ ส่วนการบีบอัดรายการงาน (ใน
+        task_manager.tasks) และการสร้าง index ใหม่จากผลที่รวมแล้วทำใน event loop
+        """
+        manager = self.task_manager
+        if not manager.storage.journaled and not manager.storage.queryable:
+            merged = await loop.run_in_executor(self._commit_executor, manager.write_tasks,
+                                                manager.tasks)
+            manager.finish_save(merged)
+        self.commits += 1
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        """อ่านคำขอ HTTP/1.1 ทีละคำขอบนการเชื่อมต่อเดียว (รองรับ keep-alive)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get('content-length') or 0)
+                if length > self.MAX_BODY:
+                    status, payload = 413, {'error': "ข้อมูลมีขนาดใหญ่เกินไป"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.dispatch(method, target, body)
+                    keep_alive = (version == 'HTTP/1.1' and
+                                  headers.get('connection', '').lower() != 'close')
+                
+                if isinstance(payload, str):
+                    data = payload.encode('utf-8')
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                    content_type = "application/json; charset=utf-8"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, object]:
+        """ส่งคำขอไปยัง handler ตาม method และ path คืน (status, ข้อมูล JSON)"""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if parts == ['stats'] and method == 'GET':
+                return 200, self.task_manager.stats()
+            if parts == ['metrics'] and method == 'GET':
+                if self.task_manager.metrics is None:
+                    raise HTTPError(404, "ไม่ได้เปิดการวัดผล (ตั้งค่า TASK_MANAGER_METRICS=1)")
+                return 200, self.task_manager.metrics.to_prometheus()
+            if parts == ['tasks'] and method == 'GET':
+                return 200, self._list(query)
+            if parts == ['tasks', 'search'] and method == 'GET':
+                return 200, self._search(query)
+            if parts == ['tasks', 'next'] and method == 'GET':
+                return 200, self._next(query)
+            if parts == ['tasks'] and method == 'POST':
+                return await self._add(body)
+            if len(parts) == 2 and parts[0] == 'tasks' and method == 'GET':
+                task = self.task_manager._find_task_by_id(parts[1])
+                if task is None:
+                    raise HTTPError(404, f"ไม่พบงาน ID: {parts[1]}")
+                return 200, task.to_dict()
+            if len(parts) == 2 and parts[0] == 'tasks' and method == 'DELETE':
+                return await self._mutate_one('delete', parts[1])
+            if len(parts) == 3 and parts[0] == 'tasks' and parts[2] == 'complete' \
+                    and method == 'POST':
+                return await self._mutate_one('complete', parts[1])
+            if parts[:1] in (['tasks'], ['stats']):
+                raise HTTPError(405, f"ไม่รองรับ {method} {url.path}")
+            raise HTTPError(404, f"ไม่พบ {url.path}")
+        except HTTPError as e:
+            return e.status, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': str(e)}
+    
+    def _page(self, tasks, query: Dict[str, str]) -> Dict:
+        """ตัดผลลัพธ์เป็นหน้าตาม cursor และ limit"""
+        try:
+            cursor = max(0, int(query.get('cursor', 0)))
+            limit = min(self.MAX_LIMIT, max(1, int(query.get('limit', 100))))
+        except ValueError:
+            raise HTTPError(400, "cursor และ limit ต้องเป็นตัวเลข")
+        page = [task.to_dict() for task in islice(tasks, cursor, cursor + limit + 1)]
+        has_more = len(page) > limit
+        return {
+            'tasks': page[:limit],
+            'next_cursor': cursor + limit if has_more else None,
+        }
+    
+    def _list(self, query: Dict[str, str]) -> Dict:
+        completed = query.get('completed')
+        if completed is not None:
+            completed = completed.lower() in ('1', 'true', 'yes')
+        return self._page(self.task_manager.iter_tasks(completed=completed), query)
+    
+    def _search(self, query: Dict[str, str]) -> Dict:
+        tasks = self.task_manager.iter_search_results(query.get('q', ''), query.get('due', ''))
+        return self._page(tasks, query)
+    
+    def _next(self, query: Dict[str, str]) -> Dict:
+        try:
+            limit = min(self.MAX_LIMIT, max(1, int(query.get('limit', 5))))
+        except ValueError:
+            raise HTTPError(400, "limit ต้องเป็นตัวเลข")
+        return {'tasks': [task.to_dict() for task in self.task_manager.next_tasks(limit)]}
+    
+    async def _add(self, body: bytes) -> Tuple[int, Dict]:
+        try:
+            records = json.loads(body or b'null')
+        except ValueError:
+            raise HTTPError(400, "ข้อมูล JSON ไม่ถูกต้อง")
+        if isinstance(records, dict):
+            records = [records]
+        if not isinstance(records, list) or not records:
+            raise HTTPError(400, "ต้องส่งข้อมูลงานเป็น object หรือ array")
+        results = await self._submit('add', records)
+        ok = all(result.ok for result in results)
+        return (201 if ok else 400), {'ok': ok, 'results': [r._asdict() for r in results]}
+    
+    async def _mutate_one(self, op: str, task_id: str) -> Tuple[int, Dict]:
+        result = (await self._submit(op, [task_id]))[0]
+        if result.ok:
+            return 200, result._asdict()
+        status = 409 if op == 'complete' and self.task_manager._find_task_by_id(task_id) else 404
+        return status, result._asdict()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP/JSON API server for Python Task Manager")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--file", default=None, help="ไฟล์ข้อมูลงาน")
+    parser.add_argument("--storage", default=os.environ.get("TASK_MANAGER_STORAGE", "json"),
+                        choices=STORAGE_KINDS, help="storage engine")
+    args = parser.parse_args(argv)
+    
+    task_manager = TaskManager(storage=create_storage(args.storage, args.file),
+                               metrics=Metrics.from_env())
+    server = TaskServer(task_manager, args.host, args.port)
+    print(f"🌐 เริ่ม server ที่ http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 หยุด server แล้ว", file=sys.stderr)
+    finally:
+        task_manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
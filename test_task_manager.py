@@ -4,10 +4,27 @@ Test script for Python Task Manager
 ทดสอบฟังก์ชันการทำงานของ Task Manager
 """
 
+import asyncio
 import os
 import tempfile
+import io
+import threading
 import json
-from task_manager import Task, TaskManager
+import multiprocessing
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import date, timedelta
+from task_manager import (RECORD_VERSION, DueDateIndex, ReadyQueue, Recurrence,
+                          ShardedTaskManager, Task, TaskManager, JournalStorage, Metrics,
+                          ProfileSession, SnapshotStorage, SnapshotStore, SqliteStorage,
+                          TaskStorage, TaskStore, create_storage, format_completed_task,
+                          iter_task_records, main, paginate, tasks_from_records, upgrade_record,
+                          write_snapshot)
+from task_server import TaskServer
+import benchmark_task_manager
 
 
 def test_task_creation():
@@ -94,8 +111,9 @@ def test_task_manager():
         
     finally:
         # ลบไฟล์ชั่วคราว
-        if os.path.exists(temp_file):
-            os.unlink(temp_file)
+        for path in (temp_file, temp_file + ".lock"):
+            if os.path.exists(path):
+                os.unlink(path)
 
 
 def test_validation():
@@ -154,6 +172,1238 @@ def test_search_functionality():
             os.unlink(temp_file)
 
 
+def test_journal_storage():
+    """ทดสอบ storage แบบ append-only log"""
+    print("🧪 Testing Journal Storage...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        tm = TaskManager(storage=JournalStorage(data_file, compact_every=3))
+        tm.add_task("Task 1", "Description 1", "2024-01-15")
+        tm.add_task("Task 2", "Description 2", "2024-01-20")
+        tm.mark_completed(tm.tasks[0].id)
+        tm.add_task("Task 3", "Description 3", "2024-01-25")
+        tm.delete_task(tm.tasks[1].id)
+        tm.close()
+        
+        # การเปลี่ยนแปลงต้องอยู่ครบโดยไม่ต้องเรียก save_tasks
+        tm2 = TaskManager(storage=JournalStorage(data_file))
+        assert [task.title for task in tm2.tasks] == ["Task 1", "Task 3"]
+        assert tm2.tasks[0].completed == True
+        
+        # หลัง compaction snapshot ต้องเปิดด้วย TaskManager แบบ JSON ได้
+        tm2.save_tasks()
+        tm2.close()
+        assert not os.path.exists(data_file + ".log")
+        tm3 = TaskManager(data_file)
+        assert len(tm3.tasks) == 2
+        
+        # storage ที่ไม่ได้ implement save สร้างไม่ได้ และ skipped แยกกันในแต่ละ storage
+        class LoadOnlyStorage(TaskStorage):
+            def load(self):
+                return []
+        try:
+            LoadOnlyStorage(data_file)
+            assert False, "ควรเกิด TypeError"
+        except TypeError:
+            pass
+        first, second = JournalStorage(data_file), JournalStorage(data_file)
+        first.skipped.append("รายการที่ 0: ทดสอบ")
+        assert second.skipped == []
+        
+        # save ต้องไม่ทับการแก้ไขความสำคัญที่โปรเซสอื่นเขียนลง log
+        writer = TaskManager(storage=JournalStorage(data_file))
+        reader = TaskManager(storage=JournalStorage(data_file))
+        writer.set_priority(writer.tasks[0].id, "high")
+        writer.close()
+        reader.save_tasks()
+        assert reader.tasks[0].priority == writer.tasks[0].priority
+        reader.close()
+        assert TaskManager(storage=JournalStorage(data_file)).tasks[0].priority == writer.tasks[0].priority
+        
+        print("✅ Journal storage test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_task_index():
+    """ทดสอบ index สำหรับค้นหางานตาม ID และลำดับงานหลังลบ"""
+    print("🧪 Testing Task Index...")
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+        temp_file = f.name
+    
+    try:
+        tm = TaskManager(temp_file)
+        for i in range(10):
+            tm.add_task(f"Task {i}", "", "2024-01-15")
+        ids = [task.id for task in tm.tasks]
+        
+        # ลบงานลำดับคี่ทั้งหมด ลำดับของงานที่เหลือต้องไม่เปลี่ยน
+        for task_id in ids[1::2]:
+            assert tm.delete_task(task_id) == True
+            assert tm._find_task_by_id(task_id) is None
+        assert [task.id for task in tm.tasks] == ids[0::2]
+        for task_id in ids[0::2]:
+            assert tm._find_task_by_id(task_id).id == task_id
+        
+        # ลบซ้ำต้องไม่สำเร็จ
+        assert tm.delete_task(ids[1]) == False
+        
+        print("✅ Task index test passed!")
+        
+    finally:
+        if os.path.exists(temp_file):
+            os.unlink(temp_file)
+
+
+def test_search_index():
+    """ทดสอบการค้นหาผ่าน inverted index ทั้งภาษาไทยและภาษาอังกฤษ"""
+    print("🧪 Testing Search Index...")
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+        temp_file = f.name
+    
+    try:
+        tm = TaskManager(temp_file)
+        tm.add_task("ประชุมทีมพัฒนา", "ประชุมรายสัปดาห์", "2024-01-15")
+        tm.add_task("Python Task", "Learn Python programming", "2024-01-20")
+        tm.add_task("ส่งรายงาน", "รายงานประจำเดือน", "2024-01-20")
+        tm.add_task("Meeting", "ประชุมกับลูกค้า", "2024-01-25")
+        
+        # ค้นหาคำไทยที่อยู่กลางข้อความ (ไม่มีช่องว่างคั่น)
+        assert [t.title for t in tm.find_tasks("ประชุม")] == ["ประชุมทีมพัฒนา", "Meeting"]
+        assert [t.title for t in tm.find_tasks("สัปดา")] == ["ประชุมทีมพัฒนา"]
+        
+        # ไม่สนตัวพิมพ์เล็กใหญ่ และคำสั้นกว่า n-gram ยังค้นหาได้
+        assert len(tm.find_tasks("PYTHON")) == 1
+        assert len(tm.find_tasks("y")) == 1
+        
+        # ค้นหาร่วมกับวันที่และนับผลลัพธ์
+        assert tm.count_search_results("รายงาน") == 1
+        assert tm.count_search_results(due_date="2024-01-20") == 2
+        assert tm.count_search_results("ประชุม", "2024-01-25") == 1
+        
+        # งานที่ลบแล้วต้องไม่อยู่ในผลการค้นหา
+        tm.delete_task(tm.find_tasks("Meeting")[0].id)
+        assert tm.count_search_results("ประชุม") == 1
+        assert tm.find_tasks("ไม่มีคำนี้") == []
+        
+        print("✅ Search index test passed!")
+        
+    finally:
+        if os.path.exists(temp_file):
+            os.unlink(temp_file)
+
+
+def test_due_date_index():
+    """ทดสอบ index วันที่ครบกำหนดและการค้นหาช่วงวันที่"""
+    print("🧪 Testing Due Date Index...")
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+        temp_file = f.name
+    
+    try:
+        tm = TaskManager(temp_file)
+        today = date.today()
+        for offset in (-3, -1, 0, 2, 10):
+            due = (today + timedelta(days=offset)).isoformat()
+            tm.add_task(f"Task {offset}", "", due)
+        
+        assert [t.title for t in tm.overdue_tasks()] == ["Task -3", "Task -1"]
+        assert tm.count_overdue() == 2
+        assert [t.title for t in tm.tasks_due_within(3)] == ["Task 0", "Task 2"]
+        
+        start = (today - timedelta(days=1)).isoformat()
+        end = (today + timedelta(days=2)).isoformat()
+        assert [t.title for t in tm.tasks_due_between(start, end)] == ["Task -1", "Task 0", "Task 2"]
+        
+        # งานที่เสร็จแล้วไม่นับเป็นงานเลยกำหนด
+        overdue_task = tm.overdue_tasks()[0]
+        tm.mark_completed(overdue_task.id)
+        assert overdue_task.is_overdue() == False
+        assert tm.count_overdue() == 1
+        assert len(tm.tasks_due_between(start, end, include_completed=True)) == 3
+        
+        # ค้นหาตามวันที่ใช้ index และยังเทียบแบบตรงตัวอักษร
+        assert len(tm.find_tasks(due_date=today.isoformat())) == 1
+        
+        # งานหลายงานในวันเดียวกันเรียงตาม ID และวันที่ว่างถูกลบออกจาก index
+        index = DueDateIndex()
+        tasks = [Task(f"Same day {i}", "", "2024-01-15") for i in range(3)]
+        later = Task("Later", "", "2024-02-01")
+        for task in tasks + [later]:
+            index.add(task)
+        assert list(index.between()) == sorted(task.id for task in tasks) + [later.id]
+        assert index.count_between(tasks[0].due_ordinal, later.due_ordinal - 1) == 3
+        for task in tasks:
+            index.remove(task)
+        index.remove(tasks[0])
+        assert len(index) == 1 and list(index.between()) == [later.id]
+        
+        print("✅ Due date index test passed!")
+        
+    finally:
+        if os.path.exists(temp_file):
+            os.unlink(temp_file)
+
+
+def test_task_store():
+    """ทดสอบ Task แบบ __slots__ และ TaskStore แบบ columnar"""
+    print("🧪 Testing Task Store...")
+    
+    task = Task("Test Task", "Description", "2024-01-15")
+    assert not hasattr(task, '__dict__')
+    task.created_at = "2024-01-10 09:00:00"
+    assert task.created_at == "2024-01-10 09:00:00"
+    
+    tasks = [
+        Task.from_dict({'id': 'demo001', 'title': 'ประชุมทีม', 'description': 'รายสัปดาห์',
+                        'due_date': '2024-01-15', 'completed': False,
+                        'created_at': '2024-01-10 09:00:00'}),
+        Task.from_dict({'id': 'demo002', 'title': 'ส่งรายงาน', 'description': '',
+                        'due_date': '2024-1-20', 'completed': True,
+                        'created_at': 'yesterday'}),
+    ]
+    store = TaskStore.from_tasks(tasks)
+    assert len(store) == 2
+    
+    # ข้อมูลที่อ่านผ่าน TaskView ต้องตรงกับ Task เดิมทุก field
+    for original, view in zip(tasks, store):
+        assert view.to_dict() == original.to_dict()
+    
+    view = store.find('demo002')
+    assert view.title == 'ส่งรายงาน'
+    assert view.completed == True
+    view.completed = False
+    assert store[1].completed == False
+    assert store.find('missing') is None
+    
+    assert list(store.overdue_rows(today=tasks[1].due_ordinal + 1)) == [0, 1]
+    assert store.to_tasks()[0].to_dict() == tasks[0].to_dict()
+    
+    print("✅ Task store test passed!")
+
+
+def test_streaming_load():
+    """ทดสอบการโหลดข้อมูลแบบ streaming ทั้ง JSON array และ JSON lines"""
+    print("🧪 Testing Streaming Load...")
+    
+    records = [Task(f"งาน {i}", "รายละเอียด " * i, "2024-01-15").to_dict() for i in range(50)]
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+        array_file = f.name
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        lines_file = f.name
+    
+    try:
+        # chunk เล็กมากเพื่อให้แต่ละรายการคร่อมหลาย chunk
+        assert list(iter_task_records(array_file, chunk_size=7)) == records
+        assert list(iter_task_records(lines_file, chunk_size=7)) == records
+        
+        # ข้อมูลที่ต่อท้ายหลังปิด array ต้องถูกปฏิเสธเช่นเดียวกับ json.load
+        with open(array_file, 'a', encoding='utf-8') as f:
+            f.write('\n  {"title": "ส่วนเกิน"}\n')
+        try:
+            list(iter_task_records(array_file, chunk_size=7))
+            assert False, "ควรเกิด ValueError"
+        except ValueError:
+            pass
+        
+        tm = TaskManager(lines_file, background_load=True)
+        assert len(tm.tasks) == 50
+        assert tm._find_task_by_id(records[10]['id']).title == "งาน 10"
+        
+        print("✅ Streaming load test passed!")
+        
+    finally:
+        os.unlink(array_file)
+        os.unlink(lines_file)
+
+
+def test_batch_operations():
+    """ทดสอบการเพิ่ม ทำเครื่องหมายเสร็จสิ้น และลบงานแบบ batch"""
+    print("🧪 Testing Batch Operations...")
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+        temp_file = f.name
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8') as f:
+        f.write("title,description,due_date,completed\n")
+        f.write("ประชุมทีม,รายสัปดาห์,2024-01-15,false\n")
+        f.write(",ไม่มีชื่อ,2024-01-16,false\n")
+        f.write("ส่งรายงาน,,2024-01-20,true\n")
+        csv_file = f.name
+    
+    try:
+        tm = TaskManager(temp_file)
+        results = tm.add_many([
+            {'title': 'Task 1', 'description': 'Description 1', 'due_date': '2024-01-15'},
+            {'title': 'Task 2', 'due_date': 'invalid-date'},
+            {'id': 'fixed01', 'title': 'Task 3', 'due_date': '2024-01-25'},
+            {'id': 'fixed01', 'title': 'Duplicate', 'due_date': '2024-01-25'},
+        ])
+        assert [result.ok for result in results] == [True, False, True, False]
+        assert results[2].task_id == 'fixed01'
+        assert len(tm.tasks) == 2
+        
+        results = tm.complete_many(['fixed01', 'missing', 'fixed01'])
+        assert [result.ok for result in results] == [True, False, False]
+        assert tm._find_task_by_id('fixed01').completed == True
+        
+        results = tm.import_tasks(csv_file)
+        assert [result.ok for result in results] == [True, False, True]
+        assert tm.find_tasks("ส่งรายงาน")[0].completed == True
+        assert len(tm.tasks) == 4
+        
+        results = tm.delete_many([task.id for task in tm.tasks[:3]] + ['missing'])
+        assert [result.ok for result in results] == [True, True, True, False]
+        assert [task.title for task in tm.tasks] == ["ส่งรายงาน"]
+        
+        print("✅ Batch operations test passed!")
+        
+    finally:
+        os.unlink(temp_file)
+        os.unlink(csv_file)
+
+
+def run_cli(*argv):
+    """รันคำสั่งแบบไม่โต้ตอบ คืน (exit code, ผลลัพธ์ JSON)"""
+    stdout = io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+        code = main(list(argv))
+    return code, json.loads(stdout.getvalue())
+
+
+def test_command_line():
+    """ทดสอบโหมด command-line แบบไม่โต้ตอบ"""
+    print("🧪 Testing Command Line Mode...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        code, output = run_cli("--file", data_file, "add", "ประชุมทีม", "--due", "2024-01-15")
+        assert code == 0 and output['ok'] == True
+        task_id = output['results'][0]['task_id']
+        
+        code, output = run_cli("--file", data_file, "add", "Report", "--due", "bad-date")
+        assert code == 1 and output['ok'] == False
+        
+        run_cli("--file", data_file, "add", "Report", "--description", "monthly", "--due", "2099-01-01")
+        code, output = run_cli("--file", data_file, "done", task_id)
+        assert code == 0
+        
+        code, output = run_cli("--file", data_file, "search", "ประชุม")
+        assert [task['id'] for task in output] == [task_id]
+        
+        code, output = run_cli("--file", data_file, "list", "--pending")
+        assert [task['title'] for task in output] == ["Report"]
+        
+        code, output = run_cli("--file", data_file, "stats")
+        assert output == {'total': 2, 'pending': 1, 'completed': 1, 'overdue': 0}
+        
+        code, output = run_cli("--file", data_file, "rm", task_id, "missing")
+        assert code == 1
+        assert [result['ok'] for result in output['results']] == [True, False]
+        
+        # คำสั่งอ่านอย่างเดียวข้าม record ที่ TaskManager ไม่โหลด และคืนรูปแบบ Task.to_dict
+        bad_file = os.path.join(temp_dir, "bad.json")
+        with open(bad_file, 'w', encoding='utf-8') as f:
+            json.dump([{'id': "n1", 'title': None, 'due_date': "2024-01-15"}, 5,
+                       {'task_id': "a1", 'name': "foo legacy", 'due_date': "2024-01-15",
+                        'completed': "false"}], f)
+        code, output = run_cli("--file", bad_file, "search", "foo")
+        assert code == 0 and [task['id'] for task in output] == ["a1"]
+        assert output[0]['title'] == "foo legacy" and output[0]['completed'] == False
+        code, output = run_cli("--file", bad_file, "list", "--pending")
+        assert code == 0 and [task['id'] for task in output] == ["a1"]
+        code, output = run_cli("--file", bad_file, "stats")
+        assert output == {'total': 1, 'pending': 1, 'completed': 0, 'overdue': 1}
+        
+        # ไฟล์ที่ไม่มีอยู่ตอบเป็น JSON ข้อผิดพลาดแทน traceback
+        missing = os.path.join(temp_dir, "missing.json")
+        for argv in (["--file", data_file, "import", missing],
+                     ["migrate", missing, os.path.join(temp_dir, "tasks.db")],
+                     ["pack", missing, os.path.join(temp_dir, "tasks.snap")]):
+            code, output = run_cli(*argv)
+            assert code == 1 and output['ok'] == False and "missing.json" in output['error']
+        
+        print("✅ Command line mode test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def _concurrent_writer(data_file, storage_kind, worker, count):
+    """เพิ่มงานทีละชิ้นและบันทึกทุกครั้ง (ใช้ในโปรเซสลูกของการทดสอบ)"""
+    with redirect_stdout(io.StringIO()):
+        if storage_kind == "journal":
+            tm = TaskManager(storage=JournalStorage(data_file, compact_every=7))
+        else:
+            tm = TaskManager(data_file)
+        for i in range(count):
+            result = tm.add_many([{'title': f"worker {worker} task {i}", 'due_date': "2024-01-15"}])[0]
+            tm.commit()
+            if i % 3 == 0:
+                tm.mark_completed(result.task_id)
+                tm.commit()
+        tm.close()
+
+
+def test_concurrent_writers():
+    """ทดสอบหลายโปรเซสเขียนไฟล์เดียวกันพร้อมกันโดยไม่มีข้อมูลหาย"""
+    print("🧪 Testing Concurrent Writers...")
+    
+    workers, count = 4, 15
+    for storage_kind in ("json", "journal"):
+        temp_dir = tempfile.mkdtemp()
+        data_file = os.path.join(temp_dir, "tasks.json")
+        try:
+            processes = [
+                multiprocessing.Process(target=_concurrent_writer,
+                                        args=(data_file, storage_kind, worker, count))
+                for worker in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                assert process.exitcode == 0
+            
+            with redirect_stdout(io.StringIO()):
+                if storage_kind == "journal":
+                    tm = TaskManager(storage=JournalStorage(data_file))
+                else:
+                    tm = TaskManager(data_file)
+            titles = {task.title for task in tm.tasks}
+            assert len(tm.tasks) == workers * count, (storage_kind, len(tm.tasks))
+            assert titles == {f"worker {w} task {i}" for w in range(workers) for i in range(count)}
+            assert sum(task.completed for task in tm.tasks) == workers * len(range(0, count, 3))
+            tm.close()
+            
+            # ไม่มีไฟล์ชั่วคราวค้างจากการเขียนแบบ atomic
+            assert not [name for name in os.listdir(temp_dir) if name.endswith(".tmp")]
+        finally:
+            for name in os.listdir(temp_dir):
+                os.unlink(os.path.join(temp_dir, name))
+            os.rmdir(temp_dir)
+    
+    print("✅ Concurrent writers test passed!")
+
+
+def test_autosave():
+    """ทดสอบการติดตามการเปลี่ยนแปลงและการบันทึกอัตโนมัติแบบหน่วงเวลา"""
+    print("🧪 Testing Autosave...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        tm = TaskManager(data_file, autosave_delay=0.05, autosave_max_latency=0.2)
+        assert tm.dirty == False
+        for i in range(5):
+            tm.add_task(f"Task {i}", "", "2024-01-15")
+        assert tm.dirty == True
+        assert len(tm.dirty_task_ids()) == 5
+        
+        # การแก้ไขที่ติดกันถูกรวมเป็นการบันทึกครั้งเดียวหลังหน่วงเวลา
+        deadline = time.time() + 2
+        while tm.dirty and time.time() < deadline:
+            time.sleep(0.01)
+        assert tm.dirty == False
+        assert len(TaskManager(data_file).tasks) == 5
+        
+        # การแก้ไขที่ยังไม่ถึงเวลาบันทึกต้องถูกบันทึกตอนปิด
+        tm._autosaver.delay = 60
+        tm._autosaver.max_latency = 60
+        tm.mark_completed(tm.tasks[0].id)
+        assert tm.dirty_task_ids() == {tm.tasks[0].id}
+        tm.close()
+        assert TaskManager(data_file).tasks[0].completed == True
+        
+        print("✅ Autosave test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_sqlite_storage():
+    """ทดสอบ storage แบบ SQLite และการแปลงจาก JSON"""
+    print("🧪 Testing SQLite Storage...")
+    
+    temp_dir = tempfile.mkdtemp()
+    db_file = os.path.join(temp_dir, "tasks.db")
+    json_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        tm = TaskManager(storage=SqliteStorage(db_file))
+        tm.add_task("ประชุมทีมพัฒนา", "วางแผน sprint", "2024-01-15")
+        tm.add_task("Python Report", "monthly report", "2024-01-20")
+        tm.add_task("Future task", "", "2099-01-01")
+        first_id = tm.tasks[0].id
+        assert tm.mark_completed(first_id) == True
+        assert tm.mark_completed(first_id) == False
+        
+        # คำยาวใช้ FTS คำสั้นใช้ substring ผลต้องเหมือนการค้นหาในหน่วยความจำ
+        assert [task.title for task in tm.find_tasks("ประชุม")] == ["ประชุมทีมพัฒนา"]
+        assert [task.title for task in tm.find_tasks("py")] == ["Python Report"]
+        assert tm.count_search_results("REPORT") == 1
+        assert tm.count_search_results(due_date="2024-01-20") == 1
+        assert [task.title for task in tm.tasks_due_between("2024-01-01", "2024-12-31",
+                                                            include_completed=True)] == \
+            ["ประชุมทีมพัฒนา", "Python Report"]
+        assert [task.title for task in tm.overdue_tasks()] == ["Python Report"]
+        assert tm.count_overdue() == 1
+        
+        results = tm.add_many([{'id': first_id, 'title': "ซ้ำ", 'due_date': "2024-01-01"}])
+        assert results[0].ok == False
+        assert tm.delete_task(first_id) == True
+        tm.close()
+        
+        # ข้อมูลต้องอยู่ครบโดยไม่ต้องเรียก save_tasks
+        tm2 = TaskManager(storage=SqliteStorage(db_file))
+        assert [task.title for task in tm2.tasks] == ["Python Report", "Future task"]
+        assert [task.title for task in tm2.iter_tasks(completed=False)] == \
+            ["Python Report", "Future task"]
+        tm2.close()
+        
+        # แปลงไฟล์ JSON เป็น SQLite แล้วค้นหาผ่านโหมดคำสั่ง
+        json_tm = TaskManager(json_file)
+        json_tm.add_task("งานจาก JSON", "", "2024-02-01")
+        json_tm.save_tasks()
+        migrated = os.path.join(temp_dir, "migrated.db")
+        code, output = run_cli("migrate", json_file, migrated)
+        assert code == 0 and output['migrated'] == 1
+        code, output = run_cli("--storage", "sqlite", "--file", migrated, "search", "JSON")
+        assert [task['title'] for task in output] == ["งานจาก JSON"]
+        code, output = run_cli("--storage", "sqlite", "--file", migrated, "stats")
+        assert output == {'total': 1, 'pending': 1, 'completed': 0, 'overdue': 1}
+        
+        print("✅ SQLite storage test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_paginated_rendering():
+    """ทดสอบการแสดงผลทีละหน้าแบบ buffered"""
+    print("🧪 Testing Paginated Rendering...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        tm = TaskManager(data_file)
+        for i in range(5):
+            tm.add_task(f"Task {i}", "", "2099-01-01")
+        tm.mark_completed(tm.tasks[4].id)
+        
+        pages = list(tm.task_pages(completed=False, page_size=2))
+        assert [page.count for page in pages] == [2, 2]
+        assert [page.has_more for page in pages] == [True, False]
+        assert pages[0].cursor == 2 and "Task 1" in pages[0].text
+        
+        # เริ่มจาก cursor ได้โดยไม่ต้องจัดรูปแบบหน้าก่อนหน้า
+        pages = list(tm.task_pages(completed=False, page_size=2, cursor=3))
+        assert len(pages) == 1 and pages[0].count == 1 and "Task 3" in pages[0].text
+        
+        # หน้าแรกต้องได้โดยอ่านงานล่วงหน้าเพียงชิ้นเดียว
+        def endless():
+            i = 0
+            while True:
+                yield Task(f"Stream {i}", "", "2099-01-01")
+                i += 1
+        first = next(paginate(endless(), format_completed_task, page_size=3))
+        assert first.count == 3 and first.has_more
+        
+        # หยุดแสดงผลเมื่อ more() คืน False
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm.view_tasks(page_size=2, more=lambda: False)
+        text = output.getvalue()
+        assert "งานรอดำเนินการ (4 ชิ้น)" in text
+        assert "Task 1" in text and "Task 2" not in text
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm.search_tasks("task", page_size=10)
+        assert "ผลการค้นหา (5 ชิ้น)" in output.getvalue()
+        assert output.getvalue().count("ID: ") == 5
+        
+        print("✅ Paginated rendering test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_stats():
+    """ทดสอบตัวนับสถิติและ histogram วันที่ครบกำหนด"""
+    print("🧪 Testing Task Stats...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        tm = TaskManager(data_file)
+        assert tm.stats() == {'total': 0, 'pending': 0, 'completed': 0, 'overdue': 0}
+        tm.add_task("Overdue 1", "", "2020-01-06")
+        tm.add_task("Overdue 2", "", "2020-01-08")
+        tm.add_task("Future", "", "2099-01-01")
+        assert tm.stats() == {'total': 3, 'pending': 3, 'completed': 0, 'overdue': 2}
+        
+        tm.mark_completed(tm.tasks[0].id)
+        assert tm.stats() == {'total': 3, 'pending': 2, 'completed': 1, 'overdue': 1}
+        tm.delete_task(tm.tasks[1].id)
+        assert tm.stats() == {'total': 2, 'pending': 1, 'completed': 1, 'overdue': 0}
+        
+        assert tm.due_histogram() == [("2099-01-01", 1)]
+        assert tm.due_histogram(include_completed=True) == [("2020-01-06", 1), ("2099-01-01", 1)]
+        tm.add_task("Same week", "", "2020-01-10")
+        assert tm.due_histogram("week") == [("2020-01-06", 1), ("2098-12-29", 1)]
+        
+        # ตัวนับต้องตรงกับการนับใหม่ทั้งหมดหลังโหลดจากไฟล์
+        tm.save_tasks()
+        assert TaskManager(data_file).stats() == tm.stats()
+        
+        # storage แบบ SQLite คำนวณด้วย SQL ได้ผลเดียวกัน
+        db_tm = TaskManager(storage=SqliteStorage(os.path.join(temp_dir, "tasks.db")))
+        db_tm.add_many(task.to_dict() for task in tm.tasks)
+        assert db_tm.stats() == tm.stats()
+        assert db_tm.due_histogram("week") == tm.due_histogram("week")
+        db_tm.close()
+        
+        print("✅ Task stats test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_http_server():
+    """ทดสอบ HTTP/JSON API server และการรวมการเขียนเป็น batch"""
+    print("🧪 Testing HTTP Server...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    def call(port, method, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data,
+                                         method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+    
+    async def scenario():
+        with redirect_stdout(io.StringIO()):
+            tm = TaskManager(data_file)
+        server = TaskServer(tm, port=0)
+        await server.start()
+        loop = asyncio.get_running_loop()
+        request = lambda *args: loop.run_in_executor(None, call, server.port, *args)
+        try:
+            status, output = await request("POST", "/tasks",
+                                           {'title': "ประชุมทีม", 'due_date': "2024-01-15"})
+            assert status == 201
+            task_id = output['results'][0]['task_id']
+            
+            status, output = await request("POST", "/tasks", {'title': "", 'due_date': "x"})
+            assert status == 400 and output['ok'] == False
+            
+            # คำขอเขียนพร้อมกันต้องสำเร็จทั้งหมด
+            replies = await asyncio.gather(*(
+                request("POST", "/tasks", {'title': f"Task {i}", 'due_date': "2099-01-01"})
+                for i in range(20)
+            ))
+            assert all(status == 201 for status, _ in replies)
+            assert server.writes == 22 and server.commits <= 22
+            
+            status, output = await request("GET", "/tasks/search?q=%E0%B8%9B%E0%B8%A3%E0%B8%B0")
+            assert [task['id'] for task in output['tasks']] == [task_id]
+            
+            status, output = await request("GET", "/tasks?limit=15")
+            assert len(output['tasks']) == 15 and output['next_cursor'] == 15
+            status, output = await request("GET", "/tasks?limit=15&cursor=15")
+            assert len(output['tasks']) == 6 and output['next_cursor'] is None
+            
+            assert (await request("POST", f"/tasks/{task_id}/complete"))[0] == 200
+            assert (await request("POST", f"/tasks/{task_id}/complete"))[0] == 409
+            assert (await request("GET", f"/tasks/{task_id}"))[1]['completed'] == True
+            assert (await request("DELETE", "/tasks/missing"))[0] == 404
+            
+            status, output = await request("GET", "/stats")
+            assert output == {'total': 21, 'pending': 20, 'completed': 1, 'overdue': 0}
+            
+            # งานที่โปรแกรมอื่นเพิ่มถูกรวมเข้ามา และ index ถูกสร้างใหม่ใน event loop เท่านั้น
+            with redirect_stdout(io.StringIO()):
+                other = TaskManager(data_file)
+                other.add_task("จากโปรแกรมอื่น", "", "2099-01-01")
+                other.save_tasks()
+            threads = []
+            finish_save = tm.finish_save
+            tm.finish_save = lambda merged: (threads.append(threading.current_thread()),
+                                             finish_save(merged))
+            with redirect_stdout(io.StringIO()):
+                status, _ = await request("POST", "/tasks", {'title': "หลังรวม",
+                                                             'due_date': "2099-01-01"})
+            assert status == 201 and threads == [threading.main_thread()]
+            status, output = await request("GET", "/tasks/search?q=" + quote("โปรแกรม"))
+            assert [task['title'] for task in output['tasks']] == ["จากโปรแกรมอื่น"]
+            assert (await request("GET", "/stats"))[1]['total'] == 23
+        finally:
+            await server.close()
+    
+    try:
+        asyncio.run(scenario())
+        
+        # ทุกการเขียนที่ตอบกลับแล้วต้องอยู่ในไฟล์
+        with redirect_stdout(io.StringIO()):
+            assert len(TaskManager(data_file).tasks) == 23
+        
+        print("✅ HTTP server test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_schema_tolerant_loading():
+    """ทดสอบการโหลด record หลายรูปแบบและการข้าม record ที่ไม่ถูกต้อง"""
+    print("🧪 Testing Schema Tolerant Loading...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        # record รุ่นเก่า (ไม่มี 'v') และ schema ที่ใช้ task_id
+        legacy = Task.from_dict({'id': "a1", 'title': "Old", 'description': "",
+                                 'due_date': "2024-01-15", 'completed': False,
+                                 'created_at': "2024-01-10 09:00:00"})
+        assert legacy.id == "a1" and legacy.created_at == "2024-01-10 09:00:00"
+        assert legacy.to_dict()['v'] == RECORD_VERSION
+        aliased = Task.from_dict({'task_id': "TASK001", 'title': "ประชุมทีม",
+                                  'due_date': "2024-12-15", 'completed': "true"})
+        assert aliased.id == "TASK001" and aliased.completed == True
+        assert aliased.description == ""
+        
+        # 'v' กำหนดขั้นตอนการแปลง: record รุ่นปัจจุบันไม่ถูกแปลงชื่อ field และรุ่นใหม่กว่าถูกปฏิเสธ
+        assert upgrade_record({'v': 2, 'id': "a2", 'name': "x"}) == \
+            {'v': RECORD_VERSION, 'id': "a2", 'name': "x"}
+        for version in (RECORD_VERSION + 1, "2", 0):
+            try:
+                Task.from_dict({'v': version, 'id': "a3", 'title': "New", 'due_date': "2024-01-15"})
+                assert False, "ควรเกิด ValueError"
+            except ValueError:
+                pass
+        
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump([
+                {'task_id': "T1", 'title': "Good 1", 'description': "", 'due_date': "2024-01-15",
+                 'completed': False, 'created_at': "2024-01-10 09:00:00"},
+                {'task_id': "T2", 'description': "no title", 'due_date': "2024-01-15"},
+                42,
+                {'id': "T3", 'title': "Good 2", 'description': "", 'due_date': "2024-02-01",
+                 'completed': True, 'created_at': "2024-01-10 09:00:00"},
+            ], f, ensure_ascii=False)
+        
+        # record ที่เสียต้องไม่ทำให้งานอื่นหายทั้งหมด
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm = TaskManager(data_file)
+        assert [task.id for task in tm.tasks] == ["T1", "T3"]
+        assert "ข้ามข้อมูลที่ไม่ถูกต้อง 2 รายการ" in output.getvalue()
+        with open(data_file + ".quarantine.jsonl", encoding='utf-8') as f:
+            quarantined = [json.loads(line) for line in f]
+        assert [entry['record'] for entry in quarantined][1] == 42
+        assert quarantined[0]['record']['task_id'] == "T2"
+        
+        # โหลดไฟล์เดิมซ้ำไม่เขียน record ที่เสียลงไฟล์ quarantine ซ้ำ
+        with redirect_stdout(io.StringIO()):
+            TaskManager(data_file)
+        with open(data_file + ".quarantine.jsonl", encoding='utf-8') as f:
+            assert len(f.readlines()) == 2
+        
+        # นำเข้าไฟล์ที่ใช้ schema อื่นได้ด้วย
+        results = tm.import_tasks(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                               "demo_advanced.json"))
+        assert all(result.ok for result in results)
+        assert tm._find_task_by_id("TASK001") is not None
+        
+        print("✅ Schema tolerant loading test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_binary_snapshot():
+    """ทดสอบ binary snapshot ที่อ่านผ่าน mmap และการแปลงไป-กลับกับ JSON"""
+    print("🧪 Testing Binary Snapshot...")
+    
+    temp_dir = tempfile.mkdtemp()
+    snapshot_file = os.path.join(temp_dir, "tasks.snap")
+    json_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        today = date.today()
+        tasks = [
+            Task("ประชุมทีม", "รายสัปดาห์", (today - timedelta(days=3)).isoformat()),
+            Task("Report", "", (today + timedelta(days=3)).isoformat()),
+            Task("วันที่แปลก", "non-canonical", "2024-1-5"),
+        ]
+        tasks[1].completed = True
+        tasks[2].id = "a-very-long-task-identifier"
+        tasks[2].created_at = "เมื่อวาน"
+        write_snapshot(snapshot_file, tasks)
+        
+        with SnapshotStore(snapshot_file) as store:
+            assert len(store) == 3
+            assert [view.to_dict() for view in store] == [task.to_dict() for task in tasks]
+            assert store.find(tasks[1].id).title == "Report"
+            assert store.find(tasks[2].id).due_date == "2024-1-5"
+            assert store.find("missing") is None
+            assert list(store.overdue_rows()) == [0, 2]
+            assert store.count_completed() == 1
+            assert [task.to_dict() for task in store.to_tasks()] == \
+                [task.to_dict() for task in tasks]
+        
+        # TaskManager ใช้ snapshot เป็น storage ได้ และแปลงไป-กลับกับ JSON ได้
+        tm = TaskManager(storage=SnapshotStorage(snapshot_file))
+        assert len(tm.tasks) == 3
+        tm.add_task("New", "", "2099-01-01")
+        tm.save_tasks()
+        code, output = run_cli("unpack", snapshot_file, json_file)
+        assert code == 0 and output['tasks'] == 4
+        assert [task.title for task in TaskManager(json_file).tasks][-1] == "New"
+        os.unlink(snapshot_file)
+        code, output = run_cli("pack", json_file, snapshot_file)
+        assert output['tasks'] == 4
+        code, output = run_cli("--storage", "snapshot", "--file", snapshot_file, "stats")
+        assert output == {'total': 4, 'pending': 3, 'completed': 1, 'overdue': 2}
+        code, output = run_cli("--storage", "snapshot", "--file", snapshot_file, "search", "ประชุม")
+        assert [task['id'] for task in output] == [tasks[0].id]
+        
+        # อ่านงานทีละแถวแบบ lazy และไฟล์ที่ถูกตัดกลางทางให้ ValueError เดียว
+        assert not isinstance(SnapshotStorage(snapshot_file).iter_tasks(), list)
+        with open(snapshot_file, 'rb') as f:
+            data = f.read()
+        with open(snapshot_file, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        try:
+            SnapshotStore(snapshot_file)
+            assert False, "ควรเกิด ValueError"
+        except ValueError as e:
+            assert "ไม่สมบูรณ์" in str(e)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm = TaskManager(storage=SnapshotStorage(snapshot_file))
+        assert tm.tasks == [] and "เกิดข้อผิดพลาดในการโหลดข้อมูล" in output.getvalue()
+        
+        print("✅ Binary snapshot test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_instrumentation():
+    """ทดสอบการจับเวลา ตัวนับ byte ที่บันทึก และ export แบบ Prometheus"""
+    print("🧪 Testing Instrumentation...")
+    
+    temp_dir = tempfile.mkdtemp()
+    data_file = os.path.join(temp_dir, "tasks.json")
+    
+    try:
+        # ไม่ได้ส่ง metrics มา: method ไม่ถูกครอบเลย
+        tm = TaskManager(data_file)
+        assert 'add_task' not in vars(tm) and tm.metrics is None
+        
+        metrics = Metrics()
+        with redirect_stdout(io.StringIO()):
+            tm = TaskManager(data_file, metrics=metrics)
+            for i in range(20):
+                tm.add_task(f"ประชุม {i}", "", "2099-01-01")
+            tm.commit()
+            tm.find_tasks("ประชุม")
+            tm.view_tasks()
+        summary = metrics.summary()
+        assert summary['load_tasks']['calls'] == 1
+        assert summary['add_task']['calls'] == 20
+        assert summary['validate_date']['calls'] == 20
+        assert summary['save_tasks']['calls'] == 1
+        assert 0 <= summary['add_task']['p50'] <= summary['add_task']['p95'] \
+            <= summary['add_task']['p99'] <= summary['add_task']['seconds']
+        assert metrics.counters()['bytes_written'] == os.path.getsize(data_file)
+        
+        text = metrics.to_prometheus()
+        assert '# TYPE task_manager_operation_seconds summary' in text
+        assert 'task_manager_operation_seconds_count{operation="add_task"} 20' in text
+        assert 'task_manager_operation_seconds{operation="add_task",quantile="0.99"}' in text
+        assert 'task_manager_bytes_written_total ' in text
+        
+        # เปิดผ่าน environment variable และรายงาน/เขียนไฟล์เมื่อจบคำสั่ง
+        metrics_file = os.path.join(temp_dir, "metrics.prom")
+        os.environ["TASK_MANAGER_METRICS"] = "1"
+        os.environ["TASK_MANAGER_METRICS_FILE"] = metrics_file
+        os.environ["TASK_MANAGER_PROFILE"] = "cprofile,tracemalloc"
+        try:
+            stderr = io.StringIO()
+            with redirect_stdout(io.StringIO()), redirect_stderr(stderr):
+                main(["--file", data_file, "add", "งานใหม่", "--due", "2099-01-01"])
+        finally:
+            for name in ("TASK_MANAGER_METRICS", "TASK_MANAGER_METRICS_FILE",
+                         "TASK_MANAGER_PROFILE"):
+                del os.environ[name]
+        report = stderr.getvalue()
+        assert "📊" in report and "add_many" in report
+        assert "cumulative" in report and "tracemalloc" in report
+        with open(metrics_file, encoding='utf-8') as f:
+            assert 'operation="add_many"' in f.read()
+        
+        try:
+            ProfileSession(["gprof"])
+            assert False, "ควรแจ้งโหมดที่ไม่รู้จัก"
+        except ValueError:
+            pass
+        
+        print("✅ Instrumentation test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_recurring_tasks():
+    """ทดสอบงานที่ทำซ้ำ การขยายแต่ละครั้งตามช่วงวันที่ และการทำเสร็จทีละครั้ง"""
+    print("🧪 Testing Recurring Tasks...")
+    
+    temp_dir = tempfile.mkdtemp()
+    
+    try:
+        def days(rule, first, last):
+            return [date.fromordinal(day).isoformat() for day in
+                    rule.occurrences(date.fromisoformat(first).toordinal(),
+                                     date.fromisoformat(last).toordinal())]
+        
+        # รายเดือนจากวันที่ 31 จะเลื่อนเป็นวันสุดท้ายของเดือนที่สั้นกว่า
+        monthly = Recurrence('monthly', date(2024, 1, 31).toordinal())
+        assert days(monthly, "2024-01-01", "2024-04-30") == \
+            ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"]
+        # กระโดดไปยังครั้งแรกในช่วงได้ทันทีแม้ช่วงจะอยู่ไกลจากวันเริ่ม
+        assert days(monthly, "2124-02-01", "2124-02-29") == ["2124-02-29"]
+        weekly = Recurrence('weekly', date(2024, 1, 1).toordinal(), 2,
+                            until=date(2024, 2, 1).toordinal())
+        assert days(weekly, "2023-12-01", "2024-12-31") == ["2024-01-01", "2024-01-15", "2024-01-29"]
+        assert weekly.occurs_on(date(2024, 1, 15).toordinal())
+        assert not weekly.occurs_on(date(2024, 1, 8).toordinal())
+        assert weekly.describe().startswith("ทุก 2 สัปดาห์")
+        try:
+            Recurrence('hourly', date(2024, 1, 1).toordinal())
+            assert False, "ควรแจ้งความถี่ที่ไม่รู้จัก"
+        except ValueError:
+            pass
+        
+        # ทุก storage เก็บกฎการทำซ้ำและครั้งที่ทำเสร็จไว้ครบ
+        for kind in ("json", "journal", "sqlite", "snapshot"):
+            data_file = os.path.join(temp_dir, f"tasks.{kind}")
+            with redirect_stdout(io.StringIO()):
+                tm = TaskManager(storage=create_storage(kind, data_file))
+                tm.add_task("ล้างจาน", "", "2024-01-01", {'freq': 'daily'})
+                tm.add_task("ส่งรายงาน", "", "2024-01-03")
+                task_id = tm.find_tasks("ล้างจาน")[0].id
+                tm.commit()
+                assert tm.complete_occurrence(task_id, "2024-01-01")
+                assert tm.complete_occurrence(task_id, "2024-01-03")
+                assert not tm.complete_occurrence(task_id, "2024-01-03")
+                assert not tm.complete_occurrence(task_id, "2024-01-02T")
+                tm.commit()
+                tm.close()
+                tm = TaskManager(storage=create_storage(kind, data_file))
+            task = tm._find_task_by_id(task_id)
+            assert task.recurrence.to_dict() == {'freq': 'daily', 'interval': 1,
+                                                 'done_through': "2024-01-01",
+                                                 'done': ["2024-01-03"]}
+            assert task.due_date == "2024-01-01" and not task.completed
+            assert date.fromordinal(task.due_ordinal).isoformat() == "2024-01-02"
+            agenda = [(occurrence.task.title, occurrence.due_date) for occurrence in
+                      tm.occurrences_between("2024-01-01", "2024-01-04")]
+            assert agenda == [("ล้างจาน", "2024-01-02"), ("ส่งรายงาน", "2024-01-03"),
+                              ("ล้างจาน", "2024-01-04")], kind
+            assert len(tm.occurrences_between("2024-01-01", "2024-01-04", True)) == 5
+            # ค้นหาตามวันที่ของครั้งใดก็ได้ เช่นเดียวกับงานครั้งเดียว
+            assert [t.title for t in tm.find_tasks(due_date="2024-01-04")] == ["ล้างจาน"]
+            assert tm.count_search_results(due_date="2024-01-03") == 2
+            assert tm.count_search_results(due_date="2023-12-31") == 0
+            assert tm.stats() == {'total': 2, 'pending': 2, 'completed': 0, 'overdue': 2}
+            tm.close()
+        
+        # mark_completed ปิดครั้งถัดไป และงานที่มีวันสิ้นสุดจะเสร็จเมื่อครบทุกครั้ง
+        tm = TaskManager(os.path.join(temp_dir, "finite.json"))
+        with redirect_stdout(io.StringIO()):
+            tm.add_task("รดน้ำต้นไม้", "", "2024-01-01",
+                        {'freq': 'weekly', 'until': "2024-01-08"})
+            task_id = tm.tasks[0].id
+            assert tm.mark_completed(task_id)
+            assert not tm.tasks[0].completed
+            assert tm.mark_completed(task_id)
+        assert tm.tasks[0].completed
+        assert tm.stats() == {'total': 1, 'pending': 0, 'completed': 1, 'overdue': 0}
+        
+        # command line: add --repeat, done --on และ agenda
+        data_file = os.path.join(temp_dir, "cli.json")
+        code, output = run_cli("--file", data_file, "add", "Standup", "--due", "2024-03-04",
+                               "--repeat", "weekly")
+        task_id = output['results'][0]['task_id']
+        code, output = run_cli("--file", data_file, "done", task_id, "--on", "2024-03-11")
+        assert code == 0
+        code, output = run_cli("--file", data_file, "agenda", "2024-03-01", "2024-03-20")
+        assert [entry['due_date'] for entry in output] == ["2024-03-04", "2024-03-18"]
+        assert all(entry['recurring'] for entry in output)
+        code, output = run_cli("--file", data_file, "add", "Bad", "--due", "2024-03-04",
+                               "--repeat", "weekly", "--until", "2024-03-01")
+        assert code == 1
+        
+        print("✅ Recurring tasks test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_sharded_task_manager():
+    """ทดสอบการแบ่งงานเป็นหลาย shard การส่งการแก้ไขไปยัง shard เจ้าของ และการค้นหาข้าม shard"""
+    print("🧪 Testing Sharded Task Manager...")
+    
+    temp_dir = tempfile.mkdtemp()
+    
+    try:
+        today = date.today()
+        with redirect_stdout(io.StringIO()):
+            with ShardedTaskManager(temp_dir, shard_by="team", processes=2) as sharded:
+                assert sharded.add_task("Report", "", (today + timedelta(days=3)).isoformat(),
+                                        priority="สูง", shard="dev")
+                assert not sharded.add_task("ความสำคัญผิด", "", "2099-01-01", priority=9)
+                results = sharded.add_many([
+                    {'title': "ประชุมทีมพัฒนา", 'due_date': "2024-02-01", 'shard': "dev",
+                     'id': "dev-1", 'created_at': "2024-01-02 09:00:00"},
+                    {'title': "ประชุมทีมขาย", 'due_date': "2024-01-15", 'shard': "sales",
+                     'created_at': "2024-01-01 09:00:00"},
+                    {'title': "งานทั่วไป", 'due_date': "2099-01-01"},
+                    {'title': "ซ้ำ", 'due_date': "2099-01-01", 'shard': "sales", 'id': "dev-1"},
+                    {'title': "ชื่อ shard แปลก", 'due_date': "2099-01-01", 'shard': "../x"},
+                ])
+                assert [result.ok for result in results] == [True, True, True, False, False]
+                assert [result.index for result in results] == [0, 1, 2, 3, 4]
+                assert [(task.title, task.priority)
+                        for task in sharded.manager("dev").next_tasks(2)] == \
+                    [("ประชุมทีมพัฒนา", 2), ("Report", 1)]
+                assert sorted(sharded.dirty_shards()) == ["default", "dev", "sales"]
+                sharded.commit()
+                assert sharded.dirty_shards() == []
+            
+            sales_file = os.path.join(temp_dir, "sales.json")
+            sales_mtime = os.stat(sales_file).st_mtime_ns
+            with ShardedTaskManager(temp_dir, processes=2) as sharded:
+                assert sharded.shard_names() == ["default", "dev", "sales"]
+                # อ่านทุก shard ใน process pool แล้วรวมผลเรียงตามเวลาที่สร้าง
+                assert [task.title for task in sharded.find_tasks("ประชุม")] == \
+                    ["ประชุมทีมขาย", "ประชุมทีมพัฒนา"]
+                assert [task.id for task in sharded.find_tasks(due_date="2024-02-01")] == ["dev-1"]
+                assert sharded.stats() == {'total': 4, 'pending': 4, 'completed': 0, 'overdue': 2}
+                
+                # แก้ไขเฉพาะ shard dev: shard อื่นไม่ถูกโหลดหรือบันทึก
+                assert sharded.shard_of("dev-1") == "dev"
+                assert sharded.mark_completed("dev-1")
+                assert not sharded.mark_completed("missing")
+                assert sharded.dirty_shards() == ["dev"]
+                assert list(sharded._managers) == ["dev"]
+                # shard ที่โหลดแล้วอ่านจากหน่วยความจำ จึงเห็นการเปลี่ยนแปลงที่ยังไม่บันทึก
+                assert [task.id for task in sharded.list_tasks(completed=True)] == ["dev-1"]
+                assert sharded.stats() == {'total': 4, 'pending': 3, 'completed': 1, 'overdue': 1}
+                sharded.commit()
+                results = sharded.delete_many(["dev-1", "missing"])
+                assert [result.ok for result in results] == [True, False]
+                assert sharded.shard_of("dev-1") is None
+                sharded.commit()
+            assert os.stat(sales_file).st_mtime_ns == sales_mtime
+            assert len(TaskManager(os.path.join(temp_dir, "dev.json")).tasks) == 1
+            
+            # แบ่งตามเดือนที่ครบกำหนด
+            month_dir = os.path.join(temp_dir, "by_month")
+            with ShardedTaskManager(month_dir, "sqlite", shard_by="month", processes=1) as sharded:
+                sharded.add_task("มกราคม", "", "2024-01-31")
+                sharded.add_task("กุมภาพันธ์", "", "2024-02-01")
+                assert not sharded.add_task("วันที่ผิด", "", "2024-13-01")
+                assert sharded.shard_names() == ["2024-01", "2024-02"]
+            
+            # shard ที่มี record เสียถูกข้ามแบบเดียวกับ TaskManager ทั้งการค้นหาและสถิติ
+            bad_dir = os.path.join(temp_dir, "bad")
+            os.mkdir(bad_dir)
+            with open(os.path.join(bad_dir, "ops.json"), 'w', encoding='utf-8') as f:
+                json.dump([{'id': "ok-1", 'title': "ประชุม ops", 'due_date': "2099-01-01"},
+                           {'id': "bad-1", 'title': None, 'due_date': "2099-01-01"}], f)
+            with ShardedTaskManager(bad_dir, processes=2) as sharded:
+                assert [task.id for task in sharded.find_tasks("ประชุม")] == ["ok-1"]
+                assert sharded.stats()['total'] == len(sharded.list_tasks()) == 1
+        
+        try:
+            ShardedTaskManager(temp_dir, shard_by="priority")
+            assert False, "ควรแจ้งวิธีแบ่ง shard ที่ไม่รู้จัก"
+        except ValueError:
+            pass
+        
+        print("✅ Sharded task manager test passed!")
+        
+    finally:
+        for root, dirs, files in os.walk(temp_dir, topdown=False):
+            for name in files:
+                os.unlink(os.path.join(root, name))
+            os.rmdir(root)
+
+
+def test_ready_queue():
+    """ทดสอบความสำคัญของงานและคิวงานที่ควรทำถัดไป"""
+    print("🧪 Testing Ready Queue...")
+    
+    temp_dir = tempfile.mkdtemp()
+    
+    try:
+        today = date.today()
+        day = lambda offset: (today + timedelta(days=offset)).isoformat()
+        expected = ["เลยกำหนด สำคัญ", "เลยกำหนด ไม่สำคัญ", "สำคัญ ใกล้", "สำคัญ ไกล", "ปกติ"]
+        
+        # ทุก storage ให้ลำดับเดียวกัน: เลยกำหนดก่อน แล้วตามความสำคัญและวันที่
+        for kind in ("json", "journal", "sqlite", "snapshot"):
+            data_file = os.path.join(temp_dir, f"tasks.{kind}")
+            with redirect_stdout(io.StringIO()):
+                tm = TaskManager(storage=create_storage(kind, data_file))
+                tm.add_task("ปกติ", "", day(1))
+                tm.add_task("สำคัญ ไกล", "", day(30), priority="high")
+                tm.add_task("เลยกำหนด ไม่สำคัญ", "", day(-5), priority=3)
+                tm.add_task("สำคัญ ใกล้", "", day(2), priority="สูง")
+                tm.add_task("เลยกำหนด สำคัญ", "", day(-1), priority=1)
+                assert not tm.add_task("ผิด", "", day(1), priority=7)
+                tm.commit()
+                tm.close()
+                tm = TaskManager(storage=create_storage(kind, data_file))
+            assert [task.title for task in tm.next_tasks(10)] == expected, kind
+            assert [task.title for task in tm.next_tasks(2)] == expected[:2]
+            with redirect_stdout(io.StringIO()):
+                assert tm.pop_next().title == expected[0]
+                low = tm.next_tasks(1)[0]
+                assert tm.set_priority(tm.next_tasks(4)[2].id, "low")
+                tm.mark_completed(low.id)
+                tm.commit()
+                tm.close()
+                tm = TaskManager(storage=create_storage(kind, data_file))
+            assert [task.title for task in tm.next_tasks(10)] == ["สำคัญ ใกล้", "ปกติ", "สำคัญ ไกล"]
+            tm.close()
+        
+        # งานที่ทำซ้ำกลับเข้าคิวตามวันที่ของครั้งถัดไป
+        tm = TaskManager(os.path.join(temp_dir, "recurring.json"))
+        with redirect_stdout(io.StringIO()):
+            tm.add_task("รดน้ำต้นไม้", "", day(-1), {'freq': 'daily'}, priority=1)
+            tm.add_task("ประชุม", "", day(0), priority=1)
+            assert tm.pop_next().title == "รดน้ำต้นไม้"
+            # ครั้งถัดไปครบกำหนดวันนี้เท่ากับงานอื่น จึงต่อคิวหลังงานที่อยู่ก่อน
+            assert [(task.title, task.due_ordinal) for task in tm.next_tasks(2)] == \
+                [("ประชุม", today.toordinal()), ("รดน้ำต้นไม้", today.toordinal())]
+            tm.pop_next()
+            tm.pop_next()
+            assert [(task.title, task.due_ordinal) for task in tm.next_tasks(2)] == \
+                [("รดน้ำต้นไม้", today.toordinal() + 1)]
+        
+        # ReadyQueue: lazy deletion, heapify ตอนสร้างใหม่ และคำนวณใหม่เมื่อข้ามวัน
+        tasks = [Task(f"งาน {i}", "", day(i % 7 - 3)) for i in range(200)]
+        queue = ReadyQueue()
+        queue.rebuild(tasks)
+        for task in tasks[:150]:
+            queue.discard(task.id)
+        assert len(queue) == 50 and len(queue._heap) <= 2 * 50 + 64
+        remaining = sorted(tasks[150:], key=lambda task: (not task.is_overdue(), task.due_ordinal))
+        assert queue.peek(5) == [task.id for task in remaining[:5]]
+        queue._today -= 7
+        assert queue.peek(1)[0] == remaining[0].id
+        assert queue.pop() == remaining[0].id and len(queue) == 49
+        
+        code, output = run_cli("--file", os.path.join(temp_dir, "cli.json"), "add", "ด่วน",
+                               "--due", day(3), "--priority", "high")
+        assert code == 0
+        run_cli("--file", os.path.join(temp_dir, "cli.json"), "add", "ไม่ด่วน", "--due", day(1))
+        code, output = run_cli("--file", os.path.join(temp_dir, "cli.json"), "next", "-n", "1")
+        assert [(task['title'], task['priority']) for task in output] == [("ด่วน", 1)]
+        
+        print("✅ Ready queue test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+def test_benchmark_suite():
+    """ทดสอบข้อมูลจำลองและ benchmark แบบย่อ (รูปแบบ record ต้องโหลดด้วย Task.from_dict ได้)"""
+    print("🧪 Testing Benchmark Suite...")
+    
+    temp_dir = tempfile.mkdtemp()
+    
+    try:
+        records = list(benchmark_task_manager.generate_records(50, seed=7))
+        assert records == list(benchmark_task_manager.generate_records(50, seed=7))
+        
+        # ไฟล์จำลองทั้งสอง schema โหลดได้ครบโดยไม่มี record ที่ถูกข้าม
+        for schema in ("current", "alias"):
+            path = os.path.join(temp_dir, f"{schema}.json")
+            benchmark_task_manager.write_task_file(path, 50, schema=schema, seed=7)
+            skipped = []
+            tasks = list(tasks_from_records(iter_task_records(path), skipped=skipped))
+            assert skipped == [] and len(tasks) == 50
+            assert [(task.title, task.description, task.due_date, task.completed)
+                    for task in tasks] == records
+        
+        with redirect_stdout(io.StringIO()):
+            results = benchmark_task_manager.benchmark_operations(200, "json", repeat=1,
+                                                                  memory=False)
+            scaling = benchmark_task_manager.benchmark_scaling([100, 200], "json", batch=20,
+                                                               repeat=1)
+        assert all(result['tasks'] == 200 and result['seconds'] >= 0
+                   for result in results.values())
+        assert {'load_tasks', 'search_keyword', 'add_task', 'save_tasks'} <= set(results)
+        assert set(scaling['growth']) == {'add_many', 'complete_many', 'delete_many'}
+        assert benchmark_task_manager.compare_results(results, results) == []
+        
+        print("✅ Benchmark suite test passed!")
+        
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
 def run_all_tests():
     """รันการทดสอบทั้งหมด"""
     print("🚀 Starting Task Manager Tests...")
@@ -165,6 +1415,27 @@ def run_all_tests():
         test_task_manager()
         test_validation()
         test_search_functionality()
+        test_journal_storage()
+        test_task_index()
+        test_search_index()
+        test_due_date_index()
+        test_task_store()
+        test_streaming_load()
+        test_batch_operations()
+        test_command_line()
+        test_concurrent_writers()
+        test_autosave()
+        test_sqlite_storage()
+        test_paginated_rendering()
+        test_stats()
+        test_http_server()
+        test_schema_tolerant_loading()
+        test_binary_snapshot()
+        test_instrumentation()
+        test_recurring_tasks()
+        test_sharded_task_manager()
+        test_ready_queue()
+        test_benchmark_suite()
         
         print("=" * 50)
         print("🎉 All tests passed successfully!")